@@ -0,0 +1,129 @@
+"""
+benchmarks/fixtures.py - synthetic weekly and payroll workbooks.
+
+Weekly files follow the form the parser expects: ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ with the
+dates in row 8 (C..I) and one employee per row from row 10 ("ΑΦΜ ΟΝΟΜΑ",
+τύπος, 7 ωράρια or ΡΕΠΟ), plus ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ with ΩΡΑ ΛΗΞΗΣ+30 /
+ΩΡΑ ΑΠΟΧΩΡΗΣΗ in the OT_COLUMNS of each weekday. A share of the
+departure cells holds the messy values seen in real files (blank, #VALUE!,
+time objects, Excel fractions, "HH.MM"). The payroll has one 6-row
+ΩΡΟΜΕΤΡΗΣΗ block per employee (ΑΦΜ in E, label in G, day 1 in H).
+The same seed always gives the same files.
+
+    python -m benchmarks.fixtures out_dir [--employees 500] [--weeks 4] [--year 2025] [--month 7]
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, datetime, time, timedelta
+
+import openpyxl
+
+from utils.metrics import get_metric_rows
+from utils.month_layout import OT_COLUMNS
+
+PAYROLL_LABELS = list(get_metric_rows(None, 0))
+REPO_SHARE = 0.2
+MESSY_SHARE = 0.1
+
+
+def employee_afms(employees):
+    return [f"{100000000 + k * 7:09d}" for k in range(employees)]
+
+
+def week_mondays(year, month, weeks):
+    """Mondays of `weeks` consecutive weeks starting with the week of the 1st."""
+    first = date(year, month, 1)
+    monday = first - timedelta(days=first.weekday())
+    return [datetime.combine(monday + timedelta(weeks=w), time()) for w in range(weeks)]
+
+
+def _hhmm(minutes):
+    return f"{(minutes // 60) % 24:02d}:{minutes % 60:02d}"
+
+
+def _messy_departure(rnd, minutes):
+    token = _hhmm(minutes)
+    return rnd.choice(["", "#VALUE!", None, time((minutes // 60) % 24, minutes % 60),
+                       (minutes % 1440) / 1440.0, token.replace(":", "."), token + ":00", f" {token} "])
+
+
+def make_weekly_workbook(path, afms, monday, seed=1):
+    rnd = random.Random(f"{seed}:{monday:%Y%m%d}")
+    wb = openpyxl.Workbook()
+    form = wb.active
+    form.title = "ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ"
+    times = wb.create_sheet("ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ")
+
+    for i in range(7):
+        form.cell(row=8, column=3 + i, value=monday + timedelta(days=i))
+
+    for k, afm in enumerate(afms):
+        r = 10 + k
+        form.cell(row=r, column=1, value=f"{afm} ΟΝΟΜΑ{k}")
+        form.cell(row=r, column=2, value=rnd.choice(["5ΗΜΕΡΟΣ", "6ΗΜΕΡΟΣ"]))
+        times.cell(row=r, column=1, value=f"{afm} ΟΝΟΜΑ{k}")
+        for d in range(7):
+            if rnd.random() < REPO_SHARE:
+                form.cell(row=r, column=3 + d, value="ΡΕΠΟ")
+                continue
+            start = rnd.choice([6, 8, 14, 22])
+            form.cell(row=r, column=3 + d, value=f"{start:02d}:00-{(start + 8) % 24:02d}:00")
+            left, right = OT_COLUMNS[(monday + timedelta(days=d)).weekday()]
+            end_plus_30 = (start + 8) % 24 * 60 + 30
+            departure = end_plus_30 + rnd.choice([0, 15, 45, 90, 200])
+            times.cell(row=r, column=left, value=_hhmm(end_plus_30))
+            times.cell(row=r, column=right, value=(_messy_departure(rnd, departure) if rnd.random() < MESSY_SHARE
+                                                   else _hhmm(departure)))
+    wb.save(path)
+    return path
+
+
+def make_payroll_workbook(path, afms):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "ΩΡΟΜΕΤΡΗΣΗ"
+    for d in range(1, 32):
+        ws.cell(row=1, column=7 + d, value=d)
+    for k, afm in enumerate(afms):
+        base = 2 + 6 * k
+        ws.cell(row=base, column=1, value=f"ΟΝΟΜΑ{k}")
+        for j, label in enumerate(PAYROLL_LABELS):
+            ws.cell(row=base + j, column=5, value=afm)
+            ws.cell(row=base + j, column=7, value=label)
+    wb.create_sheet("ΣΗΜΕΙΩΣΕΙΣ")["A1"] = "synthetic"
+    wb.save(path)
+    return path
+
+
+def generate(out_dir, employees=500, weeks=4, year=2025, month=7, seed=1):
+    """
+    Writes week_YYYY-MM-DD.xlsx files and payroll.xlsx into out_dir.
+    Returns {"weekly": [paths], "payroll": path, "employees", "weeks", "year", "month", "seed"}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    afms = employee_afms(employees)
+    weekly = [make_weekly_workbook(os.path.join(out_dir, f"week_{monday:%Y-%m-%d}.xlsx"), afms, monday, seed)
+              for monday in week_mondays(year, month, weeks)]
+    payroll = make_payroll_workbook(os.path.join(out_dir, "payroll.xlsx"), afms)
+    return {"weekly": weekly, "payroll": payroll, "employees": employees, "weeks": weeks,
+            "year": year, "month": month, "seed": seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Συνθετικά εβδομαδιαία αρχεία και μισθοδοσία")
+    parser.add_argument("out_dir")
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("-m", "--month", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    info = generate(args.out_dir, args.employees, args.weeks, args.year, args.month, args.seed)
+    print(json.dumps(info, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
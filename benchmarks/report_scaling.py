@@ -0,0 +1,88 @@
+"""
+benchmarks/report_scaling.py - serial vs process-pool metric computation.
+
+Times report_logic.compute_metric_writes (serial) and
+compute_metric_writes_parallel for each worker count on synthetic
+employee-days, and checks that every parallel result equals the serial one.
+With --weekly/--payroll the whole report stage of run_export (dry run) is
+timed instead.
+
+    python -m benchmarks.report_scaling [--entries 200000] [--employees 7000] [--workers 1 2 4 8]
+    python -m benchmarks.report_scaling --weekly weekly.xlsx --payroll payroll.xlsx --month 7
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from report_logic import compute_metric_writes, compute_metric_writes_parallel
+from utils.metrics import get_metric_rows
+
+
+def make_jobs(n_entries, n_employees, seed=1):
+    rnd = random.Random(seed)
+    jobs, afms = [], []
+    for i in range(n_entries):
+        emp = i % n_employees
+        start = rnd.randrange(0, 24 * 60)
+        end = (start + rnd.choice([0, 15, 45, 90, 200])) % (24 * 60)
+        jobs.append((start, end, i % 7 == 6, rnd.choice(["5ΗΜΕΡΟΣ", "6ΗΜΕΡΟΣ"]), get_metric_rows(None, 2 + 6 * emp)))
+        afms.append(f"{100000000 + emp:09d}")
+    return jobs, afms
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, round(time.perf_counter() - t0, 4)
+
+
+def bench_jobs(args, worker_counts):
+    jobs, afms = make_jobs(args.entries, args.employees)
+    serial, t_serial = _timed(compute_metric_writes, jobs)
+    runs = [{"workers": 1, "seconds": t_serial, "speedup": 1.0, "identical": True}]
+    for w in worker_counts:
+        if w <= 1:
+            continue
+        parallel, t = _timed(compute_metric_writes_parallel, jobs, afms, w)
+        runs.append({"workers": w, "seconds": t, "speedup": round(t_serial / t, 2) if t else None,
+                     "identical": parallel == serial})
+    return {"entries": args.entries, "employees": args.employees, "runs": runs}
+
+
+def bench_files(args, worker_counts):
+    from export_pipeline import run_export
+
+    runs, baseline = [], None
+    for w in [1] + [w for w in worker_counts if w > 1]:
+        result = run_export(args.weekly, args.payroll, args.month, dry_run=True, report_workers=w)
+        plan = result["write_plan"]
+        baseline = baseline if baseline is not None else plan
+        t = result["timings"]["report"]
+        runs.append({"workers": w, "seconds": t, "speedup": round(runs[0]["seconds"] / t, 2) if runs and t else 1.0,
+                     "identical": plan == baseline})
+    return {"weekly": args.weekly, "payroll": args.payroll, "runs": runs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Κλιμάκωση παράλληλου υπολογισμού metrics")
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--employees", type=int, default=7_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Πλήθη διεργασιών (default: 1, 2, 4, ... έως os.cpu_count())")
+    parser.add_argument("--weekly")
+    parser.add_argument("--payroll")
+    parser.add_argument("-m", "--month", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, cpus} | {2 ** k for k in range(1, 6) if 2 ** k <= cpus})
+    result = bench_files(args, worker_counts) if args.weekly and args.payroll else bench_jobs(args, worker_counts)
+    result["cpu_count"] = cpus
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,69 @@
+"""
+benchmarks/schedule_memory.py - memory of parsed schedule entries: dicts vs ScheduleEntry.
+
+Builds N entries the way parse_weekly_schedule does (7 days per form row,
+AFM / τύπος per row, "HH:MM" strings from _to_hhmm) once as the old 7-key
+dicts and once as ScheduleEntry, and reports the traced allocation of each.
+
+    python -m benchmarks.schedule_memory [--entries 100000]
+"""
+import argparse
+import json
+import tracemalloc
+from datetime import date, timedelta
+
+from report_logic import _to_hhmm
+from utils.schedule import ScheduleEntry
+
+WEEK = [date(2025, 7, 7) + timedelta(days=i) for i in range(7)]
+
+
+def _raw_rows(n_entries):
+    """(date, afm, hours, work_type, end_plus_30, departure) like the weekly reader yields them."""
+    for i in range(n_entries):
+        row, day = divmod(i, 7)
+        afm = str(100000000 + row).strip()
+        work_type = " ".join(["5ΗΜΕΡΟΣ" if row % 3 else "6ΗΜΕΡΟΣ"])
+        start = (row * 7 + day) % 12
+        yield (WEEK[day], afm, 8.0 + (day % 2) * 0.5, work_type,
+               _to_hhmm((start + 8.5) / 24.0), _to_hhmm((start + 9.25) / 24.0))
+
+
+def build_dicts(n_entries):
+    return [{
+        "date": d, "employee": afm, "hours": hours, "work_type": wt,
+        "ΩΡΑΡΙΟ": hours, "ΩΡΑ ΛΗΞΗΣ+30": end30, "ΩΡΑ ΑΠΟΧΩΡΗΣΗ": dep,
+    } for d, afm, hours, wt, end30, dep in _raw_rows(n_entries)]
+
+
+def build_entries(n_entries):
+    return [ScheduleEntry(d, afm, hours, wt, end30, dep)
+            for d, afm, hours, wt, end30, dep in _raw_rows(n_entries)]
+
+
+def measure(builder, n_entries):
+    tracemalloc.start()
+    rows = builder(n_entries)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return {"bytes": current, "peak_bytes": peak, "bytes_per_entry": round(current / max(1, n_entries), 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Μνήμη schedule entries: dict vs ScheduleEntry")
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    result = {
+        "entries": args.entries,
+        "dict": measure(build_dicts, args.entries),
+        "ScheduleEntry": measure(build_entries, args.entries),
+    }
+    result["ratio"] = round(result["ScheduleEntry"]["bytes"] / max(1, result["dict"]["bytes"]), 3)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+"""
+benchmarks/stages.py - time and peak memory of each pipeline stage.
+
+Generates (or reuses) synthetic workbooks with benchmarks.fixtures and
+measures, separately:
+
+    parse           ingest_weekly_streaming of every weekly file
+    load_payroll    openpyxl.load_workbook of the payroll
+    payroll_warm    WorkbookCache.snapshot of the payroll, already cached (a repeat GUI run)
+    index_sweep     report_logic.index_payroll without a layout store (ΑΦΜ / label sweep)
+    index_stored    report_logic.index_payroll with a warm LayoutStore (a --layout-dir hit)
+    tagging         tag_schedule_rows_with_repo_from_form, once per week's form
+    report          generate_monthly_report into a WritePlan (tagging included)
+    update_sundays  utils.metrics.update_sundays over every employee block
+    save_targeted   utils.xlsx_patch.save_patched of the report's plan
+    save_openpyxl   wb.save of the payroll with the plan applied
+
+Every stage gets a fresh setup (not timed) per run; seconds are the min and
+median of --repeat runs, peak_mb comes from one extra run under tracemalloc
+(skipped with --no-memory). The JSON output carries the parameters and the
+environment, so runs can be compared: --compare old.json adds the ratio per
+stage and exits with 1 when a stage is slower than --threshold / --min-delta allow.
+
+    python -m benchmarks.stages [--employees 500] [--weeks 4] [--repeat 3] [-o result.json]
+    python -m benchmarks.stages --data-dir /tmp/bench3k --employees 3000 --compare base.json
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+from benchmarks.fixtures import employee_afms, generate
+from export_pipeline import (PAYROLL_SHEET_NAMES, SpreadsheetWrapper, _get_sheet, ingest_weekly_streaming,
+                             make_message_log)
+from report_logic import EmployeeIndex, generate_monthly_report, index_payroll, tag_schedule_rows_with_repo_from_form
+from utils.layout_index import LayoutStore
+from utils.metrics import BlockLabelIndex, update_sundays
+from utils.schedule import ScheduleEntry
+from utils.spreadsheet_utils import get_column_from_day
+from utils.workbook_cache import WorkbookCache
+from utils.write_plan import WritePlan
+from utils.xlsx_patch import save_patched
+
+RESULT_VERSION = 1
+FIXTURE_KEYS = ("employees", "weeks", "year", "month", "seed")
+STAGES = ["parse", "load_payroll", "payroll_warm", "index_sweep", "index_stored", "tagging", "report",
+          "update_sundays", "save_targeted", "save_openpyxl"]
+
+
+def _copy_rows(rows):
+    # tagging marks entries and appends ΡΕΠΟ ones, so every run starts from a fresh copy
+    return [ScheduleEntry(e.date, e.employee, e.hours, e.work_type, e.end_plus_30, e.departure, e.is_repo)
+            for e in rows]
+
+
+class StageBench:
+    """Shared inputs (parsed weeks, report plan) computed once, plus setup/run pairs per stage."""
+
+    def __init__(self, data, out_dir):
+        self.data = data
+        self.out_dir = out_dir
+        self.gui = make_message_log(None, "error")
+        self._parsed = None
+        self._plan = None
+        self._layout_store = None
+
+    def parsed(self):
+        if self._parsed is None:
+            self._parsed = [ingest_weekly_streaming(path) for path in self.data["weekly"]]
+        return self._parsed
+
+    def _rows_and_forms(self):
+        rows = []
+        for week_rows, _, _ in self.parsed():
+            rows.extend(week_rows)
+        return _copy_rows(rows), [form for _, _, form in self.parsed()]
+
+    def _load_payroll(self):
+        wb = openpyxl.load_workbook(self.data["payroll"])
+        return wb, _get_sheet(wb, PAYROLL_SHEET_NAMES)
+
+    def plan(self):
+        if self._plan is None:
+            self._plan = self.run_report(*self.setup_report())
+        return self._plan
+
+    # --- stages: setup_<name>() -> args, run_<name>(*args) ---
+    def setup_parse(self):
+        return ()
+
+    def run_parse(self):
+        return [ingest_weekly_streaming(path) for path in self.data["weekly"]]
+
+    def setup_load_payroll(self):
+        return ()
+
+    def run_load_payroll(self):
+        return self._load_payroll()
+
+    def setup_payroll_warm(self):
+        cache = WorkbookCache()
+        cache.get(self.data["payroll"])
+        return (cache,)
+
+    def run_payroll_warm(self, cache):
+        return cache.snapshot(self.data["payroll"], functools.partial(_get_sheet, candidates=PAYROLL_SHEET_NAMES))
+
+    def setup_index_sweep(self):
+        return (self._load_payroll()[1],)
+
+    def run_index_sweep(self, ws):
+        return index_payroll(ws)
+
+    def setup_index_stored(self):
+        if self._layout_store is None:
+            self._layout_store = LayoutStore(os.path.join(self.out_dir, "layout"))
+            index_payroll(self._load_payroll()[1], self._layout_store)
+        return self._load_payroll()[1], self._layout_store
+
+    def run_index_stored(self, ws, store):
+        result = index_payroll(ws, store)
+        if store.last_status != "hit":
+            raise RuntimeError(f"index_stored: αναμενόταν hit, βρέθηκε {store.last_status}")
+        return result
+
+    def setup_tagging(self):
+        wb, ws = self._load_payroll()
+        rows, forms = self._rows_and_forms()
+        labels = BlockLabelIndex()
+        index = EmployeeIndex(ws, on_row=labels.add_row)
+        return SpreadsheetWrapper(ws, wb), index, labels, rows, forms
+
+    def run_tagging(self, spreadsheet, index, labels, rows, forms):
+        plan = WritePlan()
+        for form in forms:
+            rows = tag_schedule_rows_with_repo_from_form(
+                rows, self.gui, forma_ws=form, start_row=10, end_row=150, spreadsheet=spreadsheet,
+                month=self.data["month"], get_column_from_day=get_column_from_day,
+                employee_index=index, write_plan=plan, label_index=labels,
+            )
+        return plan
+
+    def setup_report(self):
+        wb, ws = self._load_payroll()
+        rows, forms = self._rows_and_forms()
+        return SpreadsheetWrapper(ws, wb), rows, forms
+
+    def run_report(self, spreadsheet, rows, forms):
+        plan = WritePlan()
+        generate_monthly_report(rows, self.data["month"], spreadsheet, self.gui, get_column_from_day,
+                                forma_sheets=forms, times_from_entries=True, write_plan=plan,
+                                apply_writes=False)
+        return plan
+
+    def setup_update_sundays(self):
+        wb, ws = self._load_payroll()
+        self.plan().apply(ws)
+        index = EmployeeIndex(ws, min_row=2, columns=(5,))
+        row_lists = [index.find(afm, strict=True) for afm in employee_afms(self.data["employees"])]
+        return ws, [rows for rows in row_lists if rows]
+
+    def run_update_sundays(self, ws, row_lists):
+        update_sundays(ws, row_lists, self.data["year"], self.data["month"])
+
+    def setup_save_targeted(self):
+        return self.plan().items(), os.path.join(self.out_dir, "out_targeted.xlsx")
+
+    def run_save_targeted(self, cells, save_path):
+        save_patched(self.data["payroll"], save_path, PAYROLL_SHEET_NAMES[0], cells)
+
+    def setup_save_openpyxl(self):
+        wb, ws = self._load_payroll()
+        self.plan().apply(ws)
+        return wb, os.path.join(self.out_dir, "out_openpyxl.xlsx")
+
+    def run_save_openpyxl(self, wb, save_path):
+        wb.save(save_path)
+
+
+def measure(setup, run, repeat=3, memory=True):
+    seconds = []
+    for _ in range(repeat):
+        args = setup()
+        t0 = time.perf_counter()
+        run(*args)
+        seconds.append(time.perf_counter() - t0)
+    result = {"seconds_min": round(min(seconds), 4), "seconds_median": round(statistics.median(seconds), 4),
+              "runs": [round(s, 4) for s in seconds]}
+    if memory:
+        args = setup()
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            run(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        result["peak_mb"] = round((peak - base) / 2 ** 20, 2)
+    return result
+
+
+def environment():
+    return {"python": platform.python_version(), "openpyxl": openpyxl.__version__,
+            "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+def compare(result, baseline, threshold, min_delta=0.05):
+    """
+    Adds result["compare"]; returns the names of stages slower than
+    baseline * (1 + threshold) by more than min_delta seconds (timer noise).
+    """
+    regressions = []
+    table = {}
+    for name, stage in result["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old or not old.get("seconds_min"):
+            continue
+        ratio = stage["seconds_min"] / old["seconds_min"]
+        entry = {"baseline_seconds": old["seconds_min"], "ratio": round(ratio, 3)}
+        if "peak_mb" in stage and old.get("peak_mb"):
+            entry["peak_mb_ratio"] = round(stage["peak_mb"] / old["peak_mb"], 3)
+        entry["regression"] = ratio > 1 + threshold and stage["seconds_min"] - old["seconds_min"] > min_delta
+        if entry["regression"]:
+            regressions.append(name)
+        table[name] = entry
+    if any(baseline.get("params", {}).get(k) != result["params"][k] for k in FIXTURE_KEYS):
+        table["_warning"] = "διαφορετικές παράμετροι από το baseline"
+    result["compare"] = table
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Χρόνος και μνήμη ανά στάδιο της εξαγωγής")
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("-m", "--month", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--no-memory", action="store_true", help="Χωρίς tracemalloc (μόνο χρόνοι)")
+    parser.add_argument("--data-dir", help="Φάκελος για τα συνθετικά αρχεία (επαναχρησιμοποιούνται αν υπάρχουν)")
+    parser.add_argument("-o", "--output", help="Αποθήκευση του JSON σε αρχείο")
+    parser.add_argument("--compare", help="JSON προηγούμενης εκτέλεσης για σύγκριση")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Ανεκτή επιβράδυνση πριν θεωρηθεί regression (default: 0.2 = +20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Ελάχιστη διαφορά σε δευτερόλεπτα για regression (default: 0.05)")
+    args = parser.parse_args(argv)
+
+    params = {"employees": args.employees, "weeks": args.weeks, "year": args.year, "month": args.month,
+              "seed": args.seed, "repeat": args.repeat}
+    with tempfile.TemporaryDirectory(prefix="trenk-bench-") as tmp:
+        data_dir = args.data_dir or tmp
+        meta_path = os.path.join(data_dir, "fixtures.json")
+        data = None
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if any(data.get(k) != params[k] for k in FIXTURE_KEYS):
+                data = None
+        if data is None:
+            t0 = time.perf_counter()
+            data = generate(data_dir, args.employees, args.weeks, args.year, args.month, args.seed)
+            print(f"fixtures: {time.perf_counter() - t0:.1f}s → {data_dir}", file=sys.stderr)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+
+        bench = StageBench(data, tmp)
+        stages = {}
+        for name in STAGES:
+            if name not in args.stages:
+                continue
+            stages[name] = measure(getattr(bench, f"setup_{name}"), getattr(bench, f"run_{name}"),
+                                   args.repeat, memory=not args.no_memory)
+            print(f"{name}: {stages[name]['seconds_min']}s", file=sys.stderr)
+
+    result = {"benchmark": "stages", "version": RESULT_VERSION, "params": params,
+              "environment": environment(), "stages": stages}
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold, args.min_delta)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
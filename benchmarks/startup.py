@@ -0,0 +1,115 @@
+"""
+benchmarks/startup.py - import cost of the GUI before its window appears.
+
+Everything gui_main imports at module level runs before tk.Tk() can show
+the window, so that import time is the part of the start-up we control.
+This runs `python -X importtime -c "import gui_main"` --repeat times, each
+in a fresh interpreter, and reports:
+
+    seconds_min / seconds_median   cumulative import time of gui_main
+    slowest                        its slowest direct imports (median run)
+    heavy_modules                  HEAVY_MODULES that got imported anyway
+
+openpyxl, numpy and the pipeline must stay out of the start-up path
+(gui_main loads them in the background once the window is up), so any
+heavy module is a failure (exit code 1), as is --compare old.json finding
+the import slower than --threshold / --min-delta allow.
+
+    python -m benchmarks.startup [--repeat 7] [-o result.json] [--compare base.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.stages import environment
+
+RESULT_VERSION = 1
+TARGET = "gui_main"
+HEAVY_MODULES = ("openpyxl", "numpy", "export_pipeline", "report_logic", "utils.metrics", "utils.workbook_cache")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """[(module, depth, self_us, cumulative_us)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        entries.append((stripped.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def import_once(target=TARGET):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                          cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(proc.stderr)
+
+
+def measure(target=TARGET, repeat=7, top=8):
+    runs = [import_once(target) for _ in range(repeat)]
+    totals = [next(us for name, depth, _, us in run if name == target and depth == 0) for run in runs]
+    median_run = runs[totals.index(sorted(totals)[(len(totals) - 1) // 2])]
+    # Direct imports of the target come right before it in the output, one level deeper
+    direct = [(name, us) for name, depth, _, us in median_run if depth == 1]
+    direct.sort(key=lambda item: item[1], reverse=True)
+    loaded = {name for run in runs for name, _, _, _ in run}
+    return {
+        "seconds_min": round(min(totals) / 1e6, 4),
+        "seconds_median": round(statistics.median(totals) / 1e6, 4),
+        "runs": [round(us / 1e6, 4) for us in totals],
+        "slowest": [{"module": name, "seconds": round(us / 1e6, 4)} for name, us in direct[:top]],
+        "heavy_modules": sorted(m for m in HEAVY_MODULES if m in loaded),
+    }
+
+
+def compare(result, baseline, threshold, min_delta):
+    """Adds result["compare"]; True when the import got slower than the baseline allows."""
+    old = baseline.get("import", {}).get("seconds_min")
+    if not old:
+        return False
+    new = result["import"]["seconds_min"]
+    ratio = new / old
+    regression = ratio > 1 + threshold and new - old > min_delta
+    result["compare"] = {"baseline_seconds": old, "ratio": round(ratio, 3), "regression": regression}
+    return regression
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Χρόνος εισαγωγής του gui_main (πριν εμφανιστεί το παράθυρο)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--target", default=TARGET)
+    parser.add_argument("-o", "--output", help="Αποθήκευση του JSON σε αρχείο")
+    parser.add_argument("--compare", help="JSON προηγούμενης εκτέλεσης για σύγκριση")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Ανεκτή επιβράδυνση πριν θεωρηθεί regression (default: 0.2 = +20%%)")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="Ελάχιστη διαφορά σε δευτερόλεπτα για regression (default: 0.02)")
+    args = parser.parse_args(argv)
+
+    result = {"benchmark": "startup", "version": RESULT_VERSION,
+              "params": {"target": args.target, "repeat": args.repeat},
+              "environment": environment(), "import": measure(args.target, args.repeat)}
+    regression = False
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regression = compare(result, json.load(f), args.threshold, args.min_delta)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    heavy = result["import"]["heavy_modules"]
+    if heavy:
+        print(f"⚠️ Βαριά modules στην εκκίνηση: {', '.join(heavy)}", file=sys.stderr)
+    return 1 if regression or heavy else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
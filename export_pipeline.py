@@ -0,0 +1,769 @@
+"""
+export_pipeline.py - headless weekly -> payroll export.
+
+Runs the same parse -> generate_monthly_report -> save pipeline as the GUI,
+without importing tkinter, so it can be scheduled on a server.
+
+Library:
+    from export_pipeline import run_export
+    result = run_export("weekly.xlsx", "payroll.xlsx", 7)
+    result["timings"]  # seconds per stage
+
+CLI (prints one JSON object with per-stage timings on stdout; Ctrl+C cancels
+cleanly, leaving the payroll untouched):
+    python -m export_pipeline weekly.xlsx payroll.xlsx --month 7
+    python -m export_pipeline weeks_dir/ payroll.xlsx --month 7     # month mode
+    python -m export_pipeline weekly.xlsx payroll.xlsx -m 7 --metrics-out metrics.csv [--no-xlsx]
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import zip_longest
+
+import openpyxl
+from openpyxl.utils import column_index_from_string
+
+from report_logic import _to_hhmm, generate_monthly_report
+from utils.logging_utils import MessageLog
+from utils.progress import CancelToken, OperationCancelled, ProgressReporter, check_cancel, report_fraction
+from utils.result_cube import ResultCube
+from utils.schedule import ScheduleEntry
+from utils.write_plan import WritePlan
+from utils.xlsx_patch import XlsxPatchError, save_patched
+from utils.spreadsheet_utils import SheetValues, get_column_from_day
+from utils.time_tokens import EXACT, RANGE, parse_token, token_cache_info
+from utils.weekly_cache import WeeklyCache, file_digest
+from utils.workbook_cache import writable
+from utils.layout_index import LayoutStore
+from utils.metrics_feed import FEED_FORMATS, feed_available, open_feed
+from utils.month_layout import OT_COLUMNS, OT_MAX_COL
+
+OUTPUT_FILENAME = "Payroll_Calculated.xlsx"
+FORM_SHEET_NAMES = ["ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ ", "ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ"]
+TIMES_SHEET_NAMES = ["ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ"]
+PAYROLL_SHEET_NAMES = ["ΩΡΟΜΕΤΡΗΣΗ"]
+DATE_ROW = 8
+# Bump whenever parse_weekly_schedule's output changes: old cache files stop matching
+WEEKLY_PARSER_VERSION = 1
+SAVE_TARGETED = "targeted"
+SAVE_OPENPYXL = "openpyxl"
+DEFAULT_COMPRESSLEVEL = 6
+
+def parse_hours_range(text):
+    """Δέχεται string 'HH:MM-HH:MM' και επιστρέφει διάρκεια σε ώρες (float)."""
+    if not text or not isinstance(text, str):
+        return None
+    tok = parse_token(text)
+    if tok.kind != RANGE or tok.level != EXACT:
+        return None
+    end = tok.end
+    if end < tok.start:
+        end += 24 * 3600
+    return round((end - tok.start) / 3600.0, 3)
+
+def update_cell(ws, cell_name, value):
+    """Robust A1 -> (row, col) update using openpyxl cell by index."""
+    if not isinstance(cell_name, str) or not cell_name:
+        raise ValueError("Άκυρο cell_name")
+    col_letters = ''.join(filter(str.isalpha, cell_name))
+    row_digits = ''.join(filter(str.isdigit, cell_name))
+    if not col_letters or not row_digits:
+        raise ValueError(f"Άκυρη διεύθυνση κελιού: {cell_name}")
+    row_number = int(row_digits)
+    col_index = column_index_from_string(col_letters)
+    ws.cell(row=row_number, column=col_index, value=value)
+
+def _get_sheet(wb, candidates):
+    # Prefer exact names, but try stripped names too
+    for name in candidates:
+        if name in wb.sheetnames:
+            return wb[name]
+    stripped = {s.strip(): s for s in wb.sheetnames}
+    for name in candidates:
+        key = name.strip()
+        if key in stripped:
+            return wb[stripped[key]]
+    raise KeyError(f"Δεν βρέθηκε κανένα από τα φύλλα: {candidates}")
+
+def default_save_path(payroll_path):
+    return os.path.join(os.path.dirname(payroll_path), OUTPUT_FILENAME)
+
+class SpreadsheetWrapper:
+    """The `spreadsheet` object generate_monthly_report expects (ws, wb, update_cell)."""
+
+    def __init__(self, ws, wb=None):
+        self.ws = ws
+        self.wb = wb
+
+    def update_cell(self, cell_name, value):
+        # keep original semantics: update_cell(ws, a1, value)
+        update_cell(self.ws, cell_name, value)
+
+def make_message_log(emit=None, log_level="info", ring_size=0):
+    """The `gui` object generate_monthly_report expects; forwards kept messages as "log" events."""
+    sink = (lambda msg, level: emit({"type": "log", "msg": msg, "level": level})) if emit else None
+    return MessageLog(sink=sink, min_level=log_level, ring_size=ring_size)
+
+@contextmanager
+def _timed(timings, stage):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - t0, 6)
+
+def validate_inputs(weekly_path, payroll_path, month):
+    if not (1 <= month <= 12):
+        raise ValueError("Ο μήνας πρέπει να είναι μεταξύ 1 και 12.")
+    if not weekly_path or not payroll_path:
+        raise ValueError("Πρέπει να επιλέξετε και τα δύο αρχεία.")
+    if not weekly_path.endswith(".xlsx") or not payroll_path.endswith(".xlsx"):
+        raise ValueError("Τα αρχεία πρέπει να είναι τύπου .xlsx")
+
+def validate_outputs(metrics_path, write_xlsx):
+    if metrics_path:
+        fmt = FEED_FORMATS.get(os.path.splitext(metrics_path)[1].lower())
+        if fmt is None:
+            raise ValueError("Το αρχείο metrics πρέπει να είναι .csv ή .parquet")
+        if not feed_available(fmt):
+            raise ValueError("Η εξαγωγή Parquet χρειάζεται το pyarrow (pip install pyarrow)")
+    if not write_xlsx and not metrics_path:
+        raise ValueError("Χωρίς αρχείο .xlsx χρειάζεται αρχείο metrics (.csv / .parquet).")
+
+def _parse_form_row(row, times_row, day_slots):
+    """One form row (+ its overtime row) -> [(date, afm, hours, work_type, end+30, departure)]."""
+    full_id = str(row[0]).strip() if row and row[0] else ""
+    work_type = str(row[1]).strip() if row and row[1] else ""
+    hours_list = row[2:9] if row else ()
+    afm = full_id.split()[0] if full_id else ""
+
+    if not afm:
+        return []
+
+    parsed = []
+    for i, hours_raw in enumerate(hours_list):
+        if hours_raw is None or str(hours_raw).strip() == "":
+            continue
+
+        hours_value = parse_hours_range(str(hours_raw))
+        if hours_value is None:
+            continue
+
+        slot = day_slots[i]
+        if slot is None:
+            continue
+        date_raw, left_off, right_off = slot
+
+        raw_end_plus_30 = times_row[left_off] if left_off < len(times_row) else None
+        raw_departure = times_row[right_off] if right_off < len(times_row) else None
+
+        parsed.append((date_raw, afm, hours_value, work_type, _to_hhmm(raw_end_plus_30), _to_hhmm(raw_departure)))
+    return parsed
+
+def parse_weekly_schedule(sheet_weekly, sheet_times, emit=None, form_snapshot=None, record=None, reuse=None,
+                          cancel=None):
+    """
+    Διαβάζει τη ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ (+ ώρες από ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ) και
+    επιστρέφει (schedule_rows, skipped_entries).
+
+    Single pass: the row-8 dates are read once and the form and overtime rows
+    are zipped in lockstep, so this works on read-only (streaming) worksheets
+    too. Each entry carries its ΩΡΑ ΛΗΞΗΣ+30 / ΩΡΑ ΑΠΟΧΩΡΗΣΗ values normalized
+    the way generate_monthly_report reads them from the overtime sheet.
+    If form_snapshot (SheetValues) is given, the form rows are copied into it.
+    Progress (0–80%) is reported through `emit` as "set_val" events.
+
+    For the weekly cache: `record` (dict) receives the date header and one
+    (row, times, entries, error) record per non-empty form row; `reuse` is such
+    a dict from an earlier parse, whose entries are reused for every row whose
+    values have not changed (only if the date header is the same).
+    cancel (utils.progress.CancelToken) is checked at every progress tick.
+    """
+    emit = emit or (lambda msg: None)
+
+    min_r = 10
+    max_col_form = 9  # A..I: AFM, τύπος, 7 ημέρες
+    max_col_times = OT_MAX_COL
+
+    header = next(sheet_weekly.iter_rows(min_row=DATE_ROW, max_row=DATE_ROW, max_col=max_col_form, values_only=True), ())
+    if form_snapshot is not None:
+        form_snapshot.set_row(DATE_ROW, header)
+
+    # Per form day column (C..I): (date, left_col, right_col) as 0-based offsets in the times row
+    day_slots = []
+    for date_raw in tuple(header[2:9]) + (None,) * (7 - len(header[2:9])):
+        if not isinstance(date_raw, datetime):
+            day_slots.append(None)
+            continue
+        left_col, right_col = OT_COLUMNS[date_raw.weekday()]
+        day_slots.append((date_raw, left_col - 1, right_col - 1))
+
+    track = record is not None or reuse is not None
+    times_offsets = [off for slot in day_slots if slot for off in slot[1:]]
+    reused_rows = reuse["rows"] if reuse and reuse.get("header") == tuple(header) else {}
+    if record is not None:
+        record["header"] = tuple(header)
+        record["rows"] = {}
+        record["reused"] = 0
+
+    # Progress by rows: the sheet dimension is known up front even in read-only mode
+    total_rows = max(1, (sheet_weekly.max_row or min_r) - min_r + 1)
+    tick_every = max(1, total_rows // 80)
+
+    schedule_rows = []
+    skipped_entries = []
+
+    form_rows = sheet_weekly.iter_rows(min_row=min_r, max_col=max_col_form, values_only=True)
+    times_rows = sheet_times.iter_rows(min_row=min_r, max_col=max_col_times, values_only=True)
+    for idx, (row, times_row) in enumerate(zip_longest(form_rows, times_rows, fillvalue=()), start=min_r):
+        if (idx - min_r) % tick_every == 0:
+            check_cancel(cancel, "parse")
+            emit({"type": "set_val", "val": min(80, int((idx - min_r) * 80 / total_rows))})
+        non_empty = any(v is not None for v in row)
+        if form_snapshot is not None and non_empty:
+            form_snapshot.set_row(idx, row)
+
+        parsed = error = None
+        if track and non_empty:
+            row = tuple(row)
+            times_key = tuple(times_row[o] if o < len(times_row) else None for o in times_offsets)
+            prev = reused_rows.get(idx)
+            if prev is not None and prev[0] == row and prev[1] == times_key:
+                parsed, error = prev[2], prev[3]
+                if record is not None:
+                    record["reused"] += 1
+
+        if parsed is None:
+            parsed = []
+            try:
+                parsed = _parse_form_row(row, times_row, day_slots)
+            except Exception as err:
+                error = f"γραμμή {idx} ➤ {row[0] if row else ''} - ΣΦΑΛΜΑ: {str(err)}"
+
+        if record is not None and non_empty:
+            record["rows"][idx] = (row, times_key, parsed, error)
+
+        if error:
+            skipped_entries.append(error)
+        schedule_rows.extend(ScheduleEntry(*values) for values in parsed)
+
+    return schedule_rows, skipped_entries
+
+def ingest_weekly_streaming(weekly_path, emit=None, cancel=None):
+    """
+    Streaming ανάγνωση εβδομαδιαίου αρχείου (read_only workbook, σταθερή μνήμη).
+
+    Returns (schedule_rows, skipped_entries, form_snapshot): form_snapshot is a
+    SheetValues copy of the form's A..I columns, which is all ΡΕΠΟ tagging needs.
+    The overtime times travel inside the entries, so the workbook is closed
+    before returning.
+    """
+    wb_weekly = openpyxl.load_workbook(weekly_path, read_only=True, data_only=True)
+    try:
+        sheet_weekly = _get_sheet(wb_weekly, FORM_SHEET_NAMES)
+        sheet_times = _get_sheet(wb_weekly, TIMES_SHEET_NAMES)
+        form_snapshot = SheetValues(sheet_weekly.title)
+        schedule_rows, skipped_entries = parse_weekly_schedule(
+            sheet_weekly, sheet_times, emit=emit, form_snapshot=form_snapshot, cancel=cancel
+        )
+    finally:
+        wb_weekly.close()
+    return schedule_rows, skipped_entries, form_snapshot
+
+def _from_cached_parse(payload):
+    """Rebuilds (schedule_rows, skipped_entries, form_snapshot) from a cached parse."""
+    form_snapshot = SheetValues(payload["title"])
+    form_snapshot.set_row(DATE_ROW, payload["header"])
+    schedule_rows = []
+    skipped_entries = []
+    for idx in sorted(payload["rows"]):
+        row, _, parsed, error = payload["rows"][idx]
+        form_snapshot.set_row(idx, row)
+        if error:
+            skipped_entries.append(error)
+        schedule_rows.extend(ScheduleEntry(*values) for values in parsed)
+    return schedule_rows, skipped_entries, form_snapshot
+
+def ingest_weekly_cached(weekly_path, cache, emit=None, cancel=None):
+    """
+    ingest_weekly_streaming through a WeeklyCache.
+
+    Returns (schedule_rows, skipped_entries, form_snapshot, cache_info) where
+    cache_info["status"] is "hit" (no openpyxl), "partial" (file re-read, rows
+    unchanged since the last parse of this path reused) or "miss".
+    """
+    emit = emit or (lambda msg: None)
+    digest = file_digest(weekly_path)
+    payload = cache.load(digest, WEEKLY_PARSER_VERSION)
+    if payload is not None:
+        try:
+            cache.remember(weekly_path, digest)
+        except OSError:
+            pass
+        emit({"type": "set_val", "val": 80})
+        return _from_cached_parse(payload) + ({"status": "hit", "reused_rows": len(payload["rows"])},)
+
+    previous = cache.latest(weekly_path, WEEKLY_PARSER_VERSION)
+    record = {}
+    wb_weekly = openpyxl.load_workbook(weekly_path, read_only=True, data_only=True)
+    try:
+        sheet_weekly = _get_sheet(wb_weekly, FORM_SHEET_NAMES)
+        sheet_times = _get_sheet(wb_weekly, TIMES_SHEET_NAMES)
+        form_snapshot = SheetValues(sheet_weekly.title)
+        schedule_rows, skipped_entries = parse_weekly_schedule(
+            sheet_weekly, sheet_times, emit=emit, form_snapshot=form_snapshot,
+            record=record, reuse=previous, cancel=cancel
+        )
+    finally:
+        wb_weekly.close()
+
+    reused = record.pop("reused", 0)
+    record["title"] = form_snapshot.title
+    try:
+        cache.store(digest, WEEKLY_PARSER_VERSION, record, source_path=weekly_path)
+    except OSError:
+        pass  # a read-only cache dir only costs the next run a re-parse
+    info = {"status": "partial" if reused else "miss", "reused_rows": reused}
+    return schedule_rows, skipped_entries, form_snapshot, info
+
+def _frees_on_cancel(run):
+    """
+    Re-raises OperationCancelled only after the traceback (whose frames hold
+    the workbooks and the parsed rows) is dropped and garbage collected, so a
+    cancelled run gives its memory back at once.
+    """
+    @functools.wraps(run)
+    def wrapper(*args, **kwargs):
+        try:
+            return run(*args, **kwargs)
+        except OperationCancelled as e:
+            where = e.args[0] if e.args else None
+        gc.collect()
+        raise OperationCancelled(where)
+    return wrapper
+
+@_frees_on_cancel
+def run_export(weekly_path, payroll_path, month, *, save_path=None, gui=None, emit=None, streaming=True,
+               log_level="info", dry_run=False, cache_dir=None, report_workers=None,
+               save_mode=SAVE_TARGETED, compresslevel=DEFAULT_COMPRESSLEVEL, cancel=None, workbook_cache=None,
+               layout_dir=None, metrics_path=None, write_xlsx=True):
+    """
+    Εκτελεί ολόκληρη την εξαγωγή: parse -> generate_monthly_report -> save.
+
+    Hybrid progress (via `emit`, same messages the GUI queue consumes):
+    - Parsing known size => 0–80%
+    - Report => 80–95% (real: "progress" events with sub-stage and done/total)
+    - Save => 95–100%
+
+    `gui` defaults to a MessageLog that forwards messages at or above
+    log_level to `emit`; debug messages are not even formatted unless enabled.
+    With streaming=True (default) the weekly file is read once in read-only
+    mode and the report takes the overtime times from the entries; with
+    streaming=False the full workbook is loaded and the report re-reads the
+    overtime sheet, as the GUI originally did.
+    With cache_dir (streaming only) parsed weekly files are cached on disk by
+    content hash, see ingest_weekly_cached; result["weekly_cache"] tells how.
+    With dry_run=True nothing is saved; the result carries the write plan
+    ("write_plan": one record per cell with value and source) instead.
+    report_workers > 1 computes the metrics in a process pool partitioned by
+    AFM (same result as the serial run).
+    save_mode / compresslevel: see _report_and_save ("targeted" rewrites only
+    the ΩΡΟΜΕΤΡΗΣΗ part of the payroll zip; compresslevel 0–9).
+    cancel (utils.progress.CancelToken, e.g. from another thread) is checked
+    in the parse, ΡΕΠΟ tagging and report loops and once more before saving;
+    pause() holds the run at the next check. A cancelled run raises
+    OperationCancelled and writes nothing (the payroll is never modified).
+    workbook_cache keeps the loaded payroll between runs of one process
+    (the GUI passes utils.workbook_cache.shared_workbook_cache()); with
+    layout_dir the payroll's layout index is stored there (utils.layout_index)
+    and the next run over the same template skips the sheet sweep.
+    metrics_path (.csv / .parquet) also streams the computed daily metrics
+    there (utils.metrics_feed; result["metrics_feed"] has path and row count);
+    write_xlsx=False then skips saving the payroll workbook altogether.
+    Returns a dict with save_path, counts, skipped_entries and per-stage
+    timings in seconds.
+    """
+    validate_inputs(weekly_path, payroll_path, month)
+    validate_outputs(metrics_path, write_xlsx)
+    emit = emit or (lambda msg: None)
+    gui = gui or make_message_log(emit, log_level)
+    save_path = save_path or default_save_path(payroll_path)
+
+    timings = {}
+    t_start = time.perf_counter()
+
+    emit({"type": "stage", "name": "parse", "text": "Ανάλυση δεδομένων..."})
+    emit({"type": "set_val", "val": 0})
+
+    cache_info = None
+    if streaming:
+        wb_weekly = sheet_times = None
+        timings["load_weekly"] = 0.0
+        with _timed(timings, "parse"):
+            if cache_dir:
+                schedule_rows, skipped_entries, sheet_form, cache_info = ingest_weekly_cached(
+                    weekly_path, WeeklyCache(cache_dir), emit=emit, cancel=cancel
+                )
+            else:
+                schedule_rows, skipped_entries, sheet_form = ingest_weekly_streaming(weekly_path, emit=emit,
+                                                                                     cancel=cancel)
+    else:
+        with _timed(timings, "load_weekly"):
+            # load weekly schedule in data_only mode for safe reads
+            wb_weekly = openpyxl.load_workbook(weekly_path, data_only=True)
+            sheet_form = _get_sheet(wb_weekly, FORM_SHEET_NAMES)
+            sheet_times = _get_sheet(wb_weekly, TIMES_SHEET_NAMES)
+
+        with _timed(timings, "parse"):
+            schedule_rows, skipped_entries = parse_weekly_schedule(sheet_form, sheet_times, emit=emit, cancel=cancel)
+
+    emit({"type": "set_val", "val": 80})
+    result = _report_and_save(
+        schedule_rows, payroll_path, month, save_path, gui, emit, timings, t_start,
+        overtime_ws=sheet_times, forma_wb=wb_weekly, forma_ws=sheet_form,
+        times_from_entries=streaming, dry_run=dry_run, workers=report_workers,
+        save_mode=save_mode, compresslevel=compresslevel, cancel=cancel, workbook_cache=workbook_cache,
+        layout_dir=layout_dir, metrics_path=metrics_path, write_xlsx=write_xlsx,
+    )
+    result["skipped_entries"] = skipped_entries
+    if cache_info is not None:
+        result["weekly_cache"] = cache_info
+    return result
+
+def _report_and_save(schedule_rows, payroll_path, month, save_path, gui, emit, timings, t_start, *,
+                     dry_run=False, save_mode=SAVE_TARGETED, compresslevel=DEFAULT_COMPRESSLEVEL, cancel=None,
+                     workbook_cache=None, layout_dir=None, metrics_path=None, write_xlsx=True, **report_kwargs):
+    """
+    Shared tail of run_export / run_month_export: load payroll once, report, save once.
+
+    The report's progress (utils.progress) is forwarded to emit as
+    {"type": "progress", "stage": "report", "substage", "done", "total"} plus
+    "set_val" in 80–95%; result["report_substages"] has seconds per sub-stage.
+
+    save_mode="targeted" writes the plan straight into a copy of the payroll
+    zip (utils.xlsx_patch); if the sheet markup is not understood it falls
+    back to applying the plan and wb.save(), which save_mode="openpyxl" always does.
+
+    With workbook_cache (utils.workbook_cache.WorkbookCache) an unchanged
+    payroll is not loaded again: the run gets a copy-on-write snapshot of the
+    cached sheet, and result["payroll_cache"] is "hit" or "miss".
+    With layout_dir the ΩΡΟΜΕΤΡΗΣΗ layout index is kept there between runs
+    (utils.layout_index); result["payroll_layout"] is "hit", "miss" or "stale".
+
+    metrics_path streams the report's daily metrics to a CSV / Parquet feed
+    (utils.metrics_feed), published only once the run has finished (a
+    cancelled or failed run leaves no feed behind); write_xlsx=False skips
+    the payroll save, for runs that only need the feed.
+
+    result["results"] summarizes the report's ResultCube (utils.result_cube):
+    employees, per-metric monthly totals, worked Sundays and the
+    allowed_by_type checks.
+    """
+    targeted = save_mode == SAVE_TARGETED
+    entries = len(schedule_rows)
+    emit({"type": "stage", "name": "report", "text": "Υπολογισμός μισθοδοσίας..."})
+
+    check_cancel(cancel, "load_payroll")
+    payroll_cache = None
+    with _timed(timings, "load_payroll"):
+        if workbook_cache is not None:
+            wb_payroll, sheet_payroll, hit = workbook_cache.snapshot(
+                payroll_path, functools.partial(_get_sheet, candidates=PAYROLL_SHEET_NAMES)
+            )
+            payroll_cache = "hit" if hit else "miss"
+        else:
+            wb_payroll = openpyxl.load_workbook(payroll_path)
+            sheet_payroll = _get_sheet(wb_payroll, PAYROLL_SHEET_NAMES)
+
+    def report_progress(substage, done, total):
+        emit({"type": "progress", "stage": "report", "substage": substage, "done": done, "total": total})
+        fraction = report_fraction(substage, done, total)
+        if fraction is not None:
+            emit({"type": "set_val", "val": 80 + 15 * fraction})
+
+    reporter = ProgressReporter(report_progress, cancel_token=cancel)
+    layout_store = LayoutStore(layout_dir) if layout_dir else None
+    write_plan = WritePlan()
+    result_cube = ResultCube()
+    metrics_feed = open_feed(metrics_path) if metrics_path and not dry_run else None
+    try:
+        with _timed(timings, "report"):
+            updated, skipped = generate_monthly_report(
+                schedule_rows, month, SpreadsheetWrapper(sheet_payroll, wb_payroll), gui,
+                get_column_from_day, write_plan=write_plan, dry_run=dry_run,
+                apply_writes=False, progress=reporter, layout_store=layout_store,
+                metrics_feed=metrics_feed, result_cube=result_cube, **report_kwargs
+            )
+        if metrics_feed is not None:
+            check_cancel(cancel, "save")
+
+        if dry_run or not write_xlsx:
+            timings["save"] = 0.0
+            save_mode = None
+        else:
+            # Last point to stop: the save itself always runs to completion (temp file + rename)
+            check_cancel(cancel, "save")
+            emit({"type": "stage", "name": "save", "text": "Αποθήκευση αρχείου..."})
+            with _timed(timings, "save"):
+                if targeted:
+                    try:
+                        save_patched(payroll_path, save_path, sheet_payroll.title, write_plan.items(), compresslevel)
+                    except XlsxPatchError as e:
+                        gui.show_message(f"⚠️ Στοχευμένη αποθήκευση αδύνατη ({e}) → πλήρης αποθήκευση", level="warning")
+                        save_mode = SAVE_OPENPYXL
+                if save_mode == SAVE_OPENPYXL:
+                    # A cached snapshot gets private copies of the written cells first
+                    write_plan.apply(writable(sheet_payroll, write_plan))
+                    wb_payroll.save(save_path)
+    except BaseException:
+        # A failed report or save (missing output dir, xlsx locked by Excel...) leaves no feed behind
+        if metrics_feed is not None:
+            metrics_feed.abort()
+        raise
+
+    if metrics_feed is not None:
+        metrics_feed.close()
+
+    emit({"type": "set_val", "val": 100})
+
+    timings["total"] = round(time.perf_counter() - t_start, 6)
+    result = {
+        "success": True,
+        "save_path": save_path if save_mode else None,
+        "month": month,
+        "entries": entries,
+        "updated": updated,
+        "skipped": skipped,
+        "skipped_entries": [],
+        "timings": timings,
+        "report_substages": reporter.timings,
+        "entries_per_sec": round(entries / timings["total"], 1) if timings["total"] > 0 else None,
+        "token_cache": token_cache_info(),
+        "planned_writes": len(write_plan),
+        "save_mode": save_mode,
+    }
+    checks = result_cube.check_allowed()
+    result["results"] = {
+        "employees": len(result_cube),
+        "metric_totals": result_cube.metric_totals(),
+        "sundays": int(result_cube.sunday_counts().sum()),
+        "unknown_type": int(checks["unknown_type"].sum()),
+        "over_allowed": int(checks["over_allowed"].sum()),
+    }
+    if payroll_cache is not None:
+        result["payroll_cache"] = payroll_cache
+    if layout_store is not None:
+        result["payroll_layout"] = layout_store.last_status
+    if metrics_feed is not None:
+        result["metrics_feed"] = metrics_feed.info()
+    if dry_run:
+        result["dry_run"] = True
+        result["write_plan"] = write_plan.to_records()
+    return result
+
+def collect_weekly_files(sources):
+    """
+    A directory, a single path or a list of both -> sorted list of weekly .xlsx
+    files (Excel lock files "~$..." and our own output file are left out).
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    files = []
+    for src in sources:
+        if os.path.isdir(src):
+            files.extend(
+                os.path.join(src, name) for name in sorted(os.listdir(src))
+                if name.lower().endswith(".xlsx") and not name.startswith("~$") and name != OUTPUT_FILENAME
+            )
+        else:
+            files.append(src)
+    return files
+
+def validate_month_inputs(weekly_files, payroll_path, month):
+    if not weekly_files:
+        raise ValueError("Δεν βρέθηκαν εβδομαδιαία αρχεία .xlsx.")
+    for path in weekly_files:
+        validate_inputs(path, payroll_path, month)
+        if os.path.abspath(path) == os.path.abspath(payroll_path):
+            raise ValueError(f"Το payroll αρχείο δεν μπορεί να είναι και εβδομαδιαίο: {path}")
+
+def _parse_weekly_job(weekly_path, cache_dir=None, cancel=None):
+    """Process-pool worker: one weekly file -> picklable parse result (cancel: in-process runs only)."""
+    if cache_dir:
+        return ingest_weekly_cached(weekly_path, WeeklyCache(cache_dir), cancel=cancel)
+    return ingest_weekly_streaming(weekly_path, cancel=cancel) + (None,)
+
+@_frees_on_cancel
+def run_month_export(weekly_sources, payroll_path, month, *, save_path=None, gui=None, emit=None,
+                     log_level="info", dry_run=False, cache_dir=None, workers=None, report_workers=None,
+                     save_mode=SAVE_TARGETED, compresslevel=DEFAULT_COMPRESSLEVEL, cancel=None,
+                     workbook_cache=None, layout_dir=None, metrics_path=None, write_xlsx=True):
+    """
+    Month mode: όλα τα εβδομαδιαία αρχεία του μήνα σε ένα πέρασμα.
+
+    weekly_sources is a directory or a list of files/directories (see
+    collect_weekly_files). The files are parsed (streaming) in parallel in a
+    process pool of `workers` processes (default: one per file, up to the CPU
+    count; 1 parses in-process), the schedules are merged in file order and
+    the payroll is opened, computed (ΡΕΠΟ tagging once per week's form) and
+    saved once. Same result dict as run_export, plus "weekly_files" and
+    per-file "weekly_cache" when cache_dir is set. cancel works as in
+    run_export; with a process pool it is checked as each file completes and
+    the files not yet started are dropped. workbook_cache, layout_dir,
+    metrics_path and write_xlsx as in run_export.
+    """
+    weekly_files = collect_weekly_files(weekly_sources)
+    validate_month_inputs(weekly_files, payroll_path, month)
+    validate_outputs(metrics_path, write_xlsx)
+    emit = emit or (lambda msg: None)
+    gui = gui or make_message_log(emit, log_level)
+    save_path = save_path or default_save_path(payroll_path)
+
+    timings = {"load_weekly": 0.0}
+    t_start = time.perf_counter()
+
+    emit({"type": "stage", "name": "parse", "text": f"Ανάλυση {len(weekly_files)} εβδομαδιαίων αρχείων..."})
+    emit({"type": "set_val", "val": 0})
+
+    workers = workers or min(len(weekly_files), os.cpu_count() or 1)
+    parsed = [None] * len(weekly_files)
+    with _timed(timings, "parse"):
+        if workers <= 1 or len(weekly_files) == 1:
+            for i, path in enumerate(weekly_files):
+                parsed[i] = _parse_weekly_job(path, cache_dir, cancel)
+                emit({"type": "set_val", "val": int((i + 1) * 80 / len(weekly_files))})
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_parse_weekly_job, path, cache_dir): i for i, path in enumerate(weekly_files)}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    if cancel is not None and cancel.cancelled:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                    check_cancel(cancel, "parse")
+                    parsed[futures[future]] = future.result()
+                    emit({"type": "set_val", "val": int(done * 80 / len(weekly_files))})
+
+    schedule_rows = []
+    skipped_entries = []
+    form_sheets = []
+    for path, (rows, skipped, form_snapshot, _) in zip(weekly_files, parsed):
+        schedule_rows.extend(rows)
+        name = os.path.basename(path)
+        skipped_entries.extend(f"{name}: {msg}" for msg in skipped)
+        form_sheets.append(form_snapshot)
+    gui.show_message(f"📚 {len(weekly_files)} εβδομαδιαία αρχεία ➤ {len(schedule_rows)} εγγραφές", level="info")
+
+    emit({"type": "set_val", "val": 80})
+    result = _report_and_save(
+        schedule_rows, payroll_path, month, save_path, gui, emit, timings, t_start,
+        forma_sheets=form_sheets, times_from_entries=True, dry_run=dry_run, workers=report_workers,
+        save_mode=save_mode, compresslevel=compresslevel, cancel=cancel, workbook_cache=workbook_cache,
+        layout_dir=layout_dir, metrics_path=metrics_path, write_xlsx=write_xlsx,
+    )
+    result["skipped_entries"] = skipped_entries
+    result["weekly_files"] = weekly_files
+    if cache_dir:
+        result["weekly_cache"] = [info for _, _, _, info in parsed]
+    return result
+
+def _build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m export_pipeline",
+        description="Headless υπολογισμός μισθοδοσίας (weekly -> ΩΡΟΜΕΤΡΗΣΗ).",
+    )
+    parser.add_argument("weekly", nargs="+",
+                        help="Εβδομαδιαίο αρχείο (.xlsx)· πολλά αρχεία ή φάκελος => month mode")
+    parser.add_argument("payroll", help="Payroll αρχείο (.xlsx)")
+    parser.add_argument("-m", "--month", type=int, required=True, help="Μήνας υπολογισμού (1–12)")
+    parser.add_argument("-o", "--output", default=None,
+                        help=f"Αρχείο εξόδου (default: {OUTPUT_FILENAME} δίπλα στο payroll)")
+    parser.add_argument("--no-streaming", dest="streaming", action="store_false",
+                        help="Πλήρες φόρτωμα του εβδομαδιαίου αρχείου αντί για streaming ανάγνωση")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Εμφάνιση μηνυμάτων log στο stderr")
+    parser.add_argument("--log-level", default="info", choices=["debug", "info", "warning", "error"],
+                        help="Ελάχιστο επίπεδο μηνυμάτων (default: info)")
+    parser.add_argument("--cache-dir", default=None, metavar="DIR",
+                        help="Cache των αναλυμένων εβδομαδιαίων αρχείων (hash περιεχομένου)")
+    parser.add_argument("--layout-dir", default=None, metavar="DIR",
+                        help="Αποθηκευμένο ευρετήριο διάταξης του ΩΡΟΜΕΤΡΗΣΗ (ΑΦΜ, ετικέτες, ημέρες)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Χωρίς cache (υπερισχύει των --cache-dir / --layout-dir)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Διεργασίες για την ανάλυση στο month mode (default: μία ανά αρχείο)")
+    parser.add_argument("--report-workers", type=int, default=None, metavar="N",
+                        help="Υπολογισμός metrics σε N διεργασίες, ανά ΑΦΜ (default: σειριακά)")
+    parser.add_argument("--save-mode", choices=[SAVE_TARGETED, SAVE_OPENPYXL], default=SAVE_TARGETED,
+                        help="targeted: ξαναγράφεται μόνο το φύλλο ΩΡΟΜΕΤΡΗΣΗ· openpyxl: πλήρες wb.save()")
+    parser.add_argument("--compression", type=int, default=DEFAULT_COMPRESSLEVEL, choices=range(10), metavar="0-9",
+                        help=f"Επίπεδο συμπίεσης zip των parts που ξαναγράφει η στοχευμένη αποθήκευση (default: {DEFAULT_COMPRESSLEVEL})")
+    parser.add_argument("--metrics-out", default=None, metavar="PATH",
+                        help="Εξαγωγή των ημερήσιων metrics ανά ΑΦΜ σε .csv ή .parquet (pyarrow)")
+    parser.add_argument("--no-xlsx", dest="write_xlsx", action="store_false",
+                        help="Χωρίς αποθήκευση του .xlsx (μόνο με --metrics-out)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Υπολογισμός χωρίς αποθήκευση· τυπώνει τα κελιά που θα γράφονταν")
+    parser.add_argument("--debug-ring", type=int, default=0, metavar="N",
+                        help="Κράτα τα τελευταία N debug μηνύματα και τύπωσέ τα στο stderr σε σφάλμα")
+    return parser
+
+def main(argv=None):
+    args = _build_arg_parser().parse_args(argv)
+
+    def emit(msg):
+        if args.verbose and msg.get("type") == "log":
+            print(msg.get("msg", ""), file=sys.stderr)
+
+    log = make_message_log(emit, args.log_level, ring_size=args.debug_ring)
+    cache_dir = None if args.no_cache else args.cache_dir
+    layout_dir = None if args.no_cache else args.layout_dir
+
+    # First Ctrl+C cancels cooperatively (nothing written), a second one interrupts at once
+    cancel = CancelToken()
+
+    def on_sigint(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("⏹️ Ακύρωση...", file=sys.stderr)
+        cancel.cancel()
+
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    previous_handler = signal.signal(signal.SIGINT, on_sigint) if in_main_thread else None
+    try:
+        if len(args.weekly) == 1 and not os.path.isdir(args.weekly[0]):
+            result = run_export(args.weekly[0], args.payroll, args.month, save_path=args.output, gui=log,
+                                emit=emit, streaming=args.streaming, dry_run=args.dry_run, cache_dir=cache_dir,
+                                report_workers=args.report_workers, save_mode=args.save_mode,
+                                compresslevel=args.compression, cancel=cancel, layout_dir=layout_dir,
+                                metrics_path=args.metrics_out, write_xlsx=args.write_xlsx)
+        else:
+            result = run_month_export(args.weekly, args.payroll, args.month, save_path=args.output, gui=log,
+                                      emit=emit, dry_run=args.dry_run, cache_dir=cache_dir, workers=args.workers,
+                                      report_workers=args.report_workers, save_mode=args.save_mode,
+                                      compresslevel=args.compression, cancel=cancel, layout_dir=layout_dir,
+                                      metrics_path=args.metrics_out, write_xlsx=args.write_xlsx)
+    except OperationCancelled as e:
+        print(json.dumps({"success": False, "cancelled": True, "stage": e.args[0] if e.args else None},
+                         ensure_ascii=False))
+        return 130
+    except Exception as e:
+        for line in log.recent():
+            print(line, file=sys.stderr)
+        print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False))
+        return 1
+    finally:
+        if in_main_thread:
+            signal.signal(signal.SIGINT, previous_handler)
+
+    print(json.dumps(result, ensure_ascii=False, default=str))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,87 +1,64 @@
 import os
+import shutil
+import tempfile
 import threading
 import time
-from queue import Queue
-import openpyxl
+from queue import Empty, Queue
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from datetime import datetime, time as dtime
-from openpyxl.utils import column_index_from_string
-from report_logic import generate_monthly_report
-from utils.spreadsheet_utils import get_column_from_day, open_excel
-
-INVALID_TIME_VALUES = [
-    None, "", "0", "null", "#null", "#NULL",
-    "#TIMH!", "#VALUE!", "#DIV/0!", "#REF!", "#NAME?", "#N/A"
-]
-
-def parse_hours_range(text):
-    """Δέχεται string 'HH:MM-HH:MM' και επιστρέφει διάρκεια σε ώρες (float)."""
-    if not text or not isinstance(text, str):
-        return None
-    s = text.strip().upper()
-    if s in ("", "ΡΕΠΟ"):
-        return None
-    try:
-        start_str, end_str = s.split("-")
-        fmt = "%H:%M"
-        start = datetime.strptime(start_str.strip(), fmt)
-        end = datetime.strptime(end_str.strip(), fmt)
-        if end < start:
-            end = end.replace(day=end.day + 1)
-        duration = (end - start).total_seconds() / 3600.0
-        return round(duration, 3)
-    except Exception:
-        return None
-
-def _format_time_cell(v):
-    if isinstance(v, dtime):
-        return v.strftime("%H:%M")
-    if isinstance(v, datetime):
-        return v.strftime("%H:%M")
-    if isinstance(v, (int, float)):
-        # Excel stores times as fraction of day
-        frac = float(v) % 1.0
-        total_minutes = int(round(frac * 24 * 60))
-        hh = (total_minutes // 60) % 24
-        mm = total_minutes % 60
-        return f"{hh:02d}:{mm:02d}"
-    if isinstance(v, str):
-        s = v.strip()
-        for fmt in ("%H:%M", "%H:%M:%S"):
-            try:
-                dt = datetime.strptime(s, fmt)
-                return dt.strftime("%H:%M")
-            except Exception:
-                pass
-        if len(s) >= 5 and s[2] == ":":
-            return s[:5]
-        return ""
-    return ""
-
-def update_cell(ws, cell_name, value):
-    """Robust A1 -> (row, col) update using openpyxl cell by index."""
-    if not isinstance(cell_name, str) or not cell_name:
-        raise ValueError("Άκυρο cell_name")
-    col_letters = ''.join(filter(str.isalpha, cell_name))
-    row_digits = ''.join(filter(str.isdigit, cell_name))
-    if not col_letters or not row_digits:
-        raise ValueError(f"Άκυρη διεύθυνση κελιού: {cell_name}")
-    row_number = int(row_digits)
-    col_index = column_index_from_string(col_letters)
-    ws.cell(row=row_number, column=col_index, value=value)
-
-def _get_sheet(wb, candidates):
-    # Prefer exact names, but try stripped names too
-    for name in candidates:
-        if name in wb.sheetnames:
-            return wb[name]
-    stripped = {s.strip(): s for s in wb.sheetnames}
-    for name in candidates:
-        key = name.strip()
-        if key in stripped:
-            return wb[stripped[key]]
-    raise KeyError(f"Δεν βρέθηκε κανένα από τα φύλλα: {candidates}")
+# Only light modules here: export_pipeline pulls in openpyxl and numpy, which
+# take longer than the whole window (see _pipeline / benchmarks.startup)
+from utils.progress import SUBSTAGE_LABELS, CancelToken, OperationCancelled
+from utils.spreadsheet_utils import open_excel
+
+DEBUG_RING_SIZE = 2000
+DEBUG_TAIL_ON_ERROR = 200
+MAX_LOG_LINES = 5000
+
+class LogPane:
+    """
+    Capped view over the output Text widget.
+
+    append() takes a whole batch of lines and does a single insert + see();
+    only the last MAX_LOG_LINES lines stay in the widget (oldest are evicted),
+    while every line is also spooled to a temp file for save_to().
+    """
+
+    def __init__(self, text, max_lines=MAX_LOG_LINES):
+        self.text = text
+        self.max_lines = max_lines
+        self._spool = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+
+    def clear(self):
+        self.text.delete("1.0", tk.END)
+        self._spool.seek(0)
+        self._spool.truncate()
+
+    def append(self, lines):
+        if not lines:
+            return
+        chunk = "\n".join(lines) + "\n"
+        self._spool.write(chunk)
+        # Lines that would be evicted right away never reach the widget
+        if len(lines) > self.max_lines:
+            chunk = "\n".join(lines[-self.max_lines:]) + "\n"
+        self.text.insert("end", chunk)
+        line_count = int(self.text.index("end-1c").split(".")[0])
+        if line_count > self.max_lines:
+            self.text.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+        self.text.see("end")
+
+    def save_to(self, path):
+        self._spool.flush()
+        self._spool.seek(0)
+        with open(path, "w", encoding="utf-8") as f:
+            shutil.copyfileobj(self._spool, f)
+        self._spool.seek(0, 2)
+
+def _pipeline():
+    """export_pipeline, imported on first use (or by the background preload in main)."""
+    import export_pipeline
+    return export_pipeline
 
 def _format_seconds(secs):
     secs = max(0, int(secs))
@@ -103,24 +80,36 @@ def main():
     weekly_file = tk.StringVar()
     payroll_file = tk.StringVar()
     selected_month = tk.IntVar(value=7)
+    debug_log = tk.BooleanVar(value=False)
 
     txt_output = tk.Text(root, wrap="word", height=16)
+    log_pane = LogPane(txt_output)
 
     def browse_weekly():
         path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
         if path:
             weekly_file.set(path)
 
+    def browse_weekly_folder():
+        # month mode: every weekly .xlsx of the folder in one run
+        path = filedialog.askdirectory()
+        if path:
+            weekly_file.set(path)
+
     def browse_payroll():
         path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
         if path:
             payroll_file.set(path)
 
     # --- GUI Components ---
-    tk.Label(root, text="Εβδομαδιαίο αρχείο:").pack(anchor="w", padx=10, pady=(12, 2))
+    tk.Label(root, text="Εβδομαδιαίο αρχείο (ή φάκελος με όλες τις εβδομάδες του μήνα):").pack(anchor="w", padx=10, pady=(12, 2))
     tk.Entry(root, textvariable=weekly_file, width=90).pack(fill="x", padx=10)
-    btn_browse_weekly = tk.Button(root, text="Browse", command=browse_weekly)
-    btn_browse_weekly.pack(anchor="w", padx=10, pady=(2, 10))
+    weekly_buttons = tk.Frame(root)
+    weekly_buttons.pack(anchor="w", padx=10, pady=(2, 10))
+    btn_browse_weekly = tk.Button(weekly_buttons, text="Browse", command=browse_weekly)
+    btn_browse_weekly.pack(side="left")
+    btn_browse_weekly_folder = tk.Button(weekly_buttons, text="Φάκελος μήνα...", command=browse_weekly_folder)
+    btn_browse_weekly_folder.pack(side="left", padx=(6, 0))
 
     tk.Label(root, text="Payroll αρχείο:").pack(anchor="w", padx=10, pady=(0, 2))
     tk.Entry(root, textvariable=payroll_file, width=90).pack(fill="x", padx=10)
@@ -134,22 +123,34 @@ def main():
     )
     month_selector.pack(anchor="w", padx=10, pady=(2, 10))
 
+    chk_debug = tk.Checkbutton(root, text="Λεπτομερή μηνύματα (debug)", variable=debug_log)
+    chk_debug.pack(anchor="w", padx=10)
+
     btn_run = tk.Button(root, text="Υπολογισμός")
     btn_run.pack(pady=6)
 
     btn_open_excel = tk.Button(
         root, text="Άνοιγμα Excel",
-        command=lambda: open_excel(
-            os.path.join(os.path.dirname(payroll_file.get()), "Payroll_Calculated.xlsx")
-        )
+        command=lambda: open_excel(_pipeline().default_save_path(payroll_file.get()))
     )
     btn_open_excel.pack(pady=(2, 10))
     btn_open_excel.config(state="disabled")
 
+    def save_log():
+        path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt")])
+        if path:
+            try:
+                log_pane.save_to(path)
+            except Exception as e:
+                messagebox.showerror("Σφάλμα", f"Αποτυχία αποθήκευσης log:\n{e}")
+
+    btn_save_log = tk.Button(root, text="Αποθήκευση πλήρους log...", command=save_log)
+    btn_save_log.pack(anchor="e", padx=10)
+
     txt_output.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
     # Λίστα για κλείδωμα/ξεκλείδωμα controls
-    controls = [btn_browse_weekly, btn_browse_payroll, btn_run, btn_open_excel, month_selector]
+    controls = [btn_browse_weekly, btn_browse_weekly_folder, btn_browse_payroll, btn_run, btn_open_excel, month_selector, chk_debug, btn_save_log]
 
     # --- Progress communication (worker -> UI) ---
     progress_q = Queue()
@@ -159,21 +160,41 @@ def main():
     loader_bar = None
     loader_stage = None
     eta_label = None
+    btn_pause = None
+    btn_cancel = None
+    cancel_token = None
 
     loader_running = False
     start_time_parse = 0.0
+    start_time_report = 0.0
     last_ui_update_t = 0.0
 
-    progress_state = {"value": 0, "stage": "idle"}
+    progress_state = {"value": 0, "stage": "idle", "substage": None, "done": 0, "total": 0}
 
-    report_fake_active = False
-    report_fake_target = 95
-    report_fake_timer_id = None
+    def _toggle_pause():
+        if cancel_token is None or cancel_token.cancelled:
+            return
+        if cancel_token.paused:
+            cancel_token.resume()
+            btn_pause.config(text="Παύση")
+        else:
+            cancel_token.pause()
+            btn_pause.config(text="Συνέχεια")
+            eta_label.config(text="⏸️ Σε παύση")
+
+    def _cancel_run():
+        # The worker stops at its next check; _finish_export closes the loader
+        if cancel_token is None or cancel_token.cancelled:
+            return
+        cancel_token.cancel()
+        btn_pause.config(state="disabled")
+        btn_cancel.config(state="disabled")
+        loader_stage.config(text="Ακύρωση...")
+        eta_label.config(text="Αναμονή για ασφαλή διακοπή...")
 
     def start_loader(text="Επεξεργασία..."):
-        nonlocal loader_overlay, loader_bar, loader_stage, eta_label
-        nonlocal loader_running, start_time_parse, last_ui_update_t
-        nonlocal report_fake_active, report_fake_timer_id
+        nonlocal loader_overlay, loader_bar, loader_stage, eta_label, btn_pause, btn_cancel
+        nonlocal loader_running, start_time_parse, start_time_report, last_ui_update_t
 
         for w in controls:
             if w is month_selector:
@@ -197,30 +218,27 @@ def main():
         eta_label = tk.Label(box, text="Προετοιμασία...", bg="white", fg="#666", font=("Segoe UI", 9))
         eta_label.pack(pady=(8, 0))
 
+        run_buttons = tk.Frame(box, bg="white")
+        run_buttons.pack(pady=(10, 0))
+        btn_pause = tk.Button(run_buttons, text="Παύση", width=10, command=_toggle_pause)
+        btn_pause.pack(side="left", padx=4)
+        btn_cancel = tk.Button(run_buttons, text="Ακύρωση", width=10, command=_cancel_run)
+        btn_cancel.pack(side="left", padx=4)
+
         loader_running = True
         start_time_parse = 0.0
+        start_time_report = 0.0
         last_ui_update_t = 0.0
-        progress_state["value"] = 0
-        progress_state["stage"] = "parse"
-        report_fake_active = False
-        report_fake_timer_id = None
+        progress_state.update(value=0, stage="parse", substage=None, done=0, total=0)
 
         root.after(80, _poll_queue)
 
     def stop_loader():
-        nonlocal loader_overlay, loader_bar, loader_stage, eta_label
-        nonlocal loader_running, report_fake_active, report_fake_timer_id
+        nonlocal loader_overlay, loader_bar, loader_stage, eta_label, btn_pause, btn_cancel
+        nonlocal loader_running
 
         loader_running = False
 
-        if report_fake_timer_id is not None:
-            try:
-                root.after_cancel(report_fake_timer_id)
-            except Exception:
-                pass
-            report_fake_timer_id = None
-        report_fake_active = False
-
         try:
             if loader_overlay:
                 loader_overlay.place_forget()
@@ -230,6 +248,8 @@ def main():
             loader_bar = None
             loader_stage = None
             eta_label = None
+            btn_pause = None
+            btn_cancel = None
             for w in controls:
                 if w is btn_open_excel:
                     continue
@@ -238,45 +258,30 @@ def main():
                 else:
                     w.config(state="normal")
 
-    def _start_report_fake_fill():
-        nonlocal report_fake_active, report_fake_timer_id
-        report_fake_active = True
-
-        def _tick():
-            nonlocal report_fake_timer_id
-            if not loader_running or not report_fake_active or loader_bar is None:
-                return
-            val = progress_state["value"]
-            if val < report_fake_target:
-                step = max(0.2, (report_fake_target - val) * 0.06)
-                progress_state["value"] = min(report_fake_target, val + step)
-                loader_bar["value"] = progress_state["value"]
-            report_fake_timer_id = root.after(180, _tick)
-
-        report_fake_timer_id = root.after(180, _tick)
-
-    def _stop_report_fake_fill():
-        nonlocal report_fake_active, report_fake_timer_id
-        report_fake_active = False
-        if report_fake_timer_id is not None:
-            try:
-                root.after_cancel(report_fake_timer_id)
-            except Exception:
-                pass
-            report_fake_timer_id = None
+    def _eta_text(started, fraction, prefix):
+        # Linear estimate from the elapsed time and the finished fraction of the stage
+        if fraction <= 0:
+            return "Υπολογισμός εκτιμ. χρόνου..."
+        elapsed = time.time() - started
+        remaining = max(0.0, elapsed / min(0.999, fraction) - elapsed)
+        return f"{prefix} — Εκτιμ. υπόλοιπο: {_format_seconds(remaining)}"
 
     def _poll_queue():
-        nonlocal last_ui_update_t, start_time_parse
+        nonlocal last_ui_update_t, start_time_parse, start_time_report
         if not loader_running:
             return
 
         changed = False
         latest_text = None
         stage_changed = False
+        log_lines = []
 
-        # Drain queue; keep only latest state updates and immediately inject logs
-        while not progress_q.empty():
-            msg = progress_q.get_nowait()
+        # Drain queue; keep only latest state updates and batch this cycle's logs
+        while True:
+            try:
+                msg = progress_q.get_nowait()
+            except Empty:
+                break
             mtype = msg.get("type")
             if mtype == "stage":
                 name = msg.get("name", "")
@@ -300,26 +305,33 @@ def main():
                     dv = 1.0
                 progress_state["value"] = max(0.0, min(100.0, progress_state["value"] + dv))
                 changed = True
+            elif mtype == "progress":
+                progress_state["substage"] = msg.get("substage")
+                progress_state["done"] = msg.get("done", 0)
+                progress_state["total"] = msg.get("total", 0)
+                changed = True
             elif mtype == "log":
-                txt_output.insert("end", msg.get("msg", "") + "\n")
-                txt_output.see("end")
+                log_lines.append(msg.get("msg", ""))
+
+        log_pane.append(log_lines)
 
         if stage_changed and loader_stage is not None:
             if progress_state["stage"] == "parse":
-                _stop_report_fake_fill()
                 start_time_parse = 0.0
                 loader_stage.config(text="Ανάλυση δεδομένων...")
                 eta_label.config(text="Υπολογισμός εκτιμ. χρόνου...")
             elif progress_state["stage"] == "report":
+                start_time_report = time.time()
+                progress_state.update(substage=None, done=0, total=0)
                 loader_stage.config(text="Υπολογισμός μισθοδοσίας...")
-                eta_label.config(text="Υπολογισμός... (εκτίμηση)")
-                _start_report_fake_fill()
+                eta_label.config(text="Υπολογισμός εκτιμ. χρόνου...")
             elif progress_state["stage"] == "save":
-                _stop_report_fake_fill()
                 loader_stage.config(text="Αποθήκευση αρχείου...")
                 eta_label.config(text="Σχεδόν έτοιμο...")
 
         now = time.time()
+        if cancel_token is not None and (cancel_token.paused or cancel_token.cancelled):
+            changed = False  # keep the pause / cancel text instead of the ETA
         if changed and (now - last_ui_update_t) >= 0.1 and loader_bar is not None:
             loader_bar["value"] = progress_state["value"]
 
@@ -327,18 +339,17 @@ def main():
                 if progress_state["value"] > 0:
                     if start_time_parse == 0.0:
                         start_time_parse = now
-                    elapsed = now - start_time_parse
-                    processed_pct = min(0.999, progress_state["value"] / 80.0) if progress_state["value"] <= 80 else 1.0
-                    if processed_pct > 0:
-                        total_est = elapsed / processed_pct
-                        remaining = max(0.0, total_est - elapsed)
-                        eta_label.config(text=f"Πρόοδος: {progress_state['value']:.0f}% — Εκτιμ. υπόλοιπο: {_format_seconds(remaining)}")
-                    else:
-                        eta_label.config(text="Υπολογισμός εκτιμ. χρόνου...")
+                    eta_label.config(text=_eta_text(start_time_parse, progress_state["value"] / 80.0,
+                                                    f"Πρόοδος: {progress_state['value']:.0f}%"))
                 else:
                     eta_label.config(text="Έναρξη...")
             elif progress_state["stage"] == "report":
-                eta_label.config(text="Υπολογισμός... (εκτίμηση)")
+                # Real numbers from generate_monthly_report: sub-stage done/total, 80–95% overall
+                substage = progress_state["substage"]
+                label = SUBSTAGE_LABELS.get(substage, substage or "Προετοιμασία")
+                if progress_state["total"]:
+                    label = f"{label} {progress_state['done']}/{progress_state['total']}"
+                eta_label.config(text=_eta_text(start_time_report, (progress_state["value"] - 80.0) / 15.0, label))
             elif progress_state["stage"] == "save":
                 eta_label.config(text="Ολοκλήρωση...")
 
@@ -348,24 +359,25 @@ def main():
             root.after(100, _poll_queue)
 
     def run_export():
+        nonlocal cancel_token
         try:
-            txt_output.delete("1.0", tk.END)
+            log_pane.clear()
             weekly_path = weekly_file.get().strip()
             payroll_path = payroll_file.get().strip()
             month = selected_month.get()
 
-            if not (1 <= month <= 12):
-                raise ValueError("Ο μήνας πρέπει να είναι μεταξύ 1 και 12.")
-            if not weekly_path or not payroll_path:
-                raise ValueError("Πρέπει να επιλέξετε και τα δύο αρχεία.")
-            if not weekly_path.endswith(".xlsx") or not payroll_path.endswith(".xlsx"):
-                raise ValueError("Τα αρχεία πρέπει να είναι τύπου .xlsx")
+            pipeline = _pipeline()
+            if os.path.isdir(weekly_path):
+                pipeline.validate_month_inputs(pipeline.collect_weekly_files(weekly_path), payroll_path, month)
+            else:
+                pipeline.validate_inputs(weekly_path, payroll_path, month)
 
+            cancel_token = CancelToken()
             start_loader("Ανάλυση δεδομένων...")
 
             thread = threading.Thread(
                 target=_export_task,
-                args=(weekly_path, payroll_path, month, progress_q),
+                args=(weekly_path, payroll_path, month, progress_q, debug_log.get(), cancel_token),
                 daemon=True
             )
             thread.start()
@@ -373,182 +385,78 @@ def main():
         except Exception as e:
             messagebox.showerror("Σφάλμα", str(e))
 
-    def _export_task(weekly_path, payroll_path, month, q: Queue):
+    def _export_task(weekly_path, payroll_path, month, q: Queue, show_debug=False, cancel=None):
         """
-        Hybrid progress:
-        - Parsing known size => 0–80%
-        - Report unknown => fake fill 80–95%
-        - Save => 95–100%
+        Runs the headless pipeline (export_pipeline.run_export, or
+        run_month_export for a folder) on a worker thread; its progress/log
+        events are the messages _poll_queue consumes. The Παύση / Ακύρωση
+        buttons act on `cancel` (CancelToken); a cancelled run saves nothing.
+        Debug messages reach the queue only when asked for; the last ones are
+        kept in a ring buffer and shown if the run fails.
         """
-        try:
-            q.put({"type": "stage", "name": "parse", "text": "Ανάλυση δεδομένων..."})
-            q.put({"type": "set_val", "val": 0})
-
-            # load weekly schedule in data_only mode for safe reads
-            wb_weekly = openpyxl.load_workbook(weekly_path, data_only=True)
-            sheet_weekly = _get_sheet(wb_weekly, ["ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ ", "ΦΟΡΜΑ ΚΑΤΑΧΩΡΙΣΗΣ"])
-            sheet_times = _get_sheet(wb_weekly, ["ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ"])
-
-            DAY_TO_COLS = {
-                0: ('C', 'D'), 1: ('H', 'I'), 2: ('M', 'N'),
-                3: ('R', 'S'), 4: ('W', 'X'), 5: ('AB', 'AC'), 6: ('AG', 'AH'),
-            }
+        from utils.layout_index import default_layout_dir
+        from utils.weekly_cache import default_cache_dir
+        from utils.workbook_cache import shared_workbook_cache
 
-            # Efficient two-pass: first pass counts potential entries quickly (no full parse),
-            # second pass builds schedule_rows. Counting is lightweight: check for non-empty cells.
-            total_entries = 0
-            min_r = 10
-            max_col_for_count = 9  # we only check first 9 columns as before
-            for row in sheet_weekly.iter_rows(min_row=min_r, max_col=max_col_for_count, values_only=True):
-                if not row:
-                    continue
-                # hours columns are columns 3..9 in 1-based -> indices 2..8
-                for val in row[2:9]:
-                    if val is None:
-                        continue
-                    s = str(val).strip()
-                    if not s:
-                        continue
-                    # cheap heuristic: contains '-' or ':' likely a range
-                    if "-" in s or ":" in s:
-                        total_entries += 1
-
-            total_entries = max(1, total_entries)
-            tick_every = max(1, total_entries // 80)
-
-            schedule_rows = []
-            skipped_entries = []
-            done_entries = 0
-
-            # Precompute column index cache for DAY_TO_COLS letters
-            col_index_cache = {}
-            for letters in DAY_TO_COLS.values():
-                for letter in letters:
-                    if letter not in col_index_cache:
-                        col_index_cache[letter] = column_index_from_string(letter)
-
-            # Second pass: build rows
-            for idx, row in enumerate(sheet_weekly.iter_rows(min_row=min_r, max_col=max_col_for_count, values_only=True), start=min_r):
-                try:
-                    full_id = str(row[0]).strip() if row and row[0] else ""
-                    work_type = str(row[1]).strip() if row and row[1] else ""
-                    hours_list = row[2:9] if row else ()
-                    afm = full_id.split()[0] if full_id else ""
-
-                    if not afm:
-                        continue
-
-                    for i, hours_raw in enumerate(hours_list):
-                        if hours_raw is None or str(hours_raw).strip() == "":
-                            continue
-
-                        hours_value = parse_hours_range(str(hours_raw))
-                        if hours_value is None:
-                            continue
-
-                        date_cell = sheet_weekly.cell(row=8, column=3 + i)
-                        date_raw = date_cell.value
-                        if not isinstance(date_raw, datetime):
-                            continue
-
-                        dow = date_raw.weekday()
-                        letters = DAY_TO_COLS.get(dow)
-                        if not letters:
-                            continue
-                        left_letter, right_letter = letters
-                        left_col = col_index_cache[left_letter]
-                        right_col = col_index_cache[right_letter]
-
-                        raw_end_plus_30 = sheet_times.cell(row=idx, column=left_col).value
-                        raw_departure = sheet_times.cell(row=idx, column=right_col).value
-
-                        entry_end_plus_30 = _format_time_cell(raw_end_plus_30)
-                        entry_departure = _format_time_cell(raw_departure)
-
-                        schedule_rows.append({
-                            "date": date_raw,
-                            "employee": afm,
-                            "hours": hours_value,
-                            "work_type": work_type,
-                            "ΩΡΑΡΙΟ": hours_value,
-                            "ΩΡΑ ΛΗΞΗΣ+30": entry_end_plus_30,
-                            "ΩΡΑ ΑΠΟΧΩΡΗΣΗ": entry_departure,
-                        })
-
-                        done_entries += 1
-                        if done_entries % tick_every == 0:
-                            mapped = min(80, int(done_entries * 80 / total_entries))
-                            q.put({"type": "set_val", "val": mapped})
-
-                except Exception as err:
-                    skipped_entries.append(f"γραμμή {idx} ➤ {row[0] if row else ''} - ΣΦΑΛΜΑ: {str(err)}")
-
-            q.put({"type": "set_val", "val": 80})
-
-            q.put({"type": "stage", "name": "report", "text": "Υπολογισμός μισθοδοσίας..."})
-
-            wb_payroll = openpyxl.load_workbook(payroll_path)
-            sheet_payroll = _get_sheet(wb_payroll, ["ΩΡΟΜΕΤΡΗΣΗ"])
-
-            # GUI wrapper: route messages to queue
-            class SpreadsheetWrapper:
-                def __init__(self, ws):
-                    self.ws = ws
-                    self.wb = wb_payroll
-                def update_cell(self, cell_name, value):
-                    # keep original semantics: update_cell(ws, a1, value)
-                    update_cell(self.ws, cell_name, value)
-
-            class GUIWrapper:
-                def show_message(self, msg, level="info"):
-                    q.put({"type": "log", "msg": msg})
-
-            spreadsheet = SpreadsheetWrapper(sheet_payroll)
-            gui = GUIWrapper()
-
-            generate_monthly_report(
-                schedule_rows, month, spreadsheet, gui,
-                get_column_from_day, overtime_ws=sheet_times,
-                forma_wb=wb_weekly
-            )
-
-            q.put({"type": "stage", "name": "save", "text": "Αποθήκευση αρχείου..."})
-
-            save_path = os.path.join(os.path.dirname(payroll_path), "Payroll_Calculated.xlsx")
-            wb_payroll.save(save_path)
-
-            q.put({"type": "set_val", "val": 100})
+        pipeline = _pipeline()
+        log = pipeline.make_message_log(q.put, "debug" if show_debug else "info", ring_size=DEBUG_RING_SIZE)
+        try:
+            run = pipeline.run_month_export if os.path.isdir(weekly_path) else pipeline.run_export
+            # The payroll stays loaded between clicks; an edited file is reloaded (mtime/size)
+            result = run(weekly_path, payroll_path, month, gui=log, emit=q.put, cache_dir=default_cache_dir(),
+                         cancel=cancel, workbook_cache=shared_workbook_cache(), layout_dir=default_layout_dir())
+            root.after(0, lambda: _finish_export(result))
 
-            root.after(0, lambda: _finish_export({
-                "success": True,
-                "save_path": save_path,
-                "skipped_entries": skipped_entries,
-            }))
+        except OperationCancelled as e:
+            where = e.args[0] if e.args else None
+            root.after(0, lambda: _finish_export({"success": False, "cancelled": True, "stage": where}))
 
         except Exception as e:
-            root.after(0, lambda: _finish_export({
+            # `e` is unbound once the except block ends: capture what the callback needs now
+            failure = {
                 "success": False,
                 "error": str(e),
-            }))
+                "recent_debug": log.recent(DEBUG_TAIL_ON_ERROR),
+            }
+            root.after(0, lambda: _finish_export(failure))
 
     def _finish_export(result):
         stop_loader()
 
-        if result.get("success"):
-            txt_output.insert("end", f"\n✅ Αποθήκευση στο: {result['save_path']}\n")
-            txt_output.see("end")
+        # Logs the worker queued after the last poll cycle
+        lines = []
+        while True:
+            try:
+                msg = progress_q.get_nowait()
+            except Empty:
+                break
+            if msg.get("type") == "log":
+                lines.append(msg.get("msg", ""))
+
+        if result.get("cancelled"):
+            stage = SUBSTAGE_LABELS.get(result.get("stage"), result.get("stage") or "-")
+            lines += ["", f"⏹️ Η εξαγωγή ακυρώθηκε ({stage}) — το αρχείο μισθοδοσίας δεν άλλαξε."]
+            log_pane.append(lines)
+        elif result.get("success"):
+            lines += ["", f"✅ Αποθήκευση στο: {result['save_path']}"]
             btn_open_excel.config(state="normal")
             if result.get("skipped_entries"):
-                txt_output.insert("end", "\n⚠️ Παραλείφθηκαν εγγραφές με σφάλματα:\n")
-                txt_output.insert("end", "\n".join(result["skipped_entries"]) + "\n")
+                lines += ["", "⚠️ Παραλείφθηκαν εγγραφές με σφάλματα:"] + list(result["skipped_entries"])
+            log_pane.append(lines)
         else:
+            lines.append(f"❌ Σφάλμα:\n{result['error']}")
+            if result.get("recent_debug"):
+                lines += ["", "🔍 Τελευταία debug μηνύματα:"] + list(result["recent_debug"])
+            log_pane.append(lines)
             messagebox.showerror("Σφάλμα", f"Προέκυψε σφάλμα:\n{result['error']}")
-            txt_output.insert("end", f"❌ Σφάλμα:\n{result['error']}\n")
-            txt_output.see("end")
 
     btn_run.config(command=run_export)
 
+    # The window is up before openpyxl/numpy load; by the first click they usually are too
+    root.after_idle(lambda: threading.Thread(target=_pipeline, daemon=True).start())
     root.mainloop()
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # month mode parses in a process pool (frozen builds)
     main()
\ No newline at end of file
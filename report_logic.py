@@ -1,27 +1,23 @@
-from utils.metrics import get_metric_rows, inspect_sunday_metrics, update_sundays
-from calendar import monthrange
+from utils.logging_utils import log_enabled
+from utils.layout_index import AFM_COLUMN, LABEL_COLUMN, layout_key
+from utils.metrics import BlockLabelIndex, get_metric_rows, normalize_label
+from utils.form_mapper import FORM_DATE_ROW, FORM_LAST_DAY_COL, build_day_map
+from utils.month_layout import OT_COLUMNS, month_layout
+from utils.overtime_engine import compute_overtime_batch, hhmm_to_minutes
+from utils.time_tokens import SECONDS, TIME, parse_token
+from utils.progress import ProgressReporter, as_reporter
+from utils.result_cube import ResultCube
+from utils.schedule import ScheduleEntry, ensure_schedule_entries
+from utils.spreadsheet_utils import get_column_from_day as default_column_from_day
+from utils.write_plan import WritePlan
 from datetime import datetime, date, time, timedelta
 from openpyxl.utils import column_index_from_string, get_column_letter
 from collections import defaultdict
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-INVALID_TIME_VALUES = [
-    None, "", "0", "null", "#null", "#NULL",
-    "#TIMH!", "#VALUE!", "#DIV/0!", "#REF!", "#NAME?", "#N/A"
-]
-INVALID_TIME_TOKENS = {str(v).strip().upper() for v in INVALID_TIME_VALUES if isinstance(v, str)}
-
-DAY_TO_COLS = {
-    0: ('C',  'D'),
-    1: ('H',  'I'),
-    2: ('M',  'N'),
-    3: ('R',  'S'),
-    4: ('W',  'X'),
-    5: ('AB', 'AC'),
-    6: ('AG', 'AH'),
-}
-
-AFM_COL_ΩΡΟΜΕΤΡΗΣΗ = 5  # Ε
-MAX_ROW = 200
+
+AFM_COL_ΩΡΟΜΕΤΡΗΣΗ = AFM_COLUMN  # Ε
 
 def clean_time_string(time_str):
     if isinstance(time_str, str):
@@ -36,18 +32,8 @@ def is_valid_time_string(value):
     if isinstance(value, (int, float)):
         return True
     if isinstance(value, str):
-        s = value.strip()
-        if s == "":
-            return False
-        if s.upper() in INVALID_TIME_TOKENS:
-            return False
-        for fmt in ("%H:%M", "%H:%M:%S", "%H:%M:%S.%f"):
-            try:
-                datetime.strptime(s.replace(".", ":"), fmt)
-                return True
-            except Exception:
-                pass
-        return False
+        tok = parse_token(value)
+        return tok.kind == TIME and tok.level >= SECONDS
     return False
 
 def _to_hhmm(value) -> str:
@@ -70,9 +56,7 @@ def _to_hhmm(value) -> str:
 
 def read_work_times_from_sheet(ws_source, anchor_row_idx: int, day_date: date, gui=None) -> dict:
     dow = day_date.weekday()
-    left_col_letter, right_col_letter = DAY_TO_COLS[dow]
-    left_col_idx = column_index_from_string(left_col_letter)
-    right_col_idx = column_index_from_string(right_col_letter)
+    left_col_idx, right_col_idx = OT_COLUMNS[dow]
 
     left_val_raw = ws_source.cell(row=anchor_row_idx, column=left_col_idx).value
     right_val_raw = ws_source.cell(row=anchor_row_idx, column=right_col_idx).value
@@ -80,24 +64,31 @@ def read_work_times_from_sheet(ws_source, anchor_row_idx: int, day_date: date, g
     left_val = _to_hhmm(left_val_raw)
     right_val = _to_hhmm(right_val_raw)
 
-    debug_msg = (
-        f"🧾 Κελί χρόνου ({ws_source.title}) ➤ Ημέρα: {day_date.strftime('%A %d/%m')}\n"
-        f"🔹 {left_col_letter}{anchor_row_idx} ➤ raw='{left_val_raw}' | τύπος={type(left_val_raw).__name__} → καθαρό='{left_val}'\n"
-        f"🔹 {right_col_letter}{anchor_row_idx} ➤ raw='{right_val_raw}' | τύπος={type(right_val_raw).__name__} → καθαρό='{right_val}'"
-    )
-    gui.show_message(debug_msg, level="debug") if gui else None
+    if log_enabled(gui, "debug"):
+        debug_msg = (
+            f"🧾 Κελί χρόνου ({ws_source.title}) ➤ Ημέρα: {day_date.strftime('%A %d/%m')}\n"
+            f"🔹 {get_column_letter(left_col_idx)}{anchor_row_idx} ➤ raw='{left_val_raw}' | τύπος={type(left_val_raw).__name__} → καθαρό='{left_val}'\n"
+            f"🔹 {get_column_letter(right_col_idx)}{anchor_row_idx} ➤ raw='{right_val_raw}' | τύπος={type(right_val_raw).__name__} → καθαρό='{right_val}'"
+        )
+        gui.show_message(debug_msg, level="debug")
 
     return {
         "ΩΡΑ ΛΗΞΗΣ+30": left_val,
         "ΩΡΑ ΑΠΟΧΩΡΗΣΗ": right_val,
-        "_cells": (f"{left_col_letter}{anchor_row_idx}", f"{right_col_letter}{anchor_row_idx}")
+        "_cells": (f"{get_column_letter(left_col_idx)}{anchor_row_idx}", f"{get_column_letter(right_col_idx)}{anchor_row_idx}")
     }
 
+def _strict_time(s) -> time:
+    """datetime.strptime(s, "%H:%M").time() through the shared token cache."""
+    minutes = hhmm_to_minutes(s)
+    if minutes < 0:
+        raise ValueError(f"Μη έγκυρη ώρα: {s!r}")
+    return time(minutes // 60, minutes % 60)
+
 def calculate_overtime(end_plus_30, departure_time, date_obj):
-    fmt = "%H:%M"
     try:
-        start = datetime.strptime(end_plus_30, fmt).time()
-        end = datetime.strptime(departure_time, fmt).time()
+        start = _strict_time(end_plus_30)
+        end = _strict_time(departure_time)
     except Exception:
         return {"ΥΠΕΡΕΡΓΑΣΙΑ": 0, "ΥΠΕΡΩΡΙΑ": 0, "ΑΡΓΙΑ": 0}
 
@@ -124,10 +115,9 @@ def calculate_overtime(end_plus_30, departure_time, date_obj):
     return {"ΥΠΕΡΕΡΓΑΣΙΑ": yperergasia, "ΥΠΕΡΩΡΙΑ": yperoria, "ΑΡΓΙΑ": argia}
 
 def calculate_night_hours(start_str: str, end_str: str) -> float:
-    fmt = "%H:%M"
     try:
-        start_dt = datetime.strptime(start_str, fmt)
-        end_dt = datetime.strptime(end_str, fmt)
+        start_dt = datetime.combine(date(1900, 1, 1), _strict_time(start_str))
+        end_dt = datetime.combine(date(1900, 1, 1), _strict_time(end_str))
         if end_dt <= start_dt:
             end_dt += timedelta(days=1)
         night_start = start_dt.replace(hour=22, minute=0, second=0, microsecond=0)
@@ -155,16 +145,148 @@ def is_valid_afm(s):
     s = str(s).strip()
     return s.isdigit() and len(s) == 9
 
+class EmployeeIndex:
+    """
+    AFM -> rows index ενός φύλλου, χτισμένο με ένα μόνο iter_rows sweep.
+
+    Keys are cell values normalized with normalize_afm_strict (so every key is
+    at least 9 digits long). Lookups reproduce find_employee_row_in_sheet:
+    strict -> exact match, otherwise the AFM may appear as a substring of a
+    cell's digits (a raw-string hit of a 9-digit AFM is always a digit hit too).
+    on_row(idx, values) sees every swept row, so other per-row indexes (e.g.
+    BlockLabelIndex.add_row) can share the one sweep.
+    """
+
+    def __init__(self, ws, *, min_row=1, max_row=None, columns=None, on_row=None):
+        self.title = ws.title
+        self._rows = defaultdict(list)
+        self._lookup_cache = {}
+        self._sorted_keys = None
+
+        max_row_eff = max_row or ws.max_row
+        col_range = sorted(columns) if columns else None
+        if col_range:
+            first_col = col_range[0]
+            offsets = [c - first_col for c in col_range]
+            rows_iter = ws.iter_rows(min_row=min_row, max_row=max_row_eff,
+                                     min_col=first_col, max_col=col_range[-1], values_only=True)
+        else:
+            offsets = None
+            rows_iter = ws.iter_rows(min_row=min_row, max_row=max_row_eff, values_only=True)
+
+        for idx, row in enumerate(rows_iter, start=min_row):
+            if on_row is not None:
+                on_row(idx, row)
+            values = [row[o] for o in offsets if o < len(row)] if offsets else row
+            for val in values:
+                if val is None:
+                    continue
+                key = normalize_afm_strict(val)
+                if not key:
+                    continue
+                rows = self._rows[key]
+                if not rows or rows[-1] != idx:
+                    rows.append(idx)
+
+        # Only keys longer than an AFM can contain it as a proper substring
+        self._long_keys = [k for k in self._rows if len(k) > 9]
+
+    @classmethod
+    def from_rows(cls, title, rows):
+        """Index from a stored rows_by_key() mapping (see utils.layout_index), without a sweep."""
+        index = cls.__new__(cls)
+        index.title = title
+        index._rows = defaultdict(list, {key: list(key_rows) for key, key_rows in rows.items()})
+        index._lookup_cache = {}
+        index._sorted_keys = None
+        index._long_keys = [k for k in index._rows if len(k) > 9]
+        return index
+
+    def rows_by_key(self):
+        """{normalized AFM: [rows]}, what from_rows() takes."""
+        return {key: list(rows) for key, rows in self._rows.items()}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, afm):
+        return bool(self.find(afm, strict=True))
+
+    def find(self, afm, strict=False):
+        """Rows (ascending) where the AFM appears; same semantics as find_employee_row_in_sheet."""
+        target = normalize_afm_strict(afm)
+        if not target:
+            return []
+        if strict:
+            return list(self._rows.get(target, ()))
+
+        cached = self._lookup_cache.get(target)
+        if cached is None:
+            rows = set(self._rows.get(target, ()))
+            for key in self._long_keys:
+                if len(key) > len(target) and target in key:
+                    rows.update(self._rows[key])
+            cached = sorted(rows)
+            self._lookup_cache[target] = cached
+        return list(cached)
+
+    def rows_with_prefix(self, prefix):
+        """Rows of every key that starts with the given digits (not zero-padded)."""
+        digits = "".join(ch for ch in str(prefix) if ch.isdigit())
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self._rows)
+        rows = set()
+        i = bisect_left(self._sorted_keys, digits)
+        while i < len(self._sorted_keys) and self._sorted_keys[i].startswith(digits):
+            rows.update(self._rows[self._sorted_keys[i]])
+            i += 1
+        return sorted(rows)
+
+    def rows_containing(self, fragment):
+        """Rows of every key that contains the given digits anywhere."""
+        digits = "".join(ch for ch in str(fragment) if ch.isdigit())
+        rows = set()
+        for key, key_rows in self._rows.items():
+            if digits in key:
+                rows.update(key_rows)
+        return sorted(rows)
+
+def index_payroll(ws, layout_store=None, on_row=None):
+    """
+    (EmployeeIndex, BlockLabelIndex, stored) of the ΩΡΟΜΕΤΡΗΣΗ sheet: ΑΦΜ
+    from column E, labels from G, with or without a layout_store
+    (utils.layout_index.LayoutStore), so a stored layout answers exactly as
+    a sweep. A stored layout that still matches the sheet replaces the
+    sweep (stored=True); otherwise the sweep is stored for the next run.
+    on_row(idx, values) sees every row of the ΑΦΜ sweep.
+    """
+    if layout_store is not None:
+        key = layout_key(ws)
+        stored = layout_store.load(key, ws)
+        if stored is not None:
+            return (EmployeeIndex.from_rows(ws.title, stored["employee_rows"]),
+                    BlockLabelIndex.from_rows(stored["label_rows"]), True)
+
+    employee_index = EmployeeIndex(ws, columns=(AFM_COLUMN,), on_row=on_row)
+    label_index = BlockLabelIndex.from_sheet(ws, column=LABEL_COLUMN)
+    if layout_store is not None:
+        layout_store.save(key, ws, employee_index.rows_by_key(), label_index.rows())
+    return employee_index, label_index, False
+
 def find_employee_row_in_sheet(ws, afm, gui=None, diagnostics=False, *,
                                min_row=1, max_row=None,
                                strict_cell_match=False,
                                search_columns=None,
-                               cache=None):
+                               cache=None,
+                               index=None):
     """
     Returns list of 1-based row indices where the AFM appears in the given worksheet.
     If cache (dict) is provided, it must be used as a mapping keyed by (id(ws), normalized_afm)
     so that cached results are worksheet-specific.
 
+    If index (EmployeeIndex built for ws) is provided, rows come from it instead of
+    scanning the sheet; min_row/max_row/search_columns are then the index's own.
+
     This avoids cross-sheet cache pollution (bug fixed from earlier refactor).
     """
     # Build a sheet-aware cache key when a cache dict is provided
@@ -176,31 +298,40 @@ def find_employee_row_in_sheet(ws, afm, gui=None, diagnostics=False, *,
             return list(cached)
 
     target_afm = normalize_afm_strict(afm)
+    dbg = diagnostics and log_enabled(gui, "debug")
     matches = []
     try:
-        max_row_eff = max_row or ws.max_row
-        col_range = list(search_columns) if search_columns else None
-
-        for idx in range(min_row, max_row_eff + 1):
-            values = [ws.cell(row=idx, column=c).value for c in col_range] if col_range else [cell.value for cell in ws[idx]]
-            for val in values:
-                if val is None:
-                    continue
-                cell_afm = normalize_afm_strict(val)
-                if strict_cell_match:
-                    if cell_afm == target_afm:
-                        if diagnostics:
-                            msg = f"🔎 Βρέθηκε ΑΦΜ {target_afm} (exact) στη γραμμή {idx} του φύλλου '{ws.title}'"
-                            gui.show_message(msg, level="debug") if gui else None
-                        matches.append(idx)
-                        break
-                else:
-                    if (cell_afm and target_afm in cell_afm) or (target_afm and target_afm in str(val)):
-                        if diagnostics:
-                            msg = f"🔎 Βρέθηκε ΑΦΜ {target_afm} ως substring στη γραμμή {idx} του φύλλου '{ws.title}'"
-                            gui.show_message(msg, level="debug") if gui else None
-                        matches.append(idx)
-                        break
+        if index is not None:
+            matches = index.find(afm, strict=strict_cell_match)
+            if dbg:
+                kind = "exact" if strict_cell_match else "substring"
+                for idx in matches:
+                    msg = f"🔎 Βρέθηκε ΑΦΜ {target_afm} ({kind}) στη γραμμή {idx} του φύλλου '{ws.title}'"
+                    gui.show_message(msg, level="debug")
+        else:
+            max_row_eff = max_row or ws.max_row
+            col_range = list(search_columns) if search_columns else None
+
+            for idx in range(min_row, max_row_eff + 1):
+                values = [ws.cell(row=idx, column=c).value for c in col_range] if col_range else [cell.value for cell in ws[idx]]
+                for val in values:
+                    if val is None:
+                        continue
+                    cell_afm = normalize_afm_strict(val)
+                    if strict_cell_match:
+                        if cell_afm == target_afm:
+                            if dbg:
+                                msg = f"🔎 Βρέθηκε ΑΦΜ {target_afm} (exact) στη γραμμή {idx} του φύλλου '{ws.title}'"
+                                gui.show_message(msg, level="debug")
+                            matches.append(idx)
+                            break
+                    else:
+                        if (cell_afm and target_afm in cell_afm) or (target_afm and target_afm in str(val)):
+                            if dbg:
+                                msg = f"🔎 Βρέθηκε ΑΦΜ {target_afm} ως substring στη γραμμή {idx} του φύλλου '{ws.title}'"
+                                gui.show_message(msg, level="debug")
+                            matches.append(idx)
+                            break
 
         if cache is not None:
             cache[key] = list(matches)
@@ -214,11 +345,6 @@ def find_employee_row_in_sheet(ws, afm, gui=None, diagnostics=False, *,
         gui.show_message(error_msg, level="error") if gui else None
         return []
 
-def normalize_label(s: str) -> str:
-    if not isinstance(s, str):
-        return ""
-    return str(s).strip().upper().replace(" ", "")
-
 def compute_anchor(row: int) -> int:
     return row - ((row - 2) % 6)
 
@@ -232,9 +358,13 @@ def find_label_row_in_block(ws, anchor_row: int, target_label: str = "ΕΠ.ΩΡ
                 return r
     return None
 
-def get_epores_row(ws, rr: int) -> int:
+def get_epores_row(ws, rr: int, label_index=None) -> int:
+    """ΕΠ.ΩΡΕΣ row of rr's block; label_index (BlockLabelIndex) avoids the per-cell block scan."""
     anchor = compute_anchor(rr)
-    label_row = find_label_row_in_block(ws, anchor, "ΕΠ.ΩΡΕΣ")
+    if label_index is not None:
+        label_row = label_index.find(anchor, "ΕΠ.ΩΡΕΣ")
+    else:
+        label_row = find_label_row_in_block(ws, anchor, "ΕΠ.ΩΡΕΣ")
     return label_row if label_row is not None else anchor
 
 def normalize_repo_token(val):
@@ -243,6 +373,26 @@ def normalize_repo_token(val):
     t = str(val).strip().upper()
     return "Ρ" if t == "Ρ" else t
 
+def _day_column(layout, day, get_column_from_day=None, gui=None):
+    """
+    ΩΡΟΜΕΤΡΗΣΗ column index of a day of the month. The default provider
+    (utils.spreadsheet_utils.get_column_from_day) is the layout's own
+    mapping, so it is only called for custom providers; a provider that
+    fails or returns nothing falls back to the layout column.
+    """
+    if get_column_from_day is None or get_column_from_day is default_column_from_day:
+        return layout.day_columns[day]
+    try:
+        col = get_column_from_day(day)
+        if isinstance(col, int):
+            return col
+        if col is not None and str(col).strip():
+            return column_index_from_string(str(col).strip())
+    except Exception as e:
+        if gui is not None:
+            gui.show_message(f"⛔ Αδυναμία εύρεσης στήλης από provider για ημέρα {day} ➤ {str(e)}", level="error")
+    return layout.day_columns[day]
+
 def tag_schedule_rows_with_repo_from_form(
     schedule_rows,
     gui,
@@ -256,14 +406,31 @@ def tag_schedule_rows_with_repo_from_form(
     month=None,
     get_column_from_day=None,
     strict_afm=True,
-    write_guard=True
+    write_guard=True,
+    employee_index=None,
+    write_plan=None,
+    progress=None,
+    label_index=None,
+    repo_weekdays=None,
+    layout=None
 ):
-    import re
-    from openpyxl.utils import column_index_from_string, get_column_letter
-
-    AFM_COL_FORM = 1
-    SUNDAY_COL_LETTER = "I"
-    SUNDAY_COL = column_index_from_string(SUNDAY_COL_LETTER)
+    """
+    Σημειώνει ΡΕΠΟ από τη ΦΟΡΜΑ στα schedule_rows και 'Ρ' στο ΩΡΟΜΕΤΡΗΣΗ.
+
+    One streaming pass over form rows start_row..end_row (columns A..I, so
+    read-only sheets and SheetValues snapshots work too) finds ΡΕΠΟ in any of
+    the seven day columns C..I; each column's date comes from date_row.
+    repo_weekdays limits the days looked at (e.g. {6} for Sundays only, the
+    old behaviour); days outside `month` are ignored. layout (MonthLayout
+    of the report's month) maps the form's dates and the ΩΡΟΜΕΤΡΗΣΗ day
+    columns; without it they are worked out from `month` alone. The ΩΡΟΜΕΤΡΗΣΗ cells
+    are resolved through employee_index / label_index (built if not given)
+    and all 'Ρ' marks are added to write_plan (WritePlan) as one batch;
+    without a plan a private one is created and applied to spreadsheet.ws.
+    progress: see utils.progress; reports the "tagging" sub-stage per form
+    row and raises OperationCancelled (plan not applied) if asked to stop.
+    """
+    dbg = log_enabled(gui, "debug")
 
     if forma_ws is None:
         if forma_wb is None:
@@ -272,40 +439,44 @@ def tag_schedule_rows_with_repo_from_form(
         forma_ws = forma_wb.active
         gui.show_message("⚠️ Χρήση ενεργού φύλλου ως φόρμα", level="warning")
 
-    raw_date = forma_ws.cell(row=date_row, column=SUNDAY_COL).value
-    gui.show_message(f"🗓️ Ανάγνωση ημερομηνίας Κυριακής από {SUNDAY_COL_LETTER}{date_row}: {raw_date!r} ({type(raw_date).__name__})", level="debug")
-    try:
-        if isinstance(raw_date, (datetime, date)):
-            sunday_date = raw_date.date() if isinstance(raw_date, datetime) else raw_date
-        else:
-            sunday_date = datetime.strptime(str(raw_date), "%d/%m/%Y").date()
-    except Exception:
-        gui.show_message(f"⛔ Αδυναμία ανάγνωσης ημερομηνίας Κυριακής ➤ {SUNDAY_COL_LETTER}{date_row}: {raw_date}", level="error")
-        return schedule_rows
+    if date_row == FORM_DATE_ROW:
+        header = None  # build_day_map reads it
+    else:
+        header = next(forma_ws.iter_rows(min_row=date_row, max_row=date_row, max_col=FORM_LAST_DAY_COL, values_only=True), ())
 
-    if month and sunday_date.month != int(month):
-        gui.show_message(f"ℹ️ Κυριακή {sunday_date} εκτός στόχου μήνα ({month})", level="debug")
-        return schedule_rows
+    def on_unparsed(col, raw_date):
+        gui.show_message(f"⚠️ Αδυναμία ανάγνωσης ημερομηνίας ➤ {get_column_letter(col)}{date_row}: {raw_date}", level="warning")
 
-    gui.show_message(f"📅 Ημερομηνία Κυριακής ➤ {sunday_date} (day={sunday_date.day})", level="debug")
+    def on_other_month(col, day_date):
+        if dbg:
+            gui.show_message(f"ℹ️ {get_column_letter(col)}{date_row}: {day_date} εκτός στόχου μήνα ({month})", level="debug")
 
-    day_num = int(sunday_date.day)
-    excel_col = None
-    if get_column_from_day:
-        try:
-            excel_col = get_column_from_day(day_num)
-            if isinstance(excel_col, int):
-                excel_col = get_column_letter(excel_col)
-            elif excel_col is not None:
-                excel_col = str(excel_col).strip()
-            gui.show_message(f"📌 Mapping ημέρας (provider) ➤ {day_num} → στήλη Excel: {excel_col!r}", level="debug")
-        except Exception as e:
-            gui.show_message(f"⛔ Αδυναμία εύρεσης στήλης από provider για ημέρα {day_num} ➤ {str(e)}", level="error")
-
-    if not excel_col:
-        col_index = 7 + day_num
-        excel_col = get_column_letter(col_index)
-        gui.show_message(f"🧭 Fallback mapping ημέρας ➤ {day_num} → {excel_col} (index={col_index})", level="debug")
+    if layout is not None:
+        day_map, _ = layout.form_day_map(forma_ws, header=header, on_unparsed=on_unparsed,
+                                         on_other_month=on_other_month)
+    else:
+        day_map, _ = build_day_map(forma_ws, month, header=header, on_unparsed=on_unparsed,
+                                   on_other_month=on_other_month)
+
+    # Form day column (0-based offset in the row) -> (date, ΩΡΟΜΕΤΡΗΣΗ column letter, index)
+    day_targets = {}
+    for form_day in day_map.values():
+        day_date = form_day.date
+        letter = get_column_letter(form_day.form_col)
+        if repo_weekdays is not None and day_date.weekday() not in repo_weekdays:
+            continue
+
+        target_col = _day_column(layout or month_layout(day_date.year, day_date.month), day_date.day,
+                                 get_column_from_day, gui)
+        excel_col = get_column_letter(target_col)
+        day_targets[form_day.form_col - 1] = (day_date, excel_col, target_col)
+        if dbg:
+            gui.show_message(f"📅 {letter}{date_row} ➤ {day_date} → στήλη ΩΡΟΜΕΤΡΗΣΗ {excel_col}", level="debug")
+
+    if not day_targets:
+        if dbg:
+            gui.show_message(f"ℹ️ Καμία ημέρα της φόρμας στον μήνα {month} (γραμμή {date_row})", level="debug")
+        return schedule_rows
 
     def to_date(d):
         try:
@@ -313,136 +484,122 @@ def tag_schedule_rows_with_repo_from_form(
         except Exception:
             return d
 
-    existing_map = {(str(e.get("employee")).strip(), to_date(e.get("date"))): e
-                    for e in schedule_rows if isinstance(e, dict) and "employee" in e and "date" in e}
+    ensure_schedule_entries(schedule_rows)
+    existing_map = {(str(e.employee).strip(), to_date(e.date)): e
+                    for e in schedule_rows if e.employee is not None and e.date is not None}
 
     orometrisi_ws = getattr(spreadsheet, "ws", None)
     if not orometrisi_ws:
         gui.show_message("⛔ Δεν υπάρχει φύλλο ΩΡΟΜΕΤΡΗΣΗ (spreadsheet.ws) για εγγραφή ΡΕΠΟ", level="error")
 
-    # Build AFM -> rows mapping in ΩΡΟΜΕΤΡΗΣΗ once
-    afm_to_rows = defaultdict(list)
-    if orometrisi_ws:
-        for rr in range(2, MAX_ROW + 1):
-            v = orometrisi_ws.cell(row=rr, column=AFM_COL_ΩΡΟΜΕΤΡΗΣΗ).value
-            if v is None:
-                continue
-            afm_to_rows[str(v).strip()].append(rr)
+    apply_plan = write_plan is None
+    if apply_plan:
+        write_plan = WritePlan()
 
     added = updated = skipped = marked = not_found = overwritten = guarded = 0
     duplicate_afm_hits = 0
 
-    gui.show_message(f"🔎 Σάρωση φόρμας για ΡΕΠΟ στη στήλη {SUNDAY_COL_LETTER}, γραμμές {start_row}..{end_row}", level="debug")
-
-    seen_afms_written = set()
-
-    def is_repo_from_form(val) -> bool:
-        return normalize_label(val) == "ΡΕΠΟ"
+    if dbg:
+        gui.show_message(f"🔎 Σάρωση φόρμας για ΡΕΠΟ στις στήλες C..I, γραμμές {start_row}..{end_row}", level="debug")
 
-    afms_with_repo = set()
-    for r in range(start_row, end_row + 1):
-        afm_raw = forma_ws.cell(row=r, column=AFM_COL_FORM).value
-        if not afm_raw:
-            continue
-        afm = str(afm_raw).strip().split()[0]
-        if strict_afm and not is_valid_afm(afm):
-            continue
-        val = forma_ws.cell(row=r, column=SUNDAY_COL).value
-        if is_repo_from_form(val):
-            afms_with_repo.add(afm)
-
-    gui.show_message(f"📋 ΑΦΜ με ΡΕΠΟ στη φόρμα ({len(afms_with_repo)}): {sorted(afms_with_repo)}", level="debug")
+    owns_reporter = not isinstance(progress, ProgressReporter)
+    reporter = as_reporter(progress)
+    form_rows = end_row - start_row + 1
+    reporter.start("tagging", form_rows)
 
-    for r in range(start_row, end_row + 1):
-        afm_raw = forma_ws.cell(row=r, column=AFM_COL_FORM).value
+    # Single pass: (afm, form column) of every ΡΕΠΟ cell, first occurrence only
+    repo_hits = {}
+    rows_iter = forma_ws.iter_rows(min_row=start_row, max_row=end_row, max_col=FORM_LAST_DAY_COL, values_only=True)
+    for r, row in enumerate(rows_iter, start=start_row):
+        reporter.update(r - start_row + 1, form_rows)
+        afm_raw = row[0] if row else None
         if not afm_raw:
             continue
-
         afm = str(afm_raw).strip().split()[0]
         if strict_afm and not is_valid_afm(afm):
             skipped += 1
-            gui.show_message(f"⏭️ Παράκαμψη (μη έγκυρο ΑΦΜ) ➤ '{afm_raw}' στη γραμμή {r}", level="debug")
+            if dbg:
+                gui.show_message(f"⏭️ Παράκαμψη (μη έγκυρο ΑΦΜ) ➤ '{afm_raw}' στη γραμμή {r}", level="debug")
             continue
+        for offset in day_targets:
+            if offset < len(row) and normalize_label(row[offset]) == "ΡΕΠΟ":
+                repo_hits.setdefault((afm, offset), r)
 
-        if afm not in afms_with_repo:
-            skipped += 1
-            continue
+    if dbg:
+        gui.show_message(f"📋 ΡΕΠΟ στη φόρμα ➤ {len(repo_hits)} ημέρες, {len({a for a, _ in repo_hits})} ΑΦΜ", level="debug")
 
-        if afm in seen_afms_written:
-            skipped += 1
-            gui.show_message(f"🛑 Παράκαμψη (ήδη γράφτηκε 'Ρ' σήμερα) ➤ ΑΦΜ {afm}", level="debug")
-            continue
+    # AFM -> rows in ΩΡΟΜΕΤΡΗΣΗ: reuse the caller's index or build one over the AFM column
+    if orometrisi_ws and repo_hits:
+        if employee_index is None:
+            employee_index = EmployeeIndex(orometrisi_ws, min_row=2, columns=(AFM_COL_ΩΡΟΜΕΤΡΗΣΗ,))
+        if label_index is None:
+            label_index = BlockLabelIndex.from_sheet(orometrisi_ws)
 
-        key = (afm, sunday_date)
+    batch = {}  # (row, col) -> ("Ρ", source), handed to write_plan at the end
+    for (afm, offset), r in repo_hits.items():
+        day_date, excel_col, target_col = day_targets[offset]
+
+        key = (afm, day_date)
         if key in existing_map:
             e = existing_map[key]
-            if not e.get("is_repo"):
-                e["is_repo"] = True
+            if not e.is_repo:
+                e.is_repo = True
                 updated += 1
         else:
-            schedule_rows.append({"date": sunday_date, "employee": afm, "is_repo": True})
+            entry = ScheduleEntry(day_date, afm, is_repo=True)
+            schedule_rows.append(entry)
+            existing_map[key] = entry
             added += 1
 
-        gui.show_message(f"➕ ΡΕΠΟ εντοπίστηκε στη φόρμα ➤ ΑΦΜ {afm} | {sunday_date.strftime('%d/%m/%Y')} (row {r})", level="debug")
+        if dbg:
+            gui.show_message(f"➕ ΡΕΠΟ εντοπίστηκε στη φόρμα ➤ ΑΦΜ {afm} | {day_date.strftime('%d/%m/%Y')} (row {r})", level="debug")
 
         if not orometrisi_ws:
             continue
 
-        afm_clean = str(afm).strip()
-        match_rows = afm_to_rows.get(afm_clean, [])
-
+        match_rows = employee_index.find(afm, strict=True)
         if not match_rows:
             not_found += 1
-            gui.show_message(f"⚠️ Δεν βρέθηκε ΑΦΜ {afm_clean} στο ΩΡΟΜΕΤΡΗΣΗ", level="debug")
+            if dbg:
+                gui.show_message(f"⚠️ Δεν βρέθηκε ΑΦΜ {afm} στο ΩΡΟΜΕΤΡΗΣΗ", level="debug")
             continue
-
         if len(match_rows) > 1:
             duplicate_afm_hits += 1
-            gui.show_message(f"⚠️ Πολλαπλές εμφανίσεις ΑΦΜ {afm_clean} στο ΩΡΟΜΕΤΡΗΣΗ ➤ {match_rows}", level="debug")
-
-        wrote_for_this_afm = False
-        for rr in match_rows:
-            if afm_clean in seen_afms_written:
-                break
-            anchor = compute_anchor(rr)
-            target_row = get_epores_row(orometrisi_ws, rr)
-            target_col = column_index_from_string(excel_col)
-            cell_a1 = f"{excel_col}{target_row}"
-
-            if afm_clean not in afms_with_repo:
-                gui.show_message(f"⛔ Ασυμφωνία: Απόπειρα εγγραφής 'Ρ' για ΑΦΜ {afm_clean} χωρίς ΡΕΠΟ στη φόρμα", level="error")
-                break
+            if dbg:
+                gui.show_message(f"⚠️ Πολλαπλές εμφανίσεις ΑΦΜ {afm} στο ΩΡΟΜΕΤΡΗΣΗ ➤ {match_rows}", level="debug")
 
+        # First block (in row order) whose ΕΠ.ΩΡΕΣ cell is not already 'Ρ'
+        wrote = False
+        for target_row in dict.fromkeys(get_epores_row(orometrisi_ws, rr, label_index) for rr in match_rows):
+            cell_a1 = f"{excel_col}{target_row}"
+            pending = batch.get((target_row, target_col))
+            existing = pending[0] if pending else write_plan.value_at(orometrisi_ws, target_row, target_col)
             if write_guard:
-                existing = orometrisi_ws.cell(row=target_row, column=target_col).value
                 if normalize_repo_token(existing) == "Ρ":
                     guarded += 1
-                    gui.show_message(f"🛡️ Παράκαμψη εγγραφής ➤ {cell_a1} έχει ήδη 'Ρ'", level="debug")
+                    if dbg:
+                        gui.show_message(f"🛡️ Παράκαμψη εγγραφής ➤ {cell_a1} έχει ήδη 'Ρ'", level="debug")
                     continue
-                if existing not in (None, "") and normalize_repo_token(existing) != "Ρ":
+                if existing not in (None, ""):
                     overwritten += 1
                     gui.show_message(f"⚠️ Overwrite ➤ {cell_a1}: {existing!r} → 'Ρ'", level="warning")
 
-            before = orometrisi_ws[cell_a1].value
-            orometrisi_ws[cell_a1].value = "Ρ"
-            after = orometrisi_ws[cell_a1].value
-            gui.show_message(f"✏️ Εγγραφή ΡΕΠΟ στο {cell_a1} ➤ πριν: {before!r} → μετά: {after!r}", level="debug")
-
-            if hasattr(spreadsheet, "update_cell"):
-                try:
-                    spreadsheet.update_cell(cell_a1, "Ρ")
-                except Exception:
-                    pass
-
+            batch[(target_row, target_col)] = ("Ρ", ("ΡΕΠΟ", afm, day_date))
+            if dbg:
+                gui.show_message(f"✏️ Εγγραφή ΡΕΠΟ στο {cell_a1} ➤ πριν: {existing!r} → μετά: 'Ρ'", level="debug")
             marked += 1
-            seen_afms_written.add(afm_clean)
-            wrote_for_this_afm = True
+            wrote = True
             break
 
-        if not wrote_for_this_afm:
-            gui.show_message(f"ℹ️ Δεν πραγματοποιήθηκε εγγραφή 'Ρ' για ΑΦΜ {afm_clean} (guards/anchors/matches)", level="debug")
+        if not wrote and dbg:
+            gui.show_message(f"ℹ️ Δεν πραγματοποιήθηκε εγγραφή 'Ρ' για ΑΦΜ {afm} (guards/anchors/matches)", level="debug")
+
+    if owns_reporter:
+        reporter.finish()
+    write_plan.set_many(batch)
+    if apply_plan and orometrisi_ws:
+        write_plan.apply(orometrisi_ws)
 
-    gui.show_message(f"📌 Γράφτηκε 'Ρ' για ΑΦΜ: {sorted(seen_afms_written)}", level="debug")
     gui.show_message(
         f"✅ Ολοκλήρωση: προστέθηκαν={added}, ενημερώθηκαν={updated}, "
         f"γράφτηκαν={marked}, παρακάμφθηκαν={guarded}, δεν βρέθηκαν={not_found}, πολλαπλά={duplicate_afm_hits}",
@@ -450,6 +607,63 @@ def tag_schedule_rows_with_repo_from_form(
     )
     return schedule_rows
 
+def compute_metric_writes(jobs):
+    """
+    Pure per-entry metric computation (no workbook access, picklable input).
+
+    jobs: [(start_min, end_min, is_sunday, work_type, metric_rows)].
+    Returns one ((ΥΠΕΡΕΡΓΑΣΙΑ, ΥΠΕΡΩΡΙΑ, ΑΡΓΙΑ, ΝΥΧΤΑ), [(metric, row, value)])
+    per job, the writes in the order the report applies them.
+    """
+    if not jobs:
+        return []
+    starts, ends, sundays, work_types, _ = zip(*jobs)
+    batch = {k: v.tolist() for k, v in compute_overtime_batch(starts, ends, sundays, work_types).items()}
+
+    results = []
+    for i, (_, _, is_sunday, _, metric_rows) in enumerate(jobs):
+        yperergasia = batch["ΥΠΕΡΕΡΓΑΣΙΑ"][i]
+        yperoria = batch["ΥΠΕΡΩΡΙΑ"][i]
+        night_hours = batch["ΝΥΧΤΑ"][i]
+        writes = []
+
+        # Sunday: base + υπερεργασία + υπερωρία; any other day ΑΡΓΙΑ is 0
+        argia = batch["ΑΡΓΙΑ_ΣΥΝΟΛΟ"][i] if is_sunday else batch["ΑΡΓΙΑ"][i]
+        if argia > 0 and "ΑΡΓΙΑ" in metric_rows:
+            writes.append(("ΑΡΓΙΑ", metric_rows["ΑΡΓΙΑ"], argia))
+        if yperergasia > 0 and "ΥΠΕΡΕΡΓΑΣΙΑ" in metric_rows:
+            writes.append(("ΥΠΕΡΕΡΓΑΣΙΑ", metric_rows["ΥΠΕΡΕΡΓΑΣΙΑ"], yperergasia))
+        if yperoria > 0 and "ΥΠΕΡΩΡΙΑ" in metric_rows:
+            writes.append(("ΥΠΕΡΩΡΙΑ", metric_rows["ΥΠΕΡΩΡΙΑ"], yperoria))
+        if is_sunday and "ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ" in metric_rows:
+            writes.append(("ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ", metric_rows["ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ"], 1))
+        if night_hours > 0 and "ΝΥΧΤΑ" in metric_rows:
+            writes.append(("ΝΥΧΤΑ", metric_rows["ΝΥΧΤΑ"], night_hours))
+
+        results.append(((yperergasia, yperoria, batch["ΑΡΓΙΑ"][i], night_hours), writes))
+    return results
+
+def compute_metric_writes_parallel(jobs, afms, workers):
+    """
+    compute_metric_writes over a process pool: the jobs of one AFM always go
+    to the same partition (their 6-row block is independent of the others),
+    and the results come back in job order, identical to the serial call.
+    """
+    partitions = [[] for _ in range(workers)]
+    afm_partition = {}
+    for i, afm in enumerate(afms):
+        part = afm_partition.setdefault(afm, len(afm_partition) % workers)
+        partitions[part].append(i)
+    partitions = [idxs for idxs in partitions if idxs]
+
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=len(partitions)) as pool:
+        futures = {pool.submit(compute_metric_writes, [jobs[i] for i in idxs]): idxs for idxs in partitions}
+        for future in as_completed(futures):
+            for i, res in zip(futures[future], future.result()):
+                results[i] = res
+    return results
+
 def generate_monthly_report(
     schedule_rows,
     month,
@@ -458,16 +672,54 @@ def generate_monthly_report(
     get_column_from_day,
     overtime_ws=None,
     forma_wb=None,
-    forma_ws=None
+    forma_ws=None,
+    times_from_entries=False,
+    write_plan=None,
+    dry_run=False,
+    forma_sheets=None,
+    workers=None,
+    apply_writes=True,
+    progress=None,
+    layout_store=None,
+    metrics_feed=None,
+    result_cube=None
 ):
+    """
+    Υπολογίζει τα metrics του μήνα και τα γράφει στο ΩΡΟΜΕΤΡΗΣΗ.
+
+    With times_from_entries=True the ΩΡΑ ΛΗΞΗΣ+30 / ΩΡΑ ΑΠΟΧΩΡΗΣΗ values are
+    taken from each entry (as produced by the streaming weekly reader) instead
+    of being looked up in overtime_ws.
+    All cell writes (the ΡΕΠΟ marks included) are collected in write_plan
+    (a WritePlan, created if not given) and applied in one pass at the end;
+    with dry_run=True the plan is filled but the sheet is left untouched
+    (apply_writes=False does the same silently, for callers that save the
+    plan themselves, e.g. utils.xlsx_patch).
+    forma_sheets (month mode) lists the ΦΟΡΜΑ sheets of several weeks; the
+    ΡΕΠΟ tagging runs once per sheet, each with its own Sunday.
+    workers > 1 computes the metrics in a process pool, partitioned by AFM
+    (see compute_metric_writes_parallel); the writes still go through the
+    one write_plan in schedule order, so the result equals the serial run.
+    progress (utils.progress) receives (substage, done, total) for the
+    sub-stages index, tagging, entries, compute, writes and apply, rate-limited;
+    returning False raises OperationCancelled before the plan is applied.
+    layout_store (utils.layout_index.LayoutStore) replaces the ΩΡΟΜΕΤΡΗΣΗ
+    sweep with the template's stored layout when it still matches the sheet
+    (see index_payroll).
+    metrics_feed (utils.metrics_feed.MetricsFeed) receives one row per
+    computed entry (ΡΕΠΟ entries of the month included) as the writes are
+    replayed, with the values written to the sheet; the caller closes it.
+    The metrics are collected in result_cube (utils.result_cube.ResultCube,
+    created if not given; pass one to read the monthly totals afterwards)
+    and reach write_plan from there, one contiguous row slab at a time.
+    """
     from datetime import datetime
-    from calendar import monthrange
 
+    dbg = log_enabled(gui, "debug")
     updated_count = 0
     skipped_count = 0
     repo_entries = 0
     processed_entries = 0
-    all_row_lists = []
 
     if spreadsheet is None or getattr(spreadsheet, "ws", None) is None:
         gui.show_message("⛔ generate_monthly_report: Δεν υπάρχει διαθέσιμο φύλλο ΩΡΟΜΕΤΡΗΣΗ (spreadsheet.ws)", level="error")
@@ -475,88 +727,122 @@ def generate_monthly_report(
 
     ws_orometrisi = spreadsheet.ws
 
-    if overtime_ws is None:
+    if overtime_ws is None and not times_from_entries:
         try:
             wb = getattr(spreadsheet, "wb", None)
             if wb and "ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ" in wb.sheetnames:
                 overtime_ws = wb["ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ"]
-                gui.show_message("📄 Χρήση φύλλου 'ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ' ως πηγή ωρών", level="debug")
+                if dbg:
+                    gui.show_message("📄 Χρήση φύλλου 'ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ' ως πηγή ωρών", level="debug")
             else:
                 gui.show_message("⛔ Δεν βρέθηκε φύλλο 'ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ'", level="error")
         except Exception as ex:
             gui.show_message(f"⛔ Αποτυχία πρόσβασης σε workbook: {ex}", level="error")
 
-    sample_year = schedule_rows[0]["date"].year if schedule_rows else datetime.now().year
-    max_day = monthrange(sample_year, month)[1]
-    gui.show_message(f"📅 Ο μήνας {month} του {sample_year} έχει {max_day} ημέρες", level="debug")
-
-    day_to_excel_col = {}
-    for d in range(1, max_day + 1):
-        try:
-            col = get_column_from_day(d)
-            day_to_excel_col[d] = col
-        except Exception:
-            day_to_excel_col[d] = None
-
-    gui.show_message("🏷️ Εκκίνηση tagging ΡΕΠΟ από ΦΟΡΜΑ", level="debug")
-    schedule_rows = tag_schedule_rows_with_repo_from_form(
-        schedule_rows=schedule_rows,
-        gui=gui,
-        forma_wb=forma_wb,
-        forma_ws=forma_ws,
-        start_row=10,
-        end_row=150,
-        header_row=9,
-        date_row=8,
-        spreadsheet=spreadsheet,
-        month=month,
-        get_column_from_day=get_column_from_day,
-        strict_afm=True,
-        write_guard=True
-    )
-    gui.show_message("🏁 Ολοκλήρωση tagging ΡΕΠΟ από ΦΟΡΜΑ", level="debug")
+    ensure_schedule_entries(schedule_rows)
+    sample_year = schedule_rows[0].date.year if schedule_rows else datetime.now().year
+    layout = month_layout(sample_year, month)
+    max_day = layout.days
+    if dbg:
+        gui.show_message(f"📅 Ο μήνας {month} του {sample_year} έχει {max_day} ημέρες", level="debug")
+
+    # Day of month -> ΩΡΟΜΕΤΡΗΣΗ column index, resolved once for the month
+    day_cols = (None,) + tuple(_day_column(layout, d, get_column_from_day, gui) for d in range(1, max_day + 1))
+    cube = result_cube if result_cube is not None else ResultCube()
+    cube.start(layout, day_cols)
+
+    reporter = as_reporter(progress)
+
+    # One sweep per worksheet instead of a full-sheet scan per new AFM
+    payroll_rows = ws_orometrisi.max_row
+    reporter.start("index", payroll_rows)
+    payroll_index, payroll_labels, stored = index_payroll(
+        ws_orometrisi, layout_store, on_row=lambda idx, _: reporter.update(idx, payroll_rows))
+    reporter.update(payroll_rows, payroll_rows)
+    if stored and dbg:
+        gui.show_message(f"🗂️ Διάταξη ΩΡΟΜΕΤΡΗΣΗ από αποθηκευμένο ευρετήριο ({len(payroll_index)} ΑΦΜ)", level="debug")
+    overtime_index = EmployeeIndex(overtime_ws) if overtime_ws and not times_from_entries else None
+
+    if write_plan is None:
+        write_plan = WritePlan()
+
+    if dbg:
+        gui.show_message("🏷️ Εκκίνηση tagging ΡΕΠΟ από ΦΟΡΜΑ", level="debug")
+    for form_ws in (forma_sheets or [forma_ws]):
+        schedule_rows = tag_schedule_rows_with_repo_from_form(
+            schedule_rows=schedule_rows,
+            gui=gui,
+            forma_wb=forma_wb,
+            forma_ws=form_ws,
+            start_row=10,
+            end_row=150,
+            header_row=9,
+            date_row=8,
+            spreadsheet=spreadsheet,
+            month=month,
+            get_column_from_day=get_column_from_day,
+            strict_afm=True,
+            write_guard=True,
+            employee_index=payroll_index,
+            write_plan=write_plan,
+            progress=reporter,
+            label_index=payroll_labels,
+            layout=layout
+        )
+    if dbg:
+        gui.show_message("🏁 Ολοκλήρωση tagging ΡΕΠΟ από ΦΟΡΜΑ", level="debug")
 
-    repo_entries = sum(1 for e in schedule_rows if e.get("is_repo"))
+    repo_entries = sum(1 for e in schedule_rows if e.is_repo)
     total_entries = len(schedule_rows)
-    gui.show_message(f"🧮 Σύνοψη schedule_rows ➤ σύνολο={total_entries}, με ΡΕΠΟ={repo_entries}", level="debug")
+    if dbg:
+        gui.show_message(f"🧮 Σύνοψη schedule_rows ➤ σύνολο={total_entries}, με ΡΕΠΟ={repo_entries}", level="debug")
 
     # Cache is sheet-aware now: keys are (id(ws), afm)
     afm_cache = {}
 
+    # Phase 1 collects; cell writes are replayed in order after the batch compute
+    pending_writes = []
+    calc_jobs = []
+
+    reporter.start("entries", total_entries)
     for idx, entry in enumerate(schedule_rows, start=1):
+        reporter.update(idx, total_entries)
         processed_entries += 1
-        date_obj = entry["date"]
-        afm = entry["employee"]
-        hours = entry.get("hours")
-        work_type = (entry.get("work_type") or "").strip().upper()
+        date_obj = entry.date
+        afm = entry.employee
+        hours = entry.hours
+        work_type = (entry.work_type or "").strip().upper()
 
-        gui.show_message(
-            f"📄 [{idx}/{total_entries}] Επεξεργασία ➤ ΑΦΜ: {afm}, ημερομηνία: {date_obj}, ώρες: {hours}, τύπος: {work_type}, repo={entry.get('is_repo', False)}",
-            level="debug"
-        )
+        if dbg:
+            gui.show_message(
+                f"📄 [{idx}/{total_entries}] Επεξεργασία ➤ ΑΦΜ: {afm}, ημερομηνία: {date_obj}, ώρες: {hours}, τύπος: {work_type}, repo={entry.is_repo}",
+                level="debug"
+            )
 
         if date_obj.month != month:
-            gui.show_message(f"⏩ Παράκαμψη μήνα ➤ {date_obj.month} ≠ {month}", level="debug")
+            if dbg:
+                gui.show_message(f"⏩ Παράκαμψη μήνα ➤ {date_obj.month} ≠ {month}", level="debug")
             continue
         if date_obj.day > max_day:
             gui.show_message(f"⚠️ Ημέρα {date_obj.day} υπερβαίνει τις {max_day}", level="warning")
             skipped_count += 1
             continue
 
-        if entry.get("is_repo", False):
+        if entry.is_repo:
+            if metrics_feed is not None and find_employee_row_in_sheet(
+                    ws_orometrisi, afm, cache=afm_cache, index=payroll_index):
+                pending_writes.append(("repo", afm, date_obj))
             if date_obj.weekday() != 6:
-                gui.show_message(f"ℹ️ (ΡΕΠΟ) Ημέρα {date_obj} δεν είναι Κυριακή → Καμία ενέργεια", level="debug")
+                if dbg:
+                    gui.show_message(f"ℹ️ (ΡΕΠΟ) Ημέρα {date_obj} δεν είναι Κυριακή → Καμία ενέργεια", level="debug")
                 continue
 
-            row_list = find_employee_row_in_sheet(ws_orometrisi, afm, gui=gui, diagnostics=True, cache=afm_cache)
+            row_list = find_employee_row_in_sheet(ws_orometrisi, afm, gui=gui, diagnostics=True, cache=afm_cache, index=payroll_index)
             if not row_list:
                 gui.show_message(f"⚠️ (ΡΕΠΟ) Δεν βρέθηκε εργαζόμενος στο φύλλο ➤ {afm}", level="warning")
                 skipped_count += 1
                 continue
 
-            excel_col = day_to_excel_col.get(date_obj.day) or get_column_from_day(date_obj.day)
-            metric_rows = get_metric_rows(ws_orometrisi, row_list[0])
-
             updated_count += 1
             continue
 
@@ -567,103 +853,135 @@ def generate_monthly_report(
         else:
             base_hours = 0
 
-        row_list = find_employee_row_in_sheet(ws_orometrisi, afm, gui=gui, diagnostics=True, cache=afm_cache)
+        row_list = find_employee_row_in_sheet(ws_orometrisi, afm, gui=gui, diagnostics=True, cache=afm_cache, index=payroll_index)
         if not row_list:
             gui.show_message(f"⚠️ Δεν βρέθηκε εργαζόμενος στο φύλλο ➤ {afm}", level="warning")
             skipped_count += 1
             continue
 
-        all_row_lists.append(row_list)
-        excel_col = day_to_excel_col.get(date_obj.day) or get_column_from_day(date_obj.day)
+        metric_rows = get_metric_rows(ws_orometrisi, row_list[0], payroll_labels)
+        emp = cube.employee(row_list[0], afm, metric_rows)
+        cube.day_type(emp, date_obj.day, work_type)
 
-        if overtime_ws:
-            overtime_anchor_list = find_employee_row_in_sheet(overtime_ws, afm, gui=gui, diagnostics=True, cache=afm_cache)
-            overtime_anchor = overtime_anchor_list[0] if overtime_anchor_list else 0
+        if times_from_entries:
+            raw_end_plus_30 = entry.end_plus_30
+            raw_departure = entry.departure
         else:
-            overtime_anchor = 0
+            if overtime_ws:
+                overtime_anchor_list = find_employee_row_in_sheet(overtime_ws, afm, gui=gui, diagnostics=True, cache=afm_cache, index=overtime_index)
+                overtime_anchor = overtime_anchor_list[0] if overtime_anchor_list else 0
+            else:
+                overtime_anchor = 0
 
-        if not overtime_anchor:
-            gui.show_message(f"⚠️ Δεν βρέθηκε anchor στο φύλλο ωρών για {afm}", level="warning")
-            continue
+            if not overtime_anchor:
+                gui.show_message(f"⚠️ Δεν βρέθηκε anchor στο φύλλο ωρών για {afm}", level="warning")
+                continue
 
-        times = read_work_times_from_sheet(overtime_ws, overtime_anchor, date_obj, gui=gui)
-        raw_end_plus_30 = times.get("ΩΡΑ ΛΗΞΗΣ+30")
-        raw_departure = times.get("ΩΡΑ ΑΠΟΧΩΡΗΣΗ")
+            times = read_work_times_from_sheet(overtime_ws, overtime_anchor, date_obj, gui=gui)
+            raw_end_plus_30 = times.get("ΩΡΑ ΛΗΞΗΣ+30")
+            raw_departure = times.get("ΩΡΑ ΑΠΟΧΩΡΗΣΗ")
 
         end_plus_30 = clean_time_string(raw_end_plus_30)
         departure_time = clean_time_string(raw_departure)
 
         if not is_valid_time_string(departure_time):
             if date_obj.weekday() == 6:
-                gui.show_message(
-                    f"📅 Κυριακή χωρίς αποχώρηση ➤ '{raw_departure}' → Καταγραφή ως ΑΡΓΙΑ (base_hours)",
-                    level="debug"
-                )
-                metric_rows = get_metric_rows(ws_orometrisi, row_list[0])
-
+                if dbg:
+                    gui.show_message(
+                        f"📅 Κυριακή χωρίς αποχώρηση ➤ '{raw_departure}' → Καταγραφή ως ΑΡΓΙΑ (base_hours)",
+                        level="debug"
+                    )
+                if metrics_feed is not None:
+                    pending_writes.append(("feed", afm, date_obj, {"ΑΡΓΙΑ": round(base_hours, 2)}))
                 if "ΑΡΓΙΑ" in metric_rows:
-                    cell_name = f"{excel_col}{metric_rows['ΑΡΓΙΑ']}"
-                    update_excel_cell(ws_orometrisi, cell_name, round(base_hours, 2))
-                    gui.show_message(f"🧾 ΑΡΓΙΑ ➤ {cell_name} ➤ {round(base_hours, 2)}", level="debug")
+                    pending_writes.append(("cell", emp, "ΑΡΓΙΑ", metric_rows["ΑΡΓΙΑ"], round(base_hours, 2), afm, date_obj))
 
                 if "ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ" in metric_rows:
-                    cell_name = f"{excel_col}{metric_rows['ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ']}"
-                    update_excel_cell(ws_orometrisi, cell_name, 1)
-                    gui.show_message(f"📅 ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ ➤ {cell_name} ➤ 1", level="debug")
+                    pending_writes.append(("cell", emp, "ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ", metric_rows["ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ"], 1, afm, date_obj))
 
                 updated_count += 1
                 continue
             else:
-                gui.show_message(f"⏭️ Δεν υπάρχει αποχώρηση ➤ '{raw_departure}' → Δεν υπολογίζεται υπερωρία", level="debug")
+                if dbg:
+                    gui.show_message(f"⏭️ Δεν υπάρχει αποχώρηση ➤ '{raw_departure}' → Δεν υπολογίζεται υπερωρία", level="debug")
                 continue
 
         if not is_valid_time_string(end_plus_30):
             gui.show_message(f"⚠️ Μη έγκυρη ώρα λήξης+30 ➤ '{raw_end_plus_30}' → Παράκαμψη", level="warning")
             continue
 
-        gui.show_message(f"⏱️ Υπολογισμός υπερωριών ➤ Λήξη+30': {end_plus_30}, Αποχώρηση: {departure_time}", level="debug")
-        results = calculate_overtime(end_plus_30, departure_time, date_obj)
-        gui.show_message(f"📊 Αποτελέσματα ➤ Υπερεργασία: {results['ΥΠΕΡΕΡΓΑΣΙΑ']}, Υπερωρία: {results['ΥΠΕΡΩΡΙΑ']}, Αργία: {results['ΑΡΓΙΑ']}", level="debug")
-
-        metric_rows = get_metric_rows(ws_orometrisi, row_list[0])
-
-        if "ΑΡΓΙΑ" in metric_rows:
-            if date_obj.weekday() == 6:
-                total_argia = round((6.67 if work_type == "6ΗΜΕΡΟΣ" else 8.0 if work_type == "5ΗΜΕΡΟΣ" else 0) + float(results.get("ΑΡΓΙΑ", 0)), 2)
-                if total_argia > 0:
-                    cell_name = f"{excel_col}{metric_rows['ΑΡΓΙΑ']}"
-                    update_excel_cell(ws_orometrisi, cell_name, total_argia)
-                    gui.show_message(f"🧾 ΑΡΓΙΑ ➤ {cell_name} ➤ {total_argia} (base + υπερεργασία + υπερωρία)", level="debug")
-            else:
-                if results["ΑΡΓΙΑ"] > 0:
-                    cell_name = f"{excel_col}{metric_rows['ΑΡΓΙΑ']}"
-                    update_excel_cell(ws_orometrisi, cell_name, results["ΑΡΓΙΑ"])
-                    gui.show_message(f"🧾 ΑΡΓΙΑ ➤ {cell_name} ➤ {results['ΑΡΓΙΑ']}", level="debug")
-
-        if results["ΥΠΕΡΕΡΓΑΣΙΑ"] > 0 and "ΥΠΕΡΕΡΓΑΣΙΑ" in metric_rows:
-            cell_name = f"{excel_col}{metric_rows['ΥΠΕΡΕΡΓΑΣΙΑ']}"
-            update_excel_cell(ws_orometrisi, cell_name, results["ΥΠΕΡΕΡΓΑΣΙΑ"])
-            gui.show_message(f"🧾 ΥΠΕΡΕΡΓΑΣΙΑ ➤ {cell_name} ➤ {results['ΥΠΕΡΕΡΓΑΣΙΑ']}", level="debug")
-
-        if results["ΥΠΕΡΩΡΙΑ"] > 0 and "ΥΠΕΡΩΡΙΑ" in metric_rows:
-            cell_name = f"{excel_col}{metric_rows['ΥΠΕΡΩΡΙΑ']}"
-            update_excel_cell(ws_orometrisi, cell_name, results["ΥΠΕΡΩΡΙΑ"])
-            gui.show_message(f"🧾 ΥΠΕΡΩΡΙΑ ➤ {cell_name} ➤ {results['ΥΠΕΡΩΡΙΑ']}", level="debug")
-
-        if date_obj.weekday() == 6 and "ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ" in metric_rows:
-            cell_name = f"{excel_col}{metric_rows['ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ']}"
-            update_excel_cell(ws_orometrisi, cell_name, 1)
-            gui.show_message(f"📅 ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ ➤ {cell_name} ➤ 1", level="debug")
+        if dbg:
+            gui.show_message(f"⏱️ Υπολογισμός υπερωριών ➤ Λήξη+30': {end_plus_30}, Αποχώρηση: {departure_time}", level="debug")
+        pending_writes.append(("calc", len(calc_jobs)))
+        calc_jobs.append((
+            hhmm_to_minutes(end_plus_30), hhmm_to_minutes(departure_time),
+            date_obj.weekday() == 6, work_type,
+            emp, metric_rows, end_plus_30, departure_time,
+            afm, date_obj
+        ))
+        updated_count += 1
 
-        night_hours = calculate_night_hours(end_plus_30, departure_time)
-        gui.show_message(f"🌒 Νυχτερινό ➤ {night_hours} ώρες (από {end_plus_30} έως {departure_time})", level="debug")
+    # Compute all overtime / night metrics (in one batch or per AFM partition), then write in schedule order
+    reporter.start("compute", len(calc_jobs))
+    metric_jobs = [job[:4] + (job[5],) for job in calc_jobs]
+    if workers and workers > 1 and len(calc_jobs) > 1:
+        results = compute_metric_writes_parallel(metric_jobs, [job[8] for job in calc_jobs], workers)
+    else:
+        results = compute_metric_writes(metric_jobs)
+    reporter.update(len(calc_jobs), len(calc_jobs))
+
+    def plan_write(emp, metric, row, value, date_obj):
+        cube.set(emp, metric, date_obj.day, value)
+        if dbg:
+            gui.show_message(f"🧾 {metric} ➤ {get_column_letter(day_cols[date_obj.day])}{row} ➤ {value}", level="debug")
+
+    reporter.start("writes", len(pending_writes))
+    for n, item in enumerate(pending_writes, start=1):
+        reporter.update(n, len(pending_writes))
+        if item[0] == "cell":
+            _, emp, metric, row, value, afm, date_obj = item
+            plan_write(emp, metric, row, value, date_obj)
+            continue
+        if item[0] == "feed":
+            _, afm, date_obj, values = item
+            metrics_feed.write(afm, date_obj, values)
+            continue
+        if item[0] == "repo":
+            _, afm, date_obj = item
+            metrics_feed.write(afm, date_obj, {}, is_repo=True)
+            continue
 
-        if night_hours > 0 and "ΝΥΧΤΑ" in metric_rows:
-            cell_name = f"{excel_col}{metric_rows['ΝΥΧΤΑ']}"
-            update_excel_cell(ws_orometrisi, cell_name, night_hours)
-            gui.show_message(f"🧾 ΝΥΧΤΑ ➤ {cell_name} ➤ {night_hours}", level="debug")
+        i = item[1]
+        emp, _, end_plus_30, departure_time, afm, date_obj = calc_jobs[i][4:]
+        (yperergasia, yperoria, argia, night_hours), writes = results[i]
+        if dbg:
+            gui.show_message(f"📊 Αποτελέσματα ➤ Υπερεργασία: {yperergasia}, Υπερωρία: {yperoria}, Αργία: {argia}", level="debug")
+            gui.show_message(f"🌒 Νυχτερινό ➤ {night_hours} ώρες (από {end_plus_30} έως {departure_time})", level="debug")
+        for metric, row, value in writes:
+            plan_write(emp, metric, row, value, date_obj)
+        if metrics_feed is not None:
+            metrics_feed.write(afm, date_obj, {metric: value for metric, _, value in writes})
+
+    slab_cells = cube.to_plan(write_plan)
+    checks = cube.check_allowed()
+    over_allowed = int(checks["over_allowed"].sum())
+    if over_allowed:
+        gui.show_message(f"⚠️ Επιπλέον ώρες πάνω από τις επιτρεπόμενες του τύπου ➤ {over_allowed} ημέρες", level="warning")
+    if dbg:
+        gui.show_message(
+            f"🧊 Πίνακας αποτελεσμάτων ➤ {len(cube)} εργαζόμενοι, {slab_cells} κελιά, "
+            f"Κυριακές={int(cube.sunday_counts().sum())}, άγνωστος τύπος={int(checks['unknown_type'].sum())}",
+            level="debug"
+        )
 
-        updated_count += 1
+    if dry_run:
+        gui.show_message(f"🧪 Dry run ➤ {len(write_plan)} κελιά προς εγγραφή, το φύλλο δεν αλλάζει", level="info")
+    elif apply_writes:
+        reporter.start("apply", len(write_plan))
+        written = write_plan.apply(ws_orometrisi)
+        if dbg:
+            gui.show_message(f"💾 Εφαρμογή write plan ➤ {written} κελιά ({write_plan.overridden} επικαλύψεις)", level="debug")
+    reporter.finish()
 
     gui.show_message(
         f"✅ Ολοκλήρωση ➤ Ενημερώθηκαν {updated_count} εγγραφές, παρακάμφθηκαν {skipped_count} | "
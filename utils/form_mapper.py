@@ -1,7 +1,9 @@
-from openpyxl.utils import get_column_letter, column_index_from_string
-from utils.overtime_utils import DAY_TO_COLS_INT, day_names, ot_columns
 import datetime as _dt
-from typing import Tuple, Dict, Set, Any
+from typing import Tuple, Dict, Set, Any, NamedTuple
+
+FORM_DATE_ROW = 8
+FORM_FIRST_DAY_COL = 3  # C
+FORM_LAST_DAY_COL = 9   # I
 
 
 def _parse_cell_date(cell_val: Any) -> _dt.date | None:
@@ -33,66 +35,53 @@ def _parse_cell_date(cell_val: Any) -> _dt.date | None:
     return None
 
 
-def build_day_map(ws_form) -> Tuple[Dict[int, Dict[str, str]], Set[int]]:
+class FormDay(NamedTuple):
+    form_col: int      # column of the day in the form (3..9 = C..I)
+    date: _dt.date
+    ot_end_col: int    # ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ column of ΩΡΑ ΛΗΞΗΣ+30
+    ot_leave_col: int  # ... and of ΩΡΑ ΑΠΟΧΩΡΗΣΗ
+
+
+def build_day_map(ws_form=None, month=None, *, header=None, on_unparsed=None,
+                  on_other_month=None) -> Tuple[Dict[int, FormDay], Set[int]]:
     """
-    Build a mapping for the 7-day block in the form (columns C..I) that maps:
-      day_of_month -> {
-        "form_col": <A1 column for that day in the form sheet>,
-        "ot_end_col": <column letter in overtime sheet for end+30>,
-        "ot_leave_col": <column letter in overtime sheet for departure>
-      }
-    Also returns a set of days that correspond to Sundays in that block.
+    Map the 7-day block of a weekly form (columns C..I, dates in row 8):
+      day_of_month -> FormDay(form_col, date, ot_end_col, ot_leave_col)
+    with the overtime columns as indices (weekday -> OT_COLUMNS). Also
+    returns the set of those days that are Sundays.
 
-    Notes / improvements over the prior implementation:
-    - Parses both datetime and common string formats robustly.
-    - Uses weekday -> DAY_TO_COLS_INT mapping (from utils.overtime_utils) instead
-      of relying solely on enumeration order, which is safer if column ranges change.
-    - Skips cells that cannot be parsed to a date (rather than raising).
-    - Stops mixing month boundaries: it establishes the initial_month from the
-      first valid date and ignores subsequent cells that belong to a different month.
+    - header: the date row's values (A..I) when the caller already has them
+      (read-only sheets, SheetValues snapshots); otherwise row 8 of ws_form.
+    - month: keep only the dates of that month (a week can straddle two);
+      None keeps every date; on_other_month(form_col, date) sees the dropped ones.
+    - Cells that are not dates are skipped; on_unparsed(form_col, raw) sees
+      the non-empty ones.
     """
-    day_map: Dict[int, Dict[str, str]] = {}
-    sunday_days: Set[int] = set()
-    initial_month = None
+    from utils.month_layout import OT_COLUMNS  # month_layout imports this module
 
-    start_col = column_index_from_string("C")
-    end_col = column_index_from_string("I")
+    if header is None:
+        header = next(ws_form.iter_rows(min_row=FORM_DATE_ROW, max_row=FORM_DATE_ROW,
+                                        max_col=FORM_LAST_DAY_COL, values_only=True), ())
+    header = tuple(header) + (None,) * (FORM_LAST_DAY_COL - len(header))
 
-    for col_idx in range(start_col, end_col + 1):
-        cell_val = ws_form.cell(row=8, column=col_idx).value
+    day_map: Dict[int, FormDay] = {}
+    sunday_days: Set[int] = set()
+    for col_idx in range(FORM_FIRST_DAY_COL, FORM_LAST_DAY_COL + 1):
+        cell_val = header[col_idx - 1]
         dt_date = _parse_cell_date(cell_val)
         if not dt_date:
+            if on_unparsed is not None and cell_val not in (None, ""):
+                on_unparsed(col_idx, cell_val)
             continue
-
-        # Ensure we stay in the same month as the first found date in the block
-        if initial_month is None:
-            initial_month = dt_date.month
-        elif dt_date.month != initial_month:
-            # skip days that belong to a different month
+        if month and dt_date.month != int(month):
+            if on_other_month is not None:
+                on_other_month(col_idx, dt_date)
             continue
 
-        day = dt_date.day
         weekday = dt_date.weekday()  # 0=Monday .. 6=Sunday
-
-        # get overtime columns either via numeric mapping or fall back to name mapping
-        ot_pair = DAY_TO_COLS_INT.get(weekday)
-        if not ot_pair:
-            # fallback: use day_names list to map to ot_columns (keeps backward compatibility)
-            try:
-                ot_pair = ot_columns[day_names[weekday]]
-            except Exception:
-                # if neither mapping exists, skip this day
-                continue
-
-        ot_end_col, ot_leave_col = ot_pair
-
-        day_map[day] = {
-            "form_col": get_column_letter(col_idx),
-            "ot_end_col": ot_end_col,
-            "ot_leave_col": ot_leave_col
-        }
-
+        ot_end_col, ot_leave_col = OT_COLUMNS[weekday]
+        day_map[dt_date.day] = FormDay(col_idx, dt_date, ot_end_col, ot_leave_col)
         if weekday == 6:  # Sunday
-            sunday_days.add(day)
+            sunday_days.add(dt_date.day)
 
-    return day_map, sunday_days
\ No newline at end of file
+    return day_map, sunday_days
@@ -0,0 +1,173 @@
+"""
+utils/layout_index.py - persisted layout of the ΩΡΟΜΕΤΡΗΣΗ template.
+
+The payroll layout hardly changes from month to month: one 6-row block per
+employee with the ΑΦΜ in column E, the metric labels in G and day 1 in H.
+Every run used to rediscover it with a sweep of the whole sheet. A
+LayoutStore keeps what the sweep found (ΑΦΜ key -> rows for EmployeeIndex,
+row -> labels for BlockLabelIndex) in a small JSON file per template, so
+the next run only has to check it.
+
+Files are keyed by a fingerprint of the sheet (title, size, header row) and
+carry a checksum of the ΑΦΜ column E; an entry whose checksum no longer
+matches the sheet is rebuilt. The ΑΦΜ index is built from column E and the
+label index from column G, with or without a LayoutStore, so the checksum
+covers every ΑΦΜ key, and load() also compares the G cells around the
+stored ΑΦΜ rows (the only rows a label lookup reads): a stored layout gives
+the same rows as a fresh sweep.
+
+Functions:
+- default_layout_dir() -> str ($TRENK_HOURS_LAYOUT, else ~/.cache/trenk-hours-app/layout)
+- layout_key(ws) -> (fingerprint, checksum)
+- block_rows(employee_rows) -> the rows of every block around a stored ΑΦΜ row
+- labels_checksum(ws, rows) -> checksum of the label cells of those rows
+
+Classes:
+- LayoutStore(layout_dir, max_files)
+"""
+import hashlib
+import json
+import os
+from itertools import compress
+
+from utils.metrics import BLOCK_SIZE
+from utils.weekly_cache import _atomic_write
+
+LAYOUT_VERSION = 2
+AFM_COLUMN = 5  # E
+LABEL_COLUMN = 7  # G (ετικέτα metric)
+DEFAULT_MAX_FILES = 16
+
+
+def default_layout_dir() -> str:
+    env = os.environ.get("TRENK_HOURS_LAYOUT")
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "trenk-hours-app", "layout")
+
+
+def _cell_values(ws, coords):
+    """Values at the given (row, column) coords (an iterable: a generator keeps the tuples short-lived)."""
+    cells = getattr(ws, "_cells", None)
+    if cells is None:  # read-only sheet
+        cell = ws.cell
+        return [cell(row=r, column=c).value for r, c in coords]
+    # Straight from the cell map: no Cell is created for an empty one (ws.cell would)
+    return [c.value if c is not None else None for c in map(cells.get, coords)]
+
+
+def _checksum(values):
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def layout_key(ws):
+    """
+    (fingerprint, checksum) of a worksheet: the fingerprint (title, size,
+    header row) names the file, the checksum of the ΑΦΜ column tells whether
+    the stored ΑΦΜ rows still hold.
+    """
+    # max_row / max_column scan the whole cell map on every access
+    max_row, max_col = ws.max_row, ws.max_column
+    header = _cell_values(ws, ((1, c) for c in range(1, max_col + 1)))
+    fingerprint = _checksum((ws.title, max_row, max_col, header))
+    return fingerprint, _checksum(_cell_values(ws, ((r, AFM_COLUMN) for r in range(1, max_row + 1))))
+
+
+def block_rows(employee_rows):
+    """
+    Sorted rows of every block a label lookup can read for a stored ΑΦΜ row:
+    the block starting there (get_metric_rows) and the one anchored up to
+    BLOCK_SIZE - 1 rows above it (compute_anchor).
+    """
+    top = max((max(rows) for rows in employee_rows.values() if rows), default=0)
+    # Row r is covered[r + BLOCK_SIZE - 1]: the padding keeps every span's slice in range
+    span = b"\x01" * (2 * BLOCK_SIZE - 1)
+    covered = bytearray(top + 2 * BLOCK_SIZE)
+    for key_rows in employee_rows.values():
+        for row in key_rows:
+            covered[row:row + len(span)] = span
+    last = top + BLOCK_SIZE - 1
+    return list(compress(range(1, last + 1), covered[BLOCK_SIZE:last + BLOCK_SIZE]))
+
+
+def labels_checksum(ws, rows):
+    """Checksum of the label column G over the given rows."""
+    return _checksum(_cell_values(ws, ((r, LABEL_COLUMN) for r in rows)))
+
+
+class LayoutStore:
+    """
+    load() / save() a layout by layout_key(ws). Unreadable, foreign or
+    outdated files count as misses; last_status is "hit", "miss" or
+    "stale" (same template, changed ΑΦΜ column or block labels). At most
+    max_files layouts are kept (least recently used removed).
+    """
+
+    def __init__(self, layout_dir=None, max_files=DEFAULT_MAX_FILES):
+        self.layout_dir = layout_dir or default_layout_dir()
+        self.max_files = max_files
+        self.last_status = None
+        os.makedirs(self.layout_dir, exist_ok=True)
+
+    def _path(self, fingerprint):
+        return os.path.join(self.layout_dir, f"{fingerprint}.v{LAYOUT_VERSION}.json")
+
+    def load(self, key, ws):
+        """{"employee_rows", "label_rows"} or None; ws is the sheet the key came from."""
+        fingerprint, checksum = key
+        path = self._path(fingerprint)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            self.last_status = "miss"
+            return None
+        if payload.get("version") != LAYOUT_VERSION or payload.get("checksum") != checksum:
+            self.last_status = "stale"
+            return None
+        employee_rows = payload["employee_rows"]
+        if payload.get("labels_checksum") != labels_checksum(ws, block_rows(employee_rows)):
+            self.last_status = "stale"
+            return None
+        try:
+            os.utime(path)  # keeps templates in use out of pruning
+        except OSError:
+            pass
+        self.last_status = "hit"
+        label_rows = {}
+        for label, rows in payload["label_rows"].items():
+            for row in rows:
+                label_rows.setdefault(row, []).append(label)
+        return {"employee_rows": employee_rows, "label_rows": label_rows}
+
+    def save(self, key, ws, employee_rows, label_rows):
+        fingerprint, checksum = key
+        by_label = {}
+        for row in sorted(label_rows):
+            for label in sorted(label_rows[row]):
+                by_label.setdefault(label, []).append(row)
+        payload = {
+            "version": LAYOUT_VERSION,
+            "checksum": checksum,
+            "labels_checksum": labels_checksum(ws, block_rows(employee_rows)),
+            "employee_rows": employee_rows,
+            # label -> rows: a few long int lists load much faster than a key per row
+            "label_rows": by_label,
+        }
+        try:
+            _atomic_write(self._path(fingerprint), json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        except OSError:
+            return  # a read-only layout dir only costs the next run a sweep
+        self._prune()
+
+    def _prune(self):
+        files = [os.path.join(self.layout_dir, n) for n in os.listdir(self.layout_dir) if n.endswith(".json")]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,69 @@
+"""
+utils/logging_utils.py - level-filtered message log for the `gui` objects.
+
+report_logic talks to a `gui` object through gui.show_message(msg, level=...).
+MessageLog is such an object with a minimum level, so callers can check
+log_enabled(gui, "debug") once and skip building debug f-strings entirely,
+plus a bounded ring buffer of recent debug messages for post-mortem use.
+
+Functions:
+- log_enabled(gui, level) -> bool (legacy gui objects without .enabled keep everything)
+- level_no(level) -> int
+
+Classes:
+- MessageLog(sink, min_level, ring_size, ring_level)
+"""
+from collections import Counter, deque
+from typing import Callable, List, Optional
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+def level_no(level) -> int:
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(str(level).strip().lower(), LEVELS["info"])
+
+
+def log_enabled(gui, level="debug") -> bool:
+    """True if gui would keep a message of this level; check before formatting."""
+    if gui is None:
+        return False
+    enabled = getattr(gui, "enabled", None)
+    return enabled(level) if callable(enabled) else True
+
+
+class MessageLog:
+    """
+    show_message(msg, level) forwards messages at or above min_level to
+    sink(msg, level) and keeps the last ring_size messages at or above
+    ring_level in a ring buffer (ring_size=0 disables it).
+    A level is "enabled" if either of the two would keep it.
+    """
+
+    def __init__(self, sink: Optional[Callable[[str, str], None]] = None,
+                 min_level="info", ring_size: int = 1000, ring_level="debug"):
+        self.sink = sink
+        self.min_level = level_no(min_level)
+        self.ring_level = level_no(ring_level)
+        self.ring = deque(maxlen=ring_size) if ring_size else None
+        self.counts = Counter()
+
+    def enabled(self, level="debug") -> bool:
+        n = level_no(level)
+        return n >= self.min_level or (self.ring is not None and n >= self.ring_level)
+
+    def show_message(self, msg, level="info"):
+        n = level_no(level)
+        self.counts[level] += 1
+        if self.ring is not None and n >= self.ring_level:
+            self.ring.append(f"[{level}] {msg}")
+        if n >= self.min_level and self.sink is not None:
+            self.sink(msg, level)
+
+    def recent(self, limit: Optional[int] = None) -> List[str]:
+        """Most recent ring-buffer messages, oldest first."""
+        if self.ring is None:
+            return []
+        items = list(self.ring)
+        return items[-limit:] if limit else items
@@ -1,83 +1,188 @@
-import calendar
+import numpy as np
 
-def get_metric_rows(ws, base_row):
+from utils.logging_utils import log_enabled
+from utils.month_layout import DAY1_COL, DAY_COLUMN_LETTERS, MAX_DAYS, month_layout
+from utils.write_plan import WritePlan
+
+# The 6 rows of an employee's ΩΡΟΜΕΤΡΗΣΗ block, in sheet order
+METRIC_LABELS = ('ΕΠ.ΩΡΕΣ', 'ΝΥΧΤΑ', 'ΑΡΓΙΑ', 'ΥΠΕΡΕΡΓΑΣΙΑ', 'ΥΠΕΡΩΡΙΑ', 'ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ')
+BLOCK_SIZE = len(METRIC_LABELS)
+
+def normalize_label(s: str) -> str:
+    if not isinstance(s, str):
+        return ""
+    return str(s).strip().upper().replace(" ", "")
+
+class BlockLabelIndex:
+    """
+    Row -> metric labels of the ΩΡΟΜΕΤΡΗΣΗ sheet, collected in one sweep.
+
+    Replaces scanning every column of a 6-row block per lookup: find() gives
+    the first row of the block starting at `start` that holds the label in
+    any column (what find_label_row_in_block returned). Feed it rows with
+    add_row() during an existing sweep (EmployeeIndex(on_row=...)) or build it
+    with from_sheet().
+    """
+
+    _TARGETS = {normalize_label(label): label for label in METRIC_LABELS}
+
+    def __init__(self):
+        self._rows = {}
+
+    @classmethod
+    def from_sheet(cls, ws, min_row=1, column=None):
+        """Index of every column, or only of the given one (e.g. the label column G)."""
+        index = cls()
+        rows = ws.iter_rows(min_row=min_row, min_col=column, max_col=column, values_only=True)
+        for idx, row in enumerate(rows, start=min_row):
+            index.add_row(idx, row)
+        return index
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Index from a stored rows() mapping {row: labels} (see utils.layout_index)."""
+        index = cls()
+        index._rows = {row: set(labels) for row, labels in rows.items()}
+        return index
+
+    def rows(self):
+        return {row: set(labels) for row, labels in self._rows.items()}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add_row(self, idx, values):
+        targets = self._TARGETS
+        for val in values:
+            if type(val) is str:
+                label = targets.get(val.strip().upper().replace(" ", ""))
+                if label is not None:
+                    self._rows.setdefault(idx, set()).add(label)
+
+    def find(self, start, label):
+        label = self._TARGETS.get(normalize_label(label), label)
+        rows = self._rows
+        for r in range(start, start + BLOCK_SIZE):
+            found = rows.get(r)
+            if found and label in found:
+                return r
+        return None
+
+def get_metric_rows(ws, base_row, label_index=None):
     """
     Επιστρέφει τις γραμμές για τα 6 metrics με βάση τη σταθερή σειρά τους στο block.
-    Δεν ψάχνει τις ετικέτες — τις αντιστοιχεί απευθείας.
+    Δεν ψάχνει τις ετικέτες — τις αντιστοιχεί απευθείας. Με label_index
+    (BlockLabelIndex) κάθε metric παίρνει τη γραμμή της ετικέτας του μέσα
+    στο block, αν υπάρχει, αλλιώς τη σταθερή.
     """
-    return {
-        'ΕΠ.ΩΡΕΣ': base_row,
-        'ΝΥΧΤΑ': base_row + 1,
-        'ΑΡΓΙΑ': base_row + 2,
-        'ΥΠΕΡΕΡΓΑΣΙΑ': base_row + 3,
-        'ΥΠΕΡΩΡΙΑ': base_row + 4,
-        'ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ': base_row + 5
-    }
-
-def inspect_sunday_metrics(ws, row_lists, gui=None):
-    def generate_day_columns():
-        columns = []
-        start_index = ord("H") - ord("A")
-        for i in range(31):
-            index = start_index + i
-            col = ""
-            while index >= 0:
-                col = chr(index % 26 + 65) + col
-                index = index // 26 - 1
-            columns.append(col)
-        return columns
-
-    day_columns = generate_day_columns()
-
-    for row_list in row_lists:
+    if label_index is None:
+        return {
+            'ΕΠ.ΩΡΕΣ': base_row,
+            'ΝΥΧΤΑ': base_row + 1,
+            'ΑΡΓΙΑ': base_row + 2,
+            'ΥΠΕΡΕΡΓΑΣΙΑ': base_row + 3,
+            'ΥΠΕΡΩΡΙΑ': base_row + 4,
+            'ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ': base_row + 5
+        }
+    rows = {}
+    for offset, label in enumerate(METRIC_LABELS):
+        found = label_index.find(base_row, label)
+        rows[label] = found if found is not None else base_row + offset
+    return rows
+
+_EMPTY_DAY_VALUES = (None, 0, '', '0')  # 0.0 and False compare equal to 0
+
+def unique_blocks(row_lists):
+    """Row lists without repeats, first-seen order (all_row_lists holds one per entry)."""
+    return list({tuple(rows): rows for rows in row_lists}.values())
+
+def read_cells(ws, rows, cols, write_plan=None):
+    """
+    Dense values matrix for the given rows x columns, touching only those
+    cells (on a writable sheet every cell read is created, and a direct
+    ws.cell() is cheaper there than iter_rows' per-row generators).
+    Returns (matrix, row_pos): matrix[row_pos[r]][j] is the value at row r of
+    the j-th of the sorted columns. Planned writes of write_plan (WritePlan)
+    replace the sheet values.
+    """
+    rows = sorted(set(rows))
+    cols = sorted(set(cols))
+    row_pos = {r: i for i, r in enumerate(rows)}
+    cell = ws.cell
+    matrix = [[cell(row=r, column=c).value for c in cols] for r in rows]
+    if write_plan is not None and rows and cols:
+        col_pos = {c: j for j, c in enumerate(cols)}
+        for (r, c), v in write_plan.cells_in(rows[0], rows[-1], cols[0], cols[-1]):
+            if r in row_pos and c in col_pos:
+                matrix[row_pos[r]][col_pos[c]] = v
+    return matrix, row_pos
+
+def filled_mask(matrix, n_cols) -> np.ndarray:
+    """bool array (rows x n_cols): cell holds something other than None / 0 / '' / '0'."""
+    return np.array([[v not in _EMPTY_DAY_VALUES for v in row] for row in matrix], dtype=bool).reshape(-1, n_cols)
+
+def inspect_sunday_metrics(ws, row_lists, gui=None, label_index=None):
+    # Debug-only report: nothing to do when nobody keeps debug messages
+    if not log_enabled(gui, "debug"):
+        return
+
+    sunday_rows = []
+    for row_list in unique_blocks(row_lists):
         base_row = row_list[0]
         try:
-            metric_rows = get_metric_rows(ws, base_row)
-            sunday_row = metric_rows['ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ']
-            values = []
-            start_index = ord("H") - ord("A")
-            # iterate once and avoid many attribute lookups
-            for offset in range(31):
-                col_index = start_index + offset + 1
-                val = ws.cell(row=sunday_row, column=col_index).value
-                if val not in (None, 0, '', '0'):
-                    col_letter = day_columns[offset]
-                    values.append(f"{col_letter}: {val}")
-            if values:
-                message = f"📊 Γραμμή ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ ({sunday_row}):\n" + ", ".join(values)
-                if gui:
-                    gui.show_message(message, level="debug")
+            sunday_rows.append(get_metric_rows(ws, base_row, label_index)['ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ'])
         except Exception as e:
-            msg = f"⚠️ Σφάλμα για εργαζόμενο στη γραμμή {base_row}: {str(e)}"
-            if gui:
-                gui.show_message(msg, level="warning")
-            else:
-                print(msg)
+            gui.show_message(f"⚠️ Σφάλμα για εργαζόμενο στη γραμμή {base_row}: {str(e)}", level="warning")
 
-def update_sundays(ws, row_lists, year, month):
-    sundays = [day for day in range(1, calendar.monthrange(year, month)[1] + 1)
-               if calendar.weekday(year, month, day) == 6]
+    # The 31 day cells of every ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ row in one read
+    matrix, row_pos = read_cells(ws, sunday_rows, range(DAY1_COL, DAY1_COL + MAX_DAYS))
+    mask = filled_mask(matrix, MAX_DAYS)
+    for sunday_row in sunday_rows:
+        i = row_pos[sunday_row]
+        days = np.flatnonzero(mask[i])
+        if days.size:
+            message = f"📊 Γραμμή ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ ({sunday_row}):\n" + ", ".join(
+                f"{DAY_COLUMN_LETTERS[d]}: {matrix[i][d]}" for d in days)
+            gui.show_message(message, level="debug")
 
-    start_col_index = ord("H") - ord("A") + 1
-    day_to_column = {day: start_col_index + day - 1 for day in sundays}
+def update_sundays(ws, row_lists, year, month, write_plan=None, label_index=None):
+    """
+    ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ = 1 for every Sunday of the month on which any row of the
+    employee's block has a value, else 0.
 
-    for row_list in row_lists:
+    The blocks are de-duplicated, their Sunday cells are read in one pass into
+    a matrix and the worked flags computed with NumPy. The flags go into
+    write_plan (WritePlan) if given (planned values are also what is read),
+    otherwise they are written to ws in one sorted pass.
+    """
+    layout = month_layout(year, month)
+
+    blocks = []
+    for row_list in unique_blocks(row_lists):
         if len(row_list) < 6:
             print(f"⚠️ Σφάλμα: row_list δεν έχει 6 γραμμές ➤ {row_list}")
             continue
-
-        base_row = row_list[0]
         try:
-            metric_rows = get_metric_rows(ws, base_row)
-            sunday_row = metric_rows['ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ']
+            sunday_row = get_metric_rows(ws, row_list[0], label_index)['ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ']
+        except Exception as e:
+            print(f"⚠️ Σφάλμα για εργαζόμενο στη γραμμή {row_list[0]}: {str(e)}")
+            continue
+        blocks.append((row_list, sunday_row))
+    if not blocks or not layout.sundays:
+        return
 
-            # vectorized-like test: reuse column indices
-            for day, col_index in day_to_column.items():
-                worked = any(
-                    ws.cell(row=r, column=col_index).value not in (None, 0, 0.0, '', '0')
-                    for r in row_list
-                )
-                ws.cell(row=sunday_row, column=col_index).value = 1 if worked else 0
+    # (block rows x Sunday columns) in one read; then OR over each block's rows -> (blocks x Sundays)
+    columns = layout.sunday_columns
+    matrix, row_pos = read_cells(ws, (r for rows, _ in blocks for r in rows), columns, write_plan)
+    mask = filled_mask(matrix, len(columns))
+    flat = np.fromiter((row_pos[r] for rows, _ in blocks for r in rows), dtype=np.intp)
+    starts = np.cumsum([0] + [len(rows) for rows, _ in blocks[:-1]])
+    worked = np.logical_or.reduceat(mask[flat], starts, axis=0)
 
-        except Exception as e:
-            print(f"⚠️ Σφάλμα για εργαζόμενο στη γραμμή {base_row}: {str(e)}")
\ No newline at end of file
+    plan = write_plan if write_plan is not None else WritePlan()
+    dates = [layout.dates[day] for day in layout.sundays]
+    for (rows, sunday_row), flags in zip(blocks, worked.tolist()):
+        for col, flag, day_date in zip(columns, flags, dates):
+            plan.set(sunday_row, col, 1 if flag else 0, ("ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ", rows[0], day_date))
+    if write_plan is None:
+        plan.apply(ws)
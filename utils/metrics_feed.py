@@ -0,0 +1,177 @@
+"""
+utils/metrics_feed.py - computed daily metrics as a CSV / Parquet feed.
+
+Payroll_Calculated.xlsx is the report for people; the downstream payroll
+system only needs the numbers. A MetricsFeed receives one row per computed
+schedule entry (employee and day) while generate_monthly_report replays its
+results, and streams them to a file:
+
+    ΑΦΜ, ΗΜΕΡΟΜΗΝΙΑ, ΝΥΧΤΑ, ΑΡΓΙΑ, ΥΠΕΡΕΡΓΑΣΙΑ, ΥΠΕΡΩΡΙΑ, ΚΥΡΙΑΚΗ, ΡΕΠΟ
+
+The metric values are the ones the report writes into ΩΡΟΜΕΤΡΗΣΗ (0 where
+it writes nothing); ΚΥΡΙΑΚΗ and ΡΕΠΟ are 0/1 flags. Rows come in schedule
+order, so an entry repeated in the weekly files appears once per occurrence.
+
+The feed is written to a temporary file next to the target and renamed by
+close(); abort() (or leaving the `with` block on an exception, e.g. a
+cancelled run) removes it, so a half-written feed never replaces a good one.
+CSV needs only the standard library; Parquet needs pyarrow and is written
+in row groups of batch_rows.
+
+Functions:
+- open_feed(path, fmt=None) -> CsvFeed | ParquetFeed (format from the extension)
+- feed_available(fmt) -> whether the format's dependency is installed
+
+Classes:
+- MetricsFeed (base), CsvFeed(path), ParquetFeed(path, batch_rows)
+
+Constants:
+- FEED_COLUMNS, FEED_METRICS, FEED_FORMATS
+"""
+import csv
+import importlib.util
+import os
+from datetime import datetime
+
+FEED_METRICS = ("ΝΥΧΤΑ", "ΑΡΓΙΑ", "ΥΠΕΡΕΡΓΑΣΙΑ", "ΥΠΕΡΩΡΙΑ")
+FEED_COLUMNS = ("ΑΦΜ", "ΗΜΕΡΟΜΗΝΙΑ") + FEED_METRICS + ("ΚΥΡΙΑΚΗ", "ΡΕΠΟ")
+FEED_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+DEFAULT_BATCH_ROWS = 10_000
+
+
+class MetricsFeed:
+    """
+    write(afm, day_date, metrics, is_repo) appends a row (metrics: label ->
+    value, missing labels count as 0); close() publishes the file, abort()
+    discards it. `rows` counts the rows written so far.
+    """
+
+    format = None
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, afm, day_date, metrics, is_repo=False):
+        if isinstance(day_date, datetime):
+            day_date = day_date.date()
+        self._write_row((afm, day_date) + tuple(metrics.get(m, 0) for m in FEED_METRICS)
+                        + (int(day_date.weekday() == 6), int(bool(is_repo))))
+        self.rows += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._finish()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._finish()
+        finally:
+            try:
+                os.remove(self._tmp)
+            except OSError:
+                pass
+
+    def info(self):
+        return {"path": self.path, "format": self.format, "rows": self.rows}
+
+    def _write_row(self, row):
+        raise NotImplementedError
+
+    def _finish(self):
+        raise NotImplementedError
+
+
+class CsvFeed(MetricsFeed):
+    """UTF-8 CSV with a header row; dates as YYYY-MM-DD."""
+
+    format = "csv"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(self._tmp, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(FEED_COLUMNS)
+
+    def _write_row(self, row):
+        self._writer.writerow((row[0], row[1].isoformat()) + row[2:])
+
+    def _finish(self):
+        self._file.close()
+
+
+class ParquetFeed(MetricsFeed):
+    """Parquet (pyarrow) with typed columns, one row group per batch_rows rows."""
+
+    format = "parquet"
+
+    def __init__(self, path, batch_rows=DEFAULT_BATCH_ROWS):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Η εξαγωγή Parquet χρειάζεται το pyarrow (pip install pyarrow)") from e
+        super().__init__(path)
+        self._pa = pa
+        self._schema = pa.schema(
+            [("ΑΦΜ", pa.string()), ("ΗΜΕΡΟΜΗΝΙΑ", pa.date32())]
+            + [(m, pa.float64()) for m in FEED_METRICS]
+            + [("ΚΥΡΙΑΚΗ", pa.int8()), ("ΡΕΠΟ", pa.int8())]
+        )
+        self._writer = pq.ParquetWriter(self._tmp, self._schema)
+        self.batch_rows = batch_rows
+        self._batch = []
+
+    def _write_row(self, row):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        columns = list(zip(*self._batch))
+        self._batch = []
+        self._writer.write_batch(self._pa.record_batch(
+            [self._pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+            schema=self._schema,
+        ))
+
+    def _finish(self):
+        try:
+            self._flush()
+        finally:
+            self._writer.close()
+
+
+def feed_available(fmt) -> bool:
+    """False for "parquet" when pyarrow is not installed (checked without importing it)."""
+    return fmt != "parquet" or importlib.util.find_spec("pyarrow") is not None
+
+
+def open_feed(path, fmt=None) -> MetricsFeed:
+    """Feed for path; fmt ("csv" / "parquet") defaults to the file extension."""
+    fmt = fmt or FEED_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt == "csv":
+        return CsvFeed(path)
+    if fmt == "parquet":
+        return ParquetFeed(path)
+    raise ValueError(f"Άγνωστη μορφή εξαγωγής metrics: {path} (υποστηρίζονται .csv, .parquet)")
@@ -0,0 +1,73 @@
+"""
+utils/month_layout.py - calendar and column layout of one month, built once.
+
+The report used to work the layout out piece by piece: a column letter per
+day from get_column_from_day, letters back to indices for every write,
+weekday -> overtime columns from one of several DAY_TO_COLS copies, the
+month's Sundays in update_sundays. MonthLayout holds all of it as plain
+integers for one (year, month); month_layout() caches one per month.
+
+ΩΡΟΜΕΤΡΗΣΗ: day d of the month is column DAY1_COL + d - 1 (H for day 1).
+ΥΠΕΡΕΡΓΑΣΙΕΣ-ΥΠΕΡΩΡΙΕΣ: each weekday has a (ΩΡΑ ΛΗΞΗΣ+30, ΩΡΑ ΑΠΟΧΩΡΗΣΗ)
+column pair, OT_COLUMNS (from utils.overtime_utils.DAY_TO_COLS_INT).
+
+Functions:
+- month_layout(year, month) -> MonthLayout (cached)
+
+Classes:
+- MonthLayout(year, month)
+
+Constants:
+- DAY1_COL, MAX_DAYS, DAY_COLUMN_LETTERS
+- OT_COLUMNS: weekday (0=Mon..6=Sun) -> (end+30 column, departure column), 1-based
+- OT_MAX_COL: last column any weekday uses
+"""
+import calendar
+from datetime import date
+from functools import lru_cache
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from utils.form_mapper import build_day_map
+from utils.overtime_utils import DAY_TO_COLS_INT
+
+DAY1_COL = 8  # H
+MAX_DAYS = 31
+DAY_COLUMN_LETTERS = tuple(get_column_letter(DAY1_COL + i) for i in range(MAX_DAYS))
+
+OT_COLUMNS = {weekday: (column_index_from_string(left), column_index_from_string(right))
+              for weekday, (left, right) in DAY_TO_COLS_INT.items()}
+OT_MAX_COL = max(col for pair in OT_COLUMNS.values() for col in pair)
+
+
+class MonthLayout:
+    """
+    Per-day tables of one month, indexed by day of month (index 0 unused):
+    dates, weekdays, day_columns (ΩΡΟΜΕΤΡΗΣΗ index) and day_letters;
+    sundays / sunday_columns list the month's Sundays.
+    """
+
+    def __init__(self, year, month):
+        self.year = year
+        self.month = month
+        self.days = calendar.monthrange(year, month)[1]
+        day_range = range(1, self.days + 1)
+        self.dates = (None,) + tuple(date(year, month, d) for d in day_range)
+        self.weekdays = (None,) + tuple(dt.weekday() for dt in self.dates[1:])
+        self.day_columns = (None,) + tuple(DAY1_COL + d - 1 for d in day_range)
+        self.day_letters = (None,) + DAY_COLUMN_LETTERS[:self.days]
+        self.sundays = tuple(d for d in day_range if self.weekdays[d] == 6)
+        self.sunday_columns = tuple(self.day_columns[d] for d in self.sundays)
+
+    def __repr__(self):
+        return f"MonthLayout({self.year}, {self.month})"
+
+    def form_day_map(self, ws_form=None, header=None, on_unparsed=None, on_other_month=None):
+        """build_day_map of a weekly form, limited to this month's dates."""
+        return build_day_map(ws_form, self.month, header=header, on_unparsed=on_unparsed,
+                             on_other_month=on_other_month)
+
+
+@lru_cache(maxsize=None)
+def month_layout(year, month) -> MonthLayout:
+    return MonthLayout(year, month)
@@ -0,0 +1,88 @@
+"""
+utils/overtime_engine.py - batch (NumPy) version of the overtime / night-hours rules.
+
+Functions:
+- hhmm_to_minutes(s) -> minutes since midnight, or -1 when not a strict "HH:MM"
+- compute_overtime_batch(start_min, end_min, is_sunday, work_types) -> dict of arrays
+
+Results are identical to report_logic.calculate_overtime / calculate_night_hours
+applied entry by entry (same midnight wrap, same rounding). Rounding is done on
+integer hundredths / thousandths: k/60 never lands exactly on a rounding tie, so
+the nearest integer of the exact quotient is what round() returns on the float.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from utils.overtime_utils import allowed_by_type
+from utils.time_tokens import strict_minutes
+
+MINUTES_PER_DAY = 24 * 60
+NIGHT_START_MIN = 22 * 60
+NIGHT_LENGTH_MIN = 8 * 60
+
+
+def hhmm_to_minutes(s) -> int:
+    """'HH:MM' -> minutes since midnight; -1 if strptime("%H:%M") would reject it."""
+    return strict_minutes(s)
+
+
+def compute_overtime_batch(
+    start_min: Sequence[int],
+    end_min: Sequence[int],
+    is_sunday: Sequence[bool],
+    work_types: Optional[Sequence[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the month's metrics for every employee-day in one call.
+
+    start_min / end_min: minutes since midnight of ΩΡΑ ΛΗΞΗΣ+30 / ΩΡΑ ΑΠΟΧΩΡΗΣΗ
+    (-1 where the value did not parse). is_sunday: weekday()==6 per entry.
+    work_types: ΤΥΠΟΣ per entry, used for the Sunday base hours (allowed_by_type).
+
+    Returns float64 arrays:
+    - ΥΠΕΡΕΡΓΑΣΙΑ, ΥΠΕΡΩΡΙΑ: as calculate_overtime
+    - ΑΡΓΙΑ: as calculate_overtime (Sunday overtime only)
+    - ΑΡΓΙΑ_ΣΥΝΟΛΟ: base hours + ΑΡΓΙΑ on Sundays, 0 otherwise (the value the report writes)
+    - ΝΥΧΤΑ: as calculate_night_hours
+    """
+    start = np.asarray(start_min, dtype=np.int64)
+    end = np.asarray(end_min, dtype=np.int64)
+    sunday = np.asarray(is_sunday, dtype=bool)
+    valid = (start >= 0) & (end >= 0)
+
+    # Midnight wrap: end <= start means the shift ends the next day (equal -> 24h)
+    end_abs = np.where(end <= start, end + MINUTES_PER_DAY, end)
+    diff = np.where(valid, end_abs - start, 0)
+
+    short = diff <= 60
+    # round(x / 60, 2) as integer hundredths
+    yperergasia_h = np.where(short, (diff * 100 + 30) // 60, 100)
+    yperoria_h = np.where(short, 0, ((diff - 60) * 100 + 30) // 60)
+    yperergasia_h = np.where(valid, yperergasia_h, 0)
+    yperoria_h = np.where(valid, yperoria_h, 0)
+    argia_h = np.where(sunday, yperergasia_h + yperoria_h, 0)
+
+    if work_types is None:
+        base_h = np.zeros(len(start), dtype=np.int64)
+    else:
+        base_h = np.array(
+            [int(round(allowed_by_type.get((wt or "").strip().upper(), 0) * 100)) for wt in work_types],
+            dtype=np.int64,
+        )
+    argia_total_h = np.where(sunday, base_h + argia_h, 0)
+
+    # Night window: 22:00 of the start day -> 06:00 of the next day
+    night_start = np.full(len(start), NIGHT_START_MIN, dtype=np.int64)
+    overlap = np.minimum(end_abs, night_start + NIGHT_LENGTH_MIN) - np.maximum(start, night_start)
+    overlap = np.where(valid & (overlap > 0), overlap, 0)
+    # round(x / 60, 3) as integer thousandths
+    night_th = (overlap * 1000 + 30) // 60
+
+    return {
+        "ΥΠΕΡΕΡΓΑΣΙΑ": yperergasia_h / 100.0,
+        "ΥΠΕΡΩΡΙΑ": yperoria_h / 100.0,
+        "ΑΡΓΙΑ": argia_h / 100.0,
+        "ΑΡΓΙΑ_ΣΥΝΟΛΟ": argia_total_h / 100.0,
+        "ΝΥΧΤΑ": night_th / 1000.0,
+    }
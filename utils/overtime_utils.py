@@ -14,6 +14,8 @@ Constants:
 from datetime import datetime, time, timedelta
 from typing import Optional, Tuple, Union
 
+from utils.time_tokens import RANGE, TIME, TimeToken, parse_token
+
 Number = Union[int, float]
 
 allowed_by_type = {
@@ -45,6 +47,13 @@ DAY_TO_COLS_INT = {
 }
 
 
+def _token_to_time(tok: TimeToken) -> Optional[time]:
+    if tok.kind != TIME:
+        return None
+    hh, rem = divmod(tok.start, 3600)
+    return time(hour=hh, minute=rem // 60, second=rem % 60)
+
+
 def _excel_fraction_to_time(frac: float) -> Optional[time]:
     """
     Convert Excel time (fraction of day, or serial) to datetime.time.
@@ -54,48 +63,18 @@ def _excel_fraction_to_time(frac: float) -> Optional[time]:
         f = float(frac)
     except Exception:
         return None
-    # keep only fractional part (time-of-day)
-    frac_day = f % 1.0
-    total_minutes = int(round(frac_day * 24 * 60))
-    total_minutes = total_minutes % (24 * 60)
-    hh = total_minutes // 60
-    mm = total_minutes % 60
-    return time(hour=hh, minute=mm)
+    return _token_to_time(parse_token(f))
 
 
 def _parse_hhmm(s: str) -> Optional[time]:
     """
     Parse a single HH:MM-like string into time.
-    Accepts separators ':' or '.' and optional seconds.
-    Returns None on failure.
+    Accepts separators ':' or '.' and optional seconds; "H:MM" without
+    zero-pad falls back to int parsing. Returns None on failure.
     """
     if not isinstance(s, str):
         return None
-    s = s.strip()
-    if not s:
-        return None
-    # normalize common separators
-    s = s.replace(".", ":")
-    # try multiple formats
-    fmts = ("%H:%M", "%H:%M:%S", "%H:%M.%f")
-    for fmt in fmts:
-        try:
-            dt = datetime.strptime(s, fmt)
-            return dt.time()
-        except Exception:
-            continue
-    # fallback: if looks like H:MM or HH:MM without zero-pad
-    parts = s.split(":")
-    if len(parts) >= 2:
-        try:
-            hh = int(parts[0])
-            mm = int(parts[1])
-            hh = hh % 24
-            mm = max(0, min(59, mm))
-            return time(hour=hh, minute=mm)
-        except Exception:
-            return None
-    return None
+    return _token_to_time(parse_token(s))
 
 
 def to_time(val: Union[str, time, datetime, Number, None]) -> Optional[time]:
@@ -147,26 +126,9 @@ def parse_shift(cell_value: object) -> Optional[Tuple[time, time]]:
             return start, end
         return None
 
-    # If it's a string, split by '-' (allow spaces around)
-    try:
-        s = str(cell_value).strip()
-    except Exception:
-        return None
-    if not s:
-        return None
-
-    # common separator is '-', but protect against other dashes / unicode
-    # normalize different dash characters
-    for dash in ("\u2013", "\u2014", "\u2212"):  # –, —, −
-        s = s.replace(dash, "-")
-
-    parts = [p.strip() for p in s.split("-") if p.strip() != ""]
-    if len(parts) != 2:
-        return None
-
-    start = to_time(parts[0])
-    end = to_time(parts[1])
-    if not start or not end:
+    tok = parse_token(cell_value if isinstance(cell_value, str) else str(cell_value))
+    if tok.kind != RANGE:
         return None
-
-    return start, end
\ No newline at end of file
+    start = _token_to_time(TimeToken(TIME, tok.start))
+    end = _token_to_time(TimeToken(TIME, tok.end))
+    return start, end
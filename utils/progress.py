@@ -0,0 +1,178 @@
+"""
+utils/progress.py - rate-limited progress / cancel callbacks for the report.
+
+generate_monthly_report and tag_schedule_rows_with_repo_from_form accept an
+optional `progress`: a callable progress(substage, done, total) or a
+ProgressReporter. The callable may return False to stop the run; the loop
+then raises OperationCancelled before anything is written to the sheet.
+
+ProgressReporter lets the hot loops call update() once per item: the
+callback only runs when a sub-stage starts or ends, or when min_interval
+seconds have passed since the last call. It also sums the time spent in
+each sub-stage (reporter.timings), which shows where a slow month goes.
+
+CancelToken is the other way to stop a run, from any thread: the loops
+call token.check(), which waits while the token is paused and raises
+OperationCancelled once it is cancelled. A reporter given a token checks
+it on every update() stride, independent of the callback rate limit.
+
+Functions:
+- as_reporter(progress) -> ProgressReporter (callables wrapped, reporters passed through)
+- check_cancel(token, where) -> None; raises OperationCancelled if the (optional) token is cancelled
+- report_fraction(substage, done, total) -> 0..1 of the whole report, or None
+
+Classes:
+- OperationCancelled
+- CancelToken()
+- ProgressReporter(callback, min_interval, cancel_token)
+"""
+import threading
+from time import perf_counter
+
+# generate_monthly_report's sub-stages in run order, with their share of the report's time
+REPORT_SUBSTAGES = (
+    ("index", 0.15),
+    ("tagging", 0.10),
+    ("entries", 0.40),
+    ("compute", 0.15),
+    ("writes", 0.15),
+    ("apply", 0.05),
+)
+SUBSTAGE_LABELS = {
+    "index": "Ευρετήριο ΑΦΜ",
+    "tagging": "ΡΕΠΟ από ΦΟΡΜΑ",
+    "entries": "Εγγραφές",
+    "compute": "Υπολογισμός υπερωριών",
+    "writes": "Σχέδιο εγγραφών",
+    "apply": "Εφαρμογή στο φύλλο",
+}
+
+_OFFSETS = {}
+_acc = 0.0
+for _name, _weight in REPORT_SUBSTAGES:
+    _OFFSETS[_name] = (_acc, _weight)
+    _acc += _weight
+del _acc, _name, _weight
+
+
+class OperationCancelled(Exception):
+    """The run was asked to stop (callback returned False or CancelToken); nothing has been written."""
+
+
+class CancelToken:
+    """
+    cancel() / pause() / resume() from any thread; the worker calls check().
+    Cancelling also releases a paused worker, so it can stop right away.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self):
+        if not self._cancelled.is_set():
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def check(self, where=None):
+        """Blocks while paused; raises OperationCancelled(where) if cancelled."""
+        if not self._running.is_set():
+            self._running.wait()
+        if self._cancelled.is_set():
+            raise OperationCancelled(where)
+
+
+def check_cancel(token, where=None):
+    """token.check(where) for an optional token."""
+    if token is not None:
+        token.check(where)
+
+
+def report_fraction(substage, done, total):
+    offset = _OFFSETS.get(substage)
+    if offset is None:
+        return None
+    start, weight = offset
+    part = min(1.0, done / total) if total else 1.0
+    return min(1.0, start + weight * part)
+
+
+class ProgressReporter:
+    def __init__(self, callback=None, min_interval=0.1, cancel_token=None):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.cancel_token = cancel_token
+        self.timings = {}
+        self._substage = None
+        self._t_substage = 0.0
+        self._t_last = 0.0
+        self._next_done = 0
+        self._stride = 1
+
+    def start(self, substage, total=0):
+        """Begins a sub-stage (ending the previous one); always reported."""
+        check_cancel(self.cancel_token, substage)
+        now = perf_counter()
+        self._close(now)
+        self._substage = substage
+        self._t_substage = now
+        # Only look at the clock every ~0.1% of the items
+        self._stride = max(1, total // 1000)
+        self._next_done = self._stride
+        self._notify(0, total, now)
+
+    def update(self, done, total):
+        """Reports done/total of the current sub-stage if min_interval has passed (or done == total)."""
+        if done < self._next_done and done < total:
+            return
+        self._next_done = done + self._stride
+        if self.cancel_token is not None:
+            self._check_token()
+        now = perf_counter()
+        if done < total and now - self._t_last < self.min_interval:
+            return
+        self._notify(done, total, now)
+
+    def finish(self):
+        self._close(perf_counter())
+        self._substage = None
+
+    def _check_token(self):
+        try:
+            self.cancel_token.check(self._substage)
+        except OperationCancelled:
+            self.finish()
+            raise
+
+    def _close(self, now):
+        if self._substage is not None:
+            elapsed = self.timings.get(self._substage, 0.0) + now - self._t_substage
+            self.timings[self._substage] = round(elapsed, 6)
+
+    def _notify(self, done, total, now):
+        self._t_last = now
+        substage = self._substage
+        if self.callback is not None and self.callback(substage, done, total) is False:
+            self.finish()
+            raise OperationCancelled(substage)
+
+
+def as_reporter(progress) -> ProgressReporter:
+    if isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
@@ -0,0 +1,192 @@
+"""
+utils/result_cube.py - the month's results as one dense array.
+
+generate_monthly_report used to leave its results only as scattered cell
+writes, so monthly totals existed only as spreadsheet formulas. A
+ResultCube holds them as an employees x 6 metrics x 31 days float64 array
+(metrics in METRIC_LABELS / get_metric_rows order, day d at index d - 1)
+plus a mask of the cells actually written, so totals and checks are single
+NumPy reductions.
+
+Writes are recorded in report order and scattered into the arrays in one
+go; a later write to the same (employee, metric, day) replaces the earlier
+one, as it does in the sheet. to_plan() hands the cube back to the
+WritePlan one employee block at a time, each metric row in one batch.
+
+Classes:
+- ResultCube()
+
+Constants:
+- CUBE_METRICS: METRIC_LABELS (axis 1)
+"""
+import numpy as np
+
+from utils.metrics import METRIC_LABELS
+from utils.month_layout import MAX_DAYS
+from utils.overtime_utils import allowed_by_type
+
+CUBE_METRICS = METRIC_LABELS
+METRIC_INDEX = {label: i for i, label in enumerate(CUBE_METRICS)}
+# Written back as ints (the report writes 1 / 0 flags there)
+_INT_METRICS = frozenset({METRIC_INDEX["ΠΛΗΘΟΣ ΚΥΡΙΑΚΩΝ"]})
+# Hours worked beyond the shift, compared with allowed_by_type
+_EXTRA_METRICS = [METRIC_INDEX[label] for label in ("ΕΠ.ΩΡΕΣ", "ΥΠΕΡΕΡΓΑΣΙΑ", "ΥΠΕΡΩΡΙΑ")]
+
+
+class ResultCube:
+    """
+    start(layout) binds the cube to a month (MonthLayout); employee() adds an
+    ΩΡΟΜΕΤΡΗΣΗ block and returns its index; day_type() notes the ΤΥΠΟΣ of an
+    entry; set() records a value. values / written are (employees, 6, 31)
+    arrays, allowed (employees, 31) the allowed_by_type hours of each day's
+    entry (NaN: no entry or unknown ΤΥΠΟΣ); afms and metric_rows are per employee.
+    """
+
+    def __init__(self):
+        self.start(None)
+
+    def __len__(self):
+        return len(self.afms)
+
+    def start(self, layout, day_columns=None):
+        """
+        Empties the cube for a new month; day_columns (indexed by day) are
+        the ΩΡΟΜΕΤΡΗΣΗ columns to write to, by default the layout's.
+        """
+        self.layout = layout
+        columns = (day_columns or layout.day_columns)[1:] if layout is not None else ()
+        self._columns = np.array(list(columns) + [0] * (MAX_DAYS - len(columns)), dtype=np.int64)
+        self.afms = []
+        self.metric_rows = []  # per employee: the 6 rows in CUBE_METRICS order
+        self._by_base_row = {}
+        self._pending = ([], [])  # (flat index, value) in write order
+        self._types = {}  # (employee, day) -> ΤΥΠΟΣ of the day's last entry
+        self._values = np.zeros((0, len(CUBE_METRICS), MAX_DAYS))
+        self._written = np.zeros((0, len(CUBE_METRICS), MAX_DAYS), dtype=bool)
+
+    def employee(self, base_row, afm, metric_rows):
+        """Index of the block starting at base_row, added on first use (metric_rows: get_metric_rows)."""
+        i = self._by_base_row.get(base_row)
+        if i is None:
+            i = self._by_base_row[base_row] = len(self.afms)
+            self.afms.append(afm)
+            self.metric_rows.append(tuple(metric_rows[label] for label in CUBE_METRICS))
+        return i
+
+    def day_type(self, employee, day, work_type):
+        self._types[(employee, day)] = work_type
+
+    def set(self, employee, metric, day, value):
+        flat, values = self._pending
+        flat.append((employee * len(CUBE_METRICS) + METRIC_INDEX[metric]) * MAX_DAYS + day - 1)
+        values.append(value)
+
+    def _materialize(self):
+        flat, values = self._pending
+        shape = (len(self.afms), len(CUBE_METRICS), MAX_DAYS)
+        if self._values.shape != shape:
+            grown = np.zeros(shape)
+            grown[:self._values.shape[0]] = self._values
+            mask = np.zeros(shape, dtype=bool)
+            mask[:self._written.shape[0]] = self._written
+            self._values, self._written = grown, mask
+        if not flat:
+            return
+        flat = np.asarray(flat, dtype=np.intp)
+        # Last write wins: keep each cell's final occurrence (fancy assignment has no order guarantee)
+        _, last_rev = np.unique(flat[::-1], return_index=True)
+        keep = len(flat) - 1 - last_rev
+        self._values.reshape(-1)[flat[keep]] = np.asarray(values, dtype=np.float64)[keep]
+        self._written.reshape(-1)[flat[keep]] = True
+        self._pending = ([], [])
+
+    @property
+    def values(self) -> np.ndarray:
+        self._materialize()
+        return self._values
+
+    @property
+    def written(self) -> np.ndarray:
+        self._materialize()
+        return self._written
+
+    def monthly_totals(self) -> np.ndarray:
+        """(employees, 6): each metric summed over the month."""
+        return self.values.sum(axis=2)
+
+    def metric_totals(self) -> dict:
+        """Metric -> total over all employees and days."""
+        return dict(zip(CUBE_METRICS, self.values.sum(axis=(0, 2)).round(3).tolist()))
+
+    def sunday_counts(self) -> np.ndarray:
+        """(employees,): Sundays of the month with any metric written."""
+        sundays = np.asarray(self.layout.sundays, dtype=np.intp) - 1
+        return self.written[:, :, sundays].any(axis=1).sum(axis=1)
+
+    @property
+    def allowed(self) -> np.ndarray:
+        allowed = np.full((len(self.afms), MAX_DAYS), np.nan)
+        if self._types:
+            (emps, days), types = zip(*self._types.keys()), self._types.values()
+            allowed[np.asarray(emps, dtype=np.intp), np.asarray(days, dtype=np.intp) - 1] = [
+                allowed_by_type.get((wt or "").strip().upper(), np.nan) for wt in types]
+        return allowed
+
+    def check_allowed(self, tolerance=0.005) -> dict:
+        """
+        Checks against allowed_by_type:
+        - "unknown_type": (employees,) some entry's ΤΥΠΟΣ not in allowed_by_type
+        - "over_allowed": (employees, 31) days whose extra hours (ΕΠ.ΩΡΕΣ +
+          ΥΠΕΡΕΡΓΑΣΙΑ + ΥΠΕΡΩΡΙΑ) exceed the allowed hours of the day's ΤΥΠΟΣ,
+          i.e. more than a second full shift (usually a mistyped departure)
+        """
+        unknown = np.zeros(len(self.afms), dtype=bool)
+        for (e, _), wt in self._types.items():
+            if (wt or "").strip().upper() not in allowed_by_type:
+                unknown[e] = True
+        extra = self.values[:, _EXTRA_METRICS, :].sum(axis=1)
+        # NaN allowed (no entry, unknown ΤΥΠΟΣ) compares False
+        with np.errstate(invalid="ignore"):
+            over = extra > self.allowed + tolerance
+        return {"unknown_type": unknown, "over_allowed": over}
+
+    def slabs(self):
+        """
+        (row, first_col, values, metric, employee, days) per run of adjacent
+        written columns, employee blocks in order, metric rows top down.
+        """
+        e, m, d = np.nonzero(self.written)
+        if not e.size:
+            return
+        rows = np.asarray(self.metric_rows, dtype=np.int64)[e, m]
+        cols = self._columns[d]
+        order = np.lexsort((cols, rows, e))
+        e, m, d, rows, cols = e[order], m[order], d[order], rows[order], cols[order]
+        values = self._values[e, m, d].tolist()
+        days = (d + 1).tolist()
+        # A slab ends where the block, the metric row or the run of columns changes
+        breaks = np.flatnonzero((np.diff(e) != 0) | (np.diff(m) != 0) | (np.diff(cols) != 1)) + 1
+        for lo, hi in zip([0] + breaks.tolist(), breaks.tolist() + [len(e)]):
+            metric = int(m[lo])
+            run_values = values[lo:hi]
+            if metric in _INT_METRICS:
+                run_values = [int(v) if v.is_integer() else v for v in run_values]
+            yield int(rows[lo]), int(cols[lo]), run_values, CUBE_METRICS[metric], int(e[lo]), days[lo:hi]
+
+    def to_plan(self, write_plan) -> int:
+        """Adds every written cell to write_plan, one set_row() per metric row; returns the number of cells."""
+        dates = self.layout.dates
+        n = 0
+        row_cells, current = {}, None
+        for row, first_col, run_values, metric, e, days in self.slabs():
+            if row != current:
+                if row_cells:
+                    write_plan.set_row(current, row_cells)
+                row_cells, current = {}, row
+            afm = self.afms[e]
+            row_cells.update(zip(range(first_col, first_col + len(run_values)),
+                                 zip(run_values, [(metric, afm, dates[day]) for day in days])))
+            n += len(run_values)
+        if row_cells:
+            write_plan.set_row(current, row_cells)
+        return n
@@ -0,0 +1,102 @@
+"""
+utils/schedule.py - compact record for one parsed shift (or ΡΕΠΟ day).
+
+The weekly parser used to emit a 7-key dict per shift, with "hours" and
+"ΩΡΑΡΙΟ" holding the same value. ScheduleEntry keeps one slot per field
+and interns the repeated strings (ΑΦΜ, τύπος, "HH:MM"), so large rosters
+cost a fraction of the memory.
+
+Code that still speaks dicts keeps working: entry["ΩΡΑ ΑΠΟΧΩΡΗΣΗ"],
+entry.get("is_repo"), "employee" in entry and entry["is_repo"] = True map
+onto the slots (see FIELD_ALIASES).
+
+Functions:
+- as_schedule_entry(obj) -> ScheduleEntry (dicts are converted, entries passed through)
+- ensure_schedule_entries(rows) -> rows, with any dicts converted in place
+
+Classes:
+- ScheduleEntry(date, employee, hours, work_type, end_plus_30, departure, is_repo)
+"""
+from sys import intern
+
+# Legacy dict keys -> slot names
+FIELD_ALIASES = {
+    "date": "date",
+    "employee": "employee",
+    "hours": "hours",
+    "ΩΡΑΡΙΟ": "hours",
+    "work_type": "work_type",
+    "ΩΡΑ ΛΗΞΗΣ+30": "end_plus_30",
+    "ΩΡΑ ΑΠΟΧΩΡΗΣΗ": "departure",
+    "is_repo": "is_repo",
+}
+
+
+def _interned(value):
+    return intern(value) if type(value) is str else value
+
+
+class ScheduleEntry:
+    __slots__ = ("date", "employee", "hours", "work_type", "end_plus_30", "departure", "is_repo")
+
+    def __init__(self, date, employee, hours=None, work_type="", end_plus_30=None, departure=None, is_repo=False):
+        self.date = date
+        self.employee = _interned(employee)
+        self.hours = hours
+        self.work_type = _interned(work_type)
+        self.end_plus_30 = _interned(end_plus_30)
+        self.departure = _interned(departure)
+        self.is_repo = is_repo
+
+    @classmethod
+    def from_mapping(cls, d):
+        return cls(
+            d.get("date"),
+            d.get("employee"),
+            d.get("hours", d.get("ΩΡΑΡΙΟ")),
+            d.get("work_type") or "",
+            d.get("ΩΡΑ ΛΗΞΗΣ+30"),
+            d.get("ΩΡΑ ΑΠΟΧΩΡΗΣΗ"),
+            bool(d.get("is_repo", False)),
+        )
+
+    # --- dict compatibility ---
+    def __getitem__(self, key):
+        try:
+            return getattr(self, FIELD_ALIASES[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in FIELD_ALIASES:
+            raise KeyError(key)
+        setattr(self, FIELD_ALIASES[key], value)
+
+    def __contains__(self, key):
+        return key in FIELD_ALIASES
+
+    def get(self, key, default=None):
+        slot = FIELD_ALIASES.get(key)
+        return getattr(self, slot) if slot else default
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, slot) for key, slot in FIELD_ALIASES.items()}
+
+    def __repr__(self):
+        return (f"ScheduleEntry(date={self.date!r}, employee={self.employee!r}, hours={self.hours!r}, "
+                f"work_type={self.work_type!r}, end_plus_30={self.end_plus_30!r}, "
+                f"departure={self.departure!r}, is_repo={self.is_repo!r})")
+
+
+def as_schedule_entry(obj) -> ScheduleEntry:
+    if isinstance(obj, ScheduleEntry):
+        return obj
+    return ScheduleEntry.from_mapping(obj)
+
+
+def ensure_schedule_entries(rows: list) -> list:
+    """Converts legacy dict entries of `rows` in place; returns the same list."""
+    for i, obj in enumerate(rows):
+        if not isinstance(obj, ScheduleEntry):
+            rows[i] = ScheduleEntry.from_mapping(obj)
+    return rows
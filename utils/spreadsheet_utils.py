@@ -1,6 +1,15 @@
 import os
 import subprocess
-from tkinter import messagebox
+
+def _index_to_excel_column(index):
+    letters = ""
+    while index >= 0:
+        letters = chr(index % 26 + 65) + letters
+        index = index // 26 - 1
+    return letters
+
+# Day 1 -> 'H' ... day 31 -> 'AL', worked out once (no openpyxl: the GUI imports this at start-up)
+_DAY_LETTERS = tuple(_index_to_excel_column(ord("H") - ord("A") + d) for d in range(31))
 
 def get_column_from_day(day_of_month):
     """
@@ -9,18 +18,7 @@ def get_column_from_day(day_of_month):
     """
     if not (1 <= day_of_month <= 31):
         raise ValueError("Η ημέρα πρέπει να είναι μεταξύ 1 και 31")
-
-    start_index = ord("H") - ord("A")  # 7 (0-based)
-    column_index = start_index + (day_of_month - 1)
-
-    def index_to_excel_column(index):
-        letters = ""
-        while index >= 0:
-            letters = chr(index % 26 + 65) + letters
-            index = index // 26 - 1
-        return letters
-
-    return index_to_excel_column(column_index)
+    return _DAY_LETTERS[day_of_month - 1]
 
 def open_excel(path):
     if os.path.exists(path):
@@ -34,4 +32,49 @@ def open_excel(path):
             # fallback to start via shell
             subprocess.Popen(["start", "", path], shell=True)
     else:
-        messagebox.showwarning("Προσοχή", "Δεν βρέθηκε το αρχείο για άνοιγμα.")
\ No newline at end of file
+        # imported lazily so headless users of this module never load tkinter
+        from tkinter import messagebox
+        messagebox.showwarning("Προσοχή", "Δεν βρέθηκε το αρχείο για άνοιγμα.")
+
+class _CellValue:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+class SheetValues:
+    """
+    Values-only, random-access copy of the rows we need from a worksheet.
+
+    Read-only (streaming) worksheets make every ws.cell() call re-parse the
+    sheet XML, so streaming readers collect the rows they need here once and
+    hand this object to code that expects `.title`, `.max_row`, `.cell()` and
+    `.iter_rows(values_only=True)`.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self._rows = {}
+
+    def set_row(self, row, values):
+        self._rows[row] = tuple(values)
+
+    @property
+    def max_row(self):
+        return max(self._rows) if self._rows else 0
+
+    @property
+    def max_column(self):
+        return max((len(v) for v in self._rows.values()), default=0)
+
+    def cell(self, row, column):
+        values = self._rows.get(row, ())
+        return _CellValue(values[column - 1] if 0 < column <= len(values) else None)
+
+    def iter_rows(self, min_row=1, max_row=None, min_col=1, max_col=None, values_only=True):
+        max_row = max_row or self.max_row
+        max_col = max_col or self.max_column
+        for r in range(min_row, max_row + 1):
+            values = self._rows.get(r, ())
+            row = tuple(values[c - 1] if c <= len(values) else None for c in range(min_col, max_col + 1))
+            yield row if values_only else tuple(_CellValue(v) for v in row)
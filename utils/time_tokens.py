@@ -0,0 +1,158 @@
+"""
+utils/time_tokens.py - one cached parser for every time token in the rosters.
+
+Rosters reuse a small set of tokens ("08:00-16:00", "22:30", "ΡΕΠΟ", Excel
+fractions), so each distinct token is parsed once and the resulting TimeToken
+is shared by every caller (gui, report_logic, overtime_utils, overtime_engine).
+
+Functions:
+- parse_token(value) -> TimeToken (cached for str / int / float)
+- strict_minutes(value) -> minutes since midnight, or -1 unless "H:MM"/"HH:MM"
+- token_cache_info() -> dict(hits, misses, size, maxsize)
+- clear_token_cache()
+
+Constants:
+- INVALID_TIME_VALUES / INVALID_TIME_TOKENS: Excel error and null tokens
+- TOKEN_CACHE_SIZE: bound of the token cache
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+INVALID_TIME_VALUES = [
+    None, "", "0", "null", "#null", "#NULL",
+    "#TIMH!", "#VALUE!", "#DIV/0!", "#REF!", "#NAME?", "#N/A"
+]
+INVALID_TIME_TOKENS = {str(v).strip().upper() for v in INVALID_TIME_VALUES if isinstance(v, str)}
+
+REPO_TOKEN = "ΡΕΠΟ"
+TOKEN_CACHE_SIZE = 4096
+
+# Token kinds
+EMPTY = "empty"
+INVALID = "invalid"
+REPO = "repo"
+TIME = "time"
+RANGE = "range"
+
+# How strictly a time matched (ranges keep the weaker of their two parts)
+LENIENT = 0   # only the "int:int" fallback of overtime_utils._parse_hhmm
+SECONDS = 1   # strptime("%H:%M:%S")
+EXACT = 2     # strptime("%H:%M")
+
+_DASHES = ("–", "—", "−")  # –, —, −
+
+# Same acceptance as datetime.strptime with "%H:%M" / "%H:%M:%S"
+_HH = r"(2[0-3]|[0-1]\d|\d)"
+_MM = r"([0-5]\d|\d)"
+_HHMM_RE = re.compile(_HH + ":" + _MM, re.IGNORECASE)
+_HHMMSS_RE = re.compile(_HH + ":" + _MM + ":" + _MM, re.IGNORECASE)
+
+
+class TimeToken(NamedTuple):
+    kind: str
+    start: int = -1   # seconds since midnight (TIME, RANGE start)
+    end: int = -1     # seconds since midnight (RANGE end)
+    level: int = -1   # EXACT / SECONDS / LENIENT for TIME and RANGE
+
+    @property
+    def start_minutes(self) -> int:
+        return self.start // 60 if self.start >= 0 else -1
+
+    @property
+    def end_minutes(self) -> int:
+        return self.end // 60 if self.end >= 0 else -1
+
+
+_EMPTY_TOKEN = TimeToken(EMPTY)
+_INVALID_TOKEN = TimeToken(INVALID)
+_REPO_TOKEN = TimeToken(REPO)
+
+
+def _parse_clock(s: str):
+    """'HH:MM[:SS]' (':' or '.') -> (seconds, level) or None."""
+    s = s.replace(".", ":")
+    m = _HHMM_RE.fullmatch(s)
+    if m:
+        return (int(m.group(1)) * 60 + int(m.group(2))) * 60, EXACT
+    m = _HHMMSS_RE.fullmatch(s)
+    if m:
+        return (int(m.group(1)) * 60 + int(m.group(2))) * 60 + int(m.group(3)), SECONDS
+    # fallback: if looks like H:MM or HH:MM without zero-pad
+    parts = s.split(":")
+    if len(parts) >= 2:
+        try:
+            hh = int(parts[0]) % 24
+            mm = max(0, min(59, int(parts[1])))
+        except ValueError:
+            return None
+        return (hh * 60 + mm) * 60, LENIENT
+    return None
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE, typed=True)
+def _parse_cached(value) -> TimeToken:
+    if isinstance(value, (int, float)):
+        # Excel stores times as fraction of day
+        total_minutes = int(round((float(value) % 1.0) * 24 * 60)) % (24 * 60)
+        return TimeToken(TIME, total_minutes * 60, -1, EXACT)
+
+    s = value.strip()
+    if not s:
+        return _EMPTY_TOKEN
+    upper = s.upper()
+    if upper in INVALID_TIME_TOKENS:
+        return _INVALID_TOKEN
+    if upper.replace(" ", "") == REPO_TOKEN:
+        return _REPO_TOKEN
+
+    for dash in _DASHES:
+        s = s.replace(dash, "-")
+    if "-" in s:
+        parts = [p.strip() for p in s.split("-") if p.strip() != ""]
+        if len(parts) != 2:
+            return _INVALID_TOKEN
+        start = _parse_clock(parts[0])
+        end = _parse_clock(parts[1])
+        if not start or not end:
+            return _INVALID_TOKEN
+        return TimeToken(RANGE, start[0], end[0], min(start[1], end[1]))
+
+    clock = _parse_clock(s)
+    if not clock:
+        return _INVALID_TOKEN
+    return TimeToken(TIME, clock[0], -1, clock[1])
+
+
+def parse_token(value) -> TimeToken:
+    """
+    Classify and parse a roster cell value.
+    Strings and Excel numbers go through the bounded cache; anything else
+    (None, dates, objects) is EMPTY or INVALID.
+    """
+    if value is None:
+        return _EMPTY_TOKEN
+    if isinstance(value, bool):
+        return _INVALID_TOKEN
+    if isinstance(value, (str, int, float)):
+        return _parse_cached(value)
+    return _INVALID_TOKEN
+
+
+def strict_minutes(value) -> int:
+    """Minutes since midnight if the value is exactly what strptime("%H:%M") accepts, else -1."""
+    if not isinstance(value, str) or "." in value:
+        return -1
+    tok = _parse_cached(value)
+    if tok.kind != TIME or tok.level != EXACT or value != value.strip():
+        return -1
+    return tok.start_minutes
+
+
+def token_cache_info() -> dict:
+    info = _parse_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+def clear_token_cache():
+    _parse_cached.cache_clear()
@@ -0,0 +1,120 @@
+"""
+utils/weekly_cache.py - on-disk cache of parsed weekly workbooks.
+
+Entries are keyed by the SHA-256 of the file contents plus the parser
+version, so re-running an unchanged weekly file (e.g. for another month)
+needs no openpyxl at all. Each file is a short magic header followed by a
+zlib-compressed pickle of plain tuples. For every source path the digest of
+its last parse is remembered, so an edited file can reuse the rows that did
+not change (see export_pipeline.parse_weekly_schedule(reuse=...)).
+
+Functions:
+- default_cache_dir() -> str ($TRENK_HOURS_CACHE, else ~/.cache/trenk-hours-app/weekly)
+- file_digest(path) -> hex SHA-256 of the file contents
+
+Classes:
+- WeeklyCache(cache_dir, max_files)
+"""
+import hashlib
+import json
+import os
+import pickle
+import zlib
+
+CACHE_MAGIC = b"TRWK\x01"
+DEFAULT_MAX_FILES = 32
+_LATEST_INDEX = "latest.json"
+
+
+def default_cache_dir() -> str:
+    env = os.environ.get("TRENK_HOURS_CACHE")
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "trenk-hours-app", "weekly")
+
+
+def file_digest(path, chunk_size=1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _atomic_write(path, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class WeeklyCache:
+    """
+    load()/store() a parse payload by (digest, parser_version); latest() gives
+    the last payload stored for a source path. Unreadable or foreign files are
+    treated as misses. At most max_files payloads are kept (oldest removed).
+    """
+
+    def __init__(self, cache_dir=None, max_files=DEFAULT_MAX_FILES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_files = max_files
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, digest, version):
+        return os.path.join(self.cache_dir, f"{digest}.v{version}.bin")
+
+    def load(self, digest, version):
+        path = self._path(digest, version)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if not data.startswith(CACHE_MAGIC):
+                return None
+            payload = pickle.loads(zlib.decompress(data[len(CACHE_MAGIC):]))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        try:
+            os.utime(path)  # keeps recently used payloads out of pruning
+        except OSError:
+            pass
+        return payload
+
+    def store(self, digest, version, payload, source_path=None):
+        data = CACHE_MAGIC + zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        _atomic_write(self._path(digest, version), data)
+        if source_path:
+            self.remember(source_path, digest)
+        self._prune()
+
+    def remember(self, source_path, digest):
+        """Marks digest as the latest parse of source_path (for latest())."""
+        index = self._read_index()
+        key = os.path.abspath(source_path)
+        if index.get(key) == digest:
+            return
+        index[key] = digest
+        _atomic_write(os.path.join(self.cache_dir, _LATEST_INDEX),
+                      json.dumps(index, ensure_ascii=False).encode("utf-8"))
+
+    def latest(self, source_path, version):
+        digest = self._read_index().get(os.path.abspath(source_path))
+        return self.load(digest, version) if digest else None
+
+    def _read_index(self) -> dict:
+        try:
+            with open(os.path.join(self.cache_dir, _LATEST_INDEX), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _prune(self):
+        files = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith(".bin")]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
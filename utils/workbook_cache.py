@@ -0,0 +1,157 @@
+"""
+utils/workbook_cache.py - loaded workbooks kept in memory between runs.
+
+The GUI runs the export again and again against the same payroll template
+(e.g. three months in a row), and every run used to openpyxl.load_workbook
+it from scratch. WorkbookCache keeps the loaded workbooks of the current
+process, keyed by the real path plus the file's mtime and size, so an
+unchanged file is loaded once and an edited or replaced one is reloaded.
+
+The cached workbook itself is never handed to a run. snapshot() gives a
+copy-on-write view instead: the workbook object and the requested sheet are
+shallow clones that share the pristine Cell objects, while cells created
+while reading land only in the clone's own cell map. A run that is about to
+write into the sheet (the openpyxl save path) first calls writable(), which
+replaces the shared cells it will touch with private copies. The targeted
+save never writes into the sheet at all (see utils.write_plan).
+
+Memory is bounded by entry count and by the total number of cells held;
+the least recently used workbooks are dropped first.
+
+Functions:
+- file_key(path) -> (real path, mtime_ns, size)
+- shared_workbook_cache() -> the process-wide WorkbookCache
+- writable(ws, write_plan) -> ws, with private copies of the cells the plan writes
+
+Classes:
+- WorkbookCache(max_entries, max_cells)
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+
+import openpyxl
+from openpyxl.cell.cell import Cell
+
+DEFAULT_MAX_ENTRIES = 2
+# ~250 bytes per loaded cell: about 250 MB of workbooks at most
+DEFAULT_MAX_CELLS = 1_000_000
+
+
+def file_key(path):
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    return real, st.st_mtime_ns, st.st_size
+
+
+def _cell_count(wb):
+    return sum(len(getattr(ws, "_cells", ())) for ws in wb.worksheets)
+
+
+def _copy_cell(cell, ws):
+    clone = Cell(ws, row=cell.row, column=cell.column, style_array=cell._style)
+    clone._value = cell._value
+    clone.data_type = cell.data_type
+    clone._hyperlink = cell._hyperlink
+    clone._comment = cell._comment
+    return clone
+
+
+def writable(ws, write_plan):
+    """
+    Before write_plan.apply(ws) on a snapshot sheet: swaps the shared cells
+    the plan writes for private copies, so the cached workbook stays as
+    loaded. Ordinary sheets are returned untouched.
+    """
+    if getattr(ws, "_cow_source", None) is None:
+        return ws
+    cells = ws._cells
+    for r, c, _, _ in write_plan.items():
+        cell = cells.get((r, c))
+        if isinstance(cell, Cell) and cell.parent is not ws:
+            cells[(r, c)] = _copy_cell(cell, ws)
+    return ws
+
+
+class WorkbookCache:
+    """
+    get() returns the cached (pristine) workbook for a path, loading it on a
+    miss; snapshot() returns a copy-on-write (wb, ws) for one run. Thread-safe;
+    info() has the hit/miss/eviction counters.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_cells=DEFAULT_MAX_CELLS):
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        # (real path, load options) -> (mtime_ns, size, workbook, cells)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, path, **load_kwargs):
+        """Cached workbook for path (openpyxl.load_workbook(path, **load_kwargs) on a miss). Do not modify it."""
+        return self._get(path, load_kwargs)[0]
+
+    def _get(self, path, load_kwargs):
+        real, mtime_ns, size = file_key(path)
+        key = (real, tuple(sorted(load_kwargs.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (mtime_ns, size):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2], True
+            # Changed on disk (or never loaded): the old copy is useless either way
+            self._entries.pop(key, None)
+            self.misses += 1
+            wb = openpyxl.load_workbook(real, **load_kwargs)
+            self._entries[key] = (mtime_ns, size, wb, _cell_count(wb))
+            self._evict()
+            return wb, False
+
+    def _evict(self):
+        total = sum(entry[3] for entry in self._entries.values())
+        # The entry just loaded always stays, even if it alone is over the budget
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total > self.max_cells):
+            _, entry = self._entries.popitem(last=False)
+            total -= entry[3]
+            self.evictions += 1
+
+    def snapshot(self, path, pick_sheet, **load_kwargs):
+        """
+        (wb, ws, hit): a copy-on-write view of the cached workbook with the
+        sheet pick_sheet(wb) returns cloned; hit tells whether the load was skipped.
+        """
+        wb, hit = self._get(path, load_kwargs)
+        source = pick_sheet(wb)
+
+        view = copy.copy(wb)
+        view._sheets = list(wb._sheets)
+        ws = copy.copy(source)
+        ws._cells = dict(source._cells)
+        ws._parent = view
+        ws._cow_source = source
+        view._sheets[wb._sheets.index(source)] = ws
+        return view, ws, hit
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return {"entries": len(self._entries), "cells": sum(e[3] for e in self._entries.values()),
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_workbook_cache() -> WorkbookCache:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WorkbookCache()
+        return _shared
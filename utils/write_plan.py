@@ -0,0 +1,74 @@
+"""
+utils/write_plan.py - collected ΩΡΟΜΕΤΡΗΣΗ writes, applied in one pass.
+
+The report and the ΡΕΠΟ tagging add (row, col) -> value entries here instead
+of touching openpyxl cell by cell. A later write to the same cell replaces the
+earlier one (the same result the sequential writes had), and apply() writes
+the surviving values once, sorted by row and column. A plan that is never
+applied is a dry run: to_records() shows what would change.
+
+Classes:
+- WritePlan()
+"""
+from typing import Dict, List, Tuple
+
+from openpyxl.utils import get_column_letter
+
+
+class WritePlan:
+    def __init__(self):
+        # (row, col) -> (value, source); dicts keep first-insertion order
+        self._cells: Dict[Tuple[int, int], tuple] = {}
+        self.overridden = 0
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __contains__(self, key):
+        return key in self._cells
+
+    def set(self, row: int, col: int, value, source=""):
+        key = (row, col)
+        if key in self._cells:
+            self.overridden += 1
+        self._cells[key] = (value, source)
+
+    def set_many(self, cells):
+        """Adds {(row, col): (value, source)} in one go (same override rules as set())."""
+        for (row, col), (value, source) in cells.items():
+            self.set(row, col, value, source)
+
+    def set_row(self, row: int, cells):
+        """Adds {col: (value, source)} of one row in one go (same override rules as set())."""
+        planned = self._cells
+        keys = [(row, col) for col in cells]
+        self.overridden += sum(1 for key in keys if key in planned)
+        planned.update(zip(keys, cells.values()))
+
+    def value_at(self, ws, row: int, col: int):
+        """Value the cell will have after apply(): the planned one, else the sheet's."""
+        planned = self._cells.get((row, col))
+        if planned is not None:
+            return planned[0]
+        return ws.cell(row=row, column=col).value
+
+    def cells_in(self, min_row: int, max_row: int, min_col: int, max_col: int):
+        """((row, col), value) of the planned cells inside the given range."""
+        return [(key, v) for key, (v, _) in self._cells.items()
+                if min_row <= key[0] <= max_row and min_col <= key[1] <= max_col]
+
+    def items(self) -> List[tuple]:
+        """[(row, col, value, source)] sorted by row, then column."""
+        return [(r, c, v, src) for (r, c), (v, src) in sorted(self._cells.items())]
+
+    def apply(self, ws) -> int:
+        """Writes every planned value into ws; returns the number of cells written."""
+        for r, c, v, _ in self.items():
+            ws.cell(row=r, column=c).value = v
+        return len(self._cells)
+
+    def to_records(self) -> List[dict]:
+        """JSON-friendly rows; tuple sources such as (metric, afm, date) are joined with ' | '."""
+        return [{"cell": f"{get_column_letter(c)}{r}", "row": r, "col": c, "value": v,
+                 "source": " | ".join(str(x) for x in src) if isinstance(src, tuple) else src}
+                for r, c, v, src in self.items()]
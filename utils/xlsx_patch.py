@@ -0,0 +1,343 @@
+"""
+utils/xlsx_patch.py - targeted save: patch one sheet of an .xlsx in place of wb.save().
+
+openpyxl's save re-serializes every part of the payroll workbook (all sheets,
+styles, shared strings). The report only changes ΩΡΟΜΕΤΡΗΣΗ cells, and all of
+them go through a WritePlan, so save_patched() streams the original zip
+and rewrites only the parts whose content changes:
+- the target sheet XML (the planned cells replaced / inserted, styles kept),
+- xl/sharedStrings.xml when a new string value needs an entry,
+- xl/workbook.xml (fullCalcOnLoad, so formulas are recalculated on open) and
+  the calcChain part + its references, which are dropped as openpyxl does.
+Every other part is copied as its raw compressed bytes, without being
+inflated and deflated again; it keeps its original compression.
+
+Sheets with markup this patcher does not understand (prefixed namespaces,
+cells or rows without a reference) raise XlsxPatchError; callers fall back
+to wb.save().
+
+Functions:
+- save_patched(src_path, dst_path, sheet_title, cells, compresslevel=6) -> int (cells written)
+
+Exceptions:
+- XlsxPatchError
+"""
+import os
+import posixpath
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+SHARED_STRINGS_TYPE = NS_REL + "/sharedStrings"
+CALC_CHAIN_TYPE = NS_REL + "/calcChain"
+
+_SHEET_DATA_RE = re.compile(rb"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(rb"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_CELL_RE = re.compile(rb"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_REF_ATTR_RE = re.compile(rb'\br="([A-Z]+)(\d+)"')
+_ROW_NUM_RE = re.compile(rb'\br="(\d+)"')
+_STYLE_ATTR_RE = re.compile(rb'\bs="(\d+)"')
+_SPANS_ATTR_RE = re.compile(rb'\s+spans="[^"]*"')
+_DIMENSION_RE = re.compile(rb'<dimension\s+ref="([^"]*)"\s*/>')
+_SI_RE = re.compile(rb"<si>(.*?)</si>|<si\s*/>", re.S)
+_SIMPLE_T_RE = re.compile(rb"<t(?:\s[^>]*)?>(.*?)</t>", re.S)
+_CELL_REF_RE = re.compile(r"([A-Z]+)(\d+)")
+
+
+class XlsxPatchError(Exception):
+    pass
+
+
+def _part_path(base_dir, target):
+    """Relationship target -> zip member name."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def _locate_parts(zin, sheet_title):
+    """(sheet part, sharedStrings part or None, calcChain part or None, rels part)."""
+    workbook = ElementTree.fromstring(zin.read("xl/workbook.xml"))
+    rel_id = None
+    for sheet in workbook.iter(f"{{{NS_MAIN}}}sheet"):
+        if sheet.get("name") == sheet_title:
+            rel_id = sheet.get(f"{{{NS_REL}}}id")
+    if rel_id is None:
+        raise XlsxPatchError(f"Δεν βρέθηκε φύλλο '{sheet_title}' στο workbook.xml")
+
+    rels_part = "xl/_rels/workbook.xml.rels"
+    rels = ElementTree.fromstring(zin.read(rels_part))
+    sheet_part = shared_part = calc_part = None
+    for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        path = _part_path("xl", rel.get("Target", ""))
+        if rel.get("Id") == rel_id:
+            sheet_part = path
+        elif rel.get("Type") == SHARED_STRINGS_TYPE:
+            shared_part = path
+        elif rel.get("Type") == CALC_CHAIN_TYPE:
+            calc_part = path
+    if sheet_part is None:
+        raise XlsxPatchError(f"Δεν βρέθηκε το part του φύλλου '{sheet_title}'")
+    return sheet_part, shared_part, calc_part, rels_part
+
+
+class _SharedStrings:
+    """Appends strings to an existing sharedStrings part (plain <si><t> entries are reused)."""
+
+    def __init__(self, xml):
+        self.xml = xml
+        self.index = {}
+        self.count = 0
+        for m in _SI_RE.finditer(xml):
+            body = m.group(1) or b""
+            t = _SIMPLE_T_RE.fullmatch(body)
+            if t:
+                self.index.setdefault(unescape(t.group(1).decode("utf-8")), self.count)
+            self.count += 1
+        self.added = []
+        self.refs = 0
+
+    def get(self, text):
+        self.refs += 1
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = self.count + len(self.added)
+            self.added.append(text)
+        return idx
+
+    def render(self):
+        if not self.added:
+            return self.xml
+        items = b"".join(_si(text) for text in self.added)
+        xml = self.xml.replace(b"</sst>", items + b"</sst>", 1)
+        xml = re.sub(rb'uniqueCount="\d+"', f'uniqueCount="{self.count + len(self.added)}"'.encode(), xml, count=1)
+        m = re.search(rb'\bcount="(\d+)"', xml)
+        if m:
+            xml = xml[:m.start(1)] + str(int(m.group(1)) + self.refs).encode() + xml[m.end(1):]
+        return xml
+
+
+def _si(text):
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f"<si><t{space}>{escape(text)}</t></si>".encode("utf-8")
+
+
+def _cell_xml(ref, style, value, strings):
+    s_attr = f' s="{style.decode()}"' if style else ""
+    if value is None:
+        return f'<c r="{ref}"{s_attr}/>'.encode()
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s_attr} t="b"><v>{int(value)}</v></c>'.encode()
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{s_attr}><v>{value!r}</v></c>'.encode()
+    if isinstance(value, str):
+        if strings is not None:
+            return f'<c r="{ref}"{s_attr} t="s"><v>{strings.get(value)}</v></c>'.encode()
+        space = ' xml:space="preserve"' if value != value.strip() else ""
+        return f'<c r="{ref}"{s_attr} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'.encode("utf-8")
+    raise XlsxPatchError(f"Μη υποστηριζόμενος τύπος τιμής για {ref}: {type(value).__name__}")
+
+
+def _patch_row(attrs, body, row_num, planned, strings):
+    """Row element with its planned cells replaced / inserted in column order."""
+    out = []
+    planned = iter(planned)
+    nxt = next(planned, None)
+    for m in _CELL_RE.finditer(body or b""):
+        ref = _REF_ATTR_RE.search(m.group(1))
+        if not ref:
+            raise XlsxPatchError(f"Κελί χωρίς αναφορά στη γραμμή {row_num}")
+        col = column_index_from_string(ref.group(1).decode())
+        while nxt is not None and nxt[0] < col:
+            out.append(_cell_xml(f"{get_column_letter(nxt[0])}{row_num}", None, nxt[1], strings))
+            nxt = next(planned, None)
+        if nxt is not None and nxt[0] == col:
+            style = _STYLE_ATTR_RE.search(m.group(1))
+            out.append(_cell_xml(f"{ref.group(1).decode()}{row_num}", style.group(1) if style else None, nxt[1], strings))
+            nxt = next(planned, None)
+        else:
+            out.append(m.group(0))
+    while nxt is not None:
+        out.append(_cell_xml(f"{get_column_letter(nxt[0])}{row_num}", None, nxt[1], strings))
+        nxt = next(planned, None)
+    # spans is only a load hint; it would be stale once cells are added
+    return b"<row" + _SPANS_ATTR_RE.sub(b"", attrs) + b">" + b"".join(out) + b"</row>"
+
+
+def _patch_sheet(xml, by_row, strings):
+    m = _SHEET_DATA_RE.search(xml)
+    if not m:
+        raise XlsxPatchError("Δεν βρέθηκε <sheetData> (άγνωστη μορφή φύλλου)")
+    body = m.group(1) or b""
+
+    out = []
+    pending = sorted(by_row)
+    p = 0
+    pos = 0
+    for rm in _ROW_RE.finditer(body):
+        num = _ROW_NUM_RE.search(rm.group(1))
+        if not num:
+            raise XlsxPatchError("Γραμμή χωρίς αριθμό (r) στο φύλλο")
+        row_num = int(num.group(1))
+        out.append(body[pos:rm.start()])
+        while p < len(pending) and pending[p] < row_num:
+            out.append(_patch_row(f' r="{pending[p]}"'.encode(), b"", pending[p], by_row[pending[p]], strings))
+            p += 1
+        if p < len(pending) and pending[p] == row_num:
+            out.append(_patch_row(rm.group(1), rm.group(2), row_num, by_row[row_num], strings))
+            p += 1
+        else:
+            out.append(rm.group(0))
+        pos = rm.end()
+    out.append(body[pos:])
+    while p < len(pending):
+        out.append(_patch_row(f' r="{pending[p]}"'.encode(), b"", pending[p], by_row[pending[p]], strings))
+        p += 1
+
+    new_xml = xml[:m.start()] + b"<sheetData>" + b"".join(out) + b"</sheetData>" + xml[m.end():]
+    return _extend_dimension(new_xml, by_row)
+
+
+def _extend_dimension(xml, by_row):
+    m = _DIMENSION_RE.search(xml)
+    if not m or not by_row:
+        return xml
+    refs = [_CELL_REF_RE.fullmatch(r) for r in m.group(1).decode().split(":")]
+    if not all(refs):
+        return xml
+    min_col = min(column_index_from_string(r.group(1)) for r in refs)
+    max_col = max(column_index_from_string(r.group(1)) for r in refs)
+    min_row = min(int(r.group(2)) for r in refs)
+    max_row = max(int(r.group(2)) for r in refs)
+    cols = [c for cells in by_row.values() for c, _ in cells]
+    min_col, max_col = min(min_col, *cols), max(max_col, *cols)
+    min_row, max_row = min(min_row, *by_row), max(max_row, *by_row)
+    ref = f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+    return xml[:m.start(1)] + ref.encode() + xml[m.end(1):]
+
+
+def _force_recalc(workbook_xml):
+    m = re.search(rb"<calcPr\b[^>]*?/?>", workbook_xml)
+    if m:
+        tag = m.group(0)
+        if b"fullCalcOnLoad=" in tag:
+            new_tag = re.sub(rb'fullCalcOnLoad="[^"]*"', b'fullCalcOnLoad="1"', tag)
+        else:
+            new_tag = tag[:5] + b' fullCalcOnLoad="1"' + tag[5:]
+        return workbook_xml[:m.start()] + new_tag + workbook_xml[m.end():]
+    for anchor in (b"</definedNames>", b"<definedNames/>", b"<definedNames />", b"</externalReferences>", b"</sheets>"):
+        i = workbook_xml.find(anchor)
+        if i >= 0:
+            i += len(anchor)
+            return workbook_xml[:i] + b'<calcPr fullCalcOnLoad="1"/>' + workbook_xml[i:]
+    return workbook_xml
+
+
+def _drop_calc_chain_refs(rels_xml, content_types_xml, calc_part):
+    rels_xml = re.sub(rb"<Relationship\b[^>]*" + re.escape(CALC_CHAIN_TYPE.encode()) + rb"[^>]*/>", b"", rels_xml)
+    content_types_xml = re.sub(
+        rb'<Override\b[^>]*PartName="/' + re.escape(calc_part.encode()) + rb'"[^>]*/>', b"", content_types_xml
+    )
+    return rels_xml, content_types_xml
+
+
+def save_patched(src_path, dst_path, sheet_title, cells, compresslevel=6) -> int:
+    """
+    Writes dst_path = src_path with the given cells of sheet_title replaced.
+
+    cells: iterable of (row, col, value) (e.g. from WritePlan.items()); a later
+    entry for the same cell wins. compresslevel 0 stores the rewritten parts
+    uncompressed, 1–9 deflates them. Returns the number of cells written.
+    """
+    by_row = {}
+    for item in cells:
+        r, c, v = item[0], item[1], item[2]
+        by_row.setdefault(r, {})[c] = v
+    by_row = {r: sorted(cols.items()) for r, cols in by_row.items()}
+    n_cells = sum(len(v) for v in by_row.values())
+
+    compression = zipfile.ZIP_DEFLATED if compresslevel else zipfile.ZIP_STORED
+    # dst may be src itself (re-running on Payroll_Calculated.xlsx): write aside, then replace
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(dst_path)))
+    os.close(fd)
+    try:
+        _write_patched(src_path, tmp_path, sheet_title, by_row, compression, compresslevel)
+        shutil.copymode(src_path, tmp_path)  # mkstemp files are private (0600)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return n_cells
+
+
+def _copy_raw(zin, zout, info):
+    """Copies a member's compressed bytes as they are (no inflate / deflate round trip)."""
+    if info.flag_bits & 0x01:
+        raise XlsxPatchError(f"Κρυπτογραφημένο part: {info.filename}")
+    # The local header's name / extra lengths may differ from the central directory's
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise XlsxPatchError(f"Κατεστραμμένο local header: {info.filename}")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+    raw = zin.fp.read(info.compress_size)
+
+    out_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    out_info.external_attr = info.external_attr
+    out_info.compress_type = info.compress_type
+    # CRC and sizes are known, so they go in the local header instead of a data descriptor
+    out_info.flag_bits = info.flag_bits & ~0x08
+    out_info.CRC, out_info.compress_size, out_info.file_size = info.CRC, info.compress_size, info.file_size
+
+    # What ZipFile.writestr does around the data, minus the compressor
+    zout.fp.seek(zout.start_dir)
+    out_info.header_offset = zout.fp.tell()
+    zout.fp.write(out_info.FileHeader())
+    zout.fp.write(raw)
+    zout.filelist.append(out_info)
+    zout.NameToInfo[out_info.filename] = out_info
+    zout.start_dir = zout.fp.tell()
+
+
+def _write_patched(src_path, dst_path, sheet_title, by_row, compression, compresslevel):
+    with zipfile.ZipFile(src_path) as zin:
+        sheet_part, shared_part, calc_part, rels_part = _locate_parts(zin, sheet_title)
+        original = {part: zin.read(part) for part in (sheet_part, "xl/workbook.xml", shared_part) if part}
+        strings = _SharedStrings(original[shared_part]) if shared_part else None
+
+        patched = {
+            sheet_part: _patch_sheet(original[sheet_part], by_row, strings),
+            "xl/workbook.xml": _force_recalc(original["xl/workbook.xml"]),
+        }
+        if strings is not None:
+            patched[shared_part] = strings.render()
+        if calc_part:
+            patched[rels_part], patched["[Content_Types].xml"] = _drop_calc_chain_refs(
+                zin.read(rels_part), zin.read("[Content_Types].xml"), calc_part
+            )
+        # Parts that come out byte-identical are copied raw like the rest
+        patched = {part: data for part, data in patched.items() if data != original.get(part)}
+
+        with zipfile.ZipFile(dst_path, "w", compression=compression, compresslevel=compresslevel or None) as zout:
+            for info in zin.infolist():
+                if info.filename == calc_part:
+                    continue
+                data = patched.get(info.filename)
+                if data is None:
+                    _copy_raw(zin, zout, info)
+                    continue
+                out_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                out_info.external_attr = info.external_attr
+                out_info.compress_type = compression
+                zout.writestr(out_info, data, compress_type=compression, compresslevel=compresslevel or None)